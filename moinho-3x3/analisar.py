@@ -0,0 +1,298 @@
+"""
+Analise em massa de posicoes do Moinho 3x3 (linha de comandos).
+- Le as posicoes em fluxo, em JSON lines ou num formato binario compacto, e analisa-as
+  num conjunto de processos com o nivel (e orcamento) escolhido.
+- Escreve, pela ordem de entrada, uma linha JSON por posicao com o melhor movimento,
+  a pontuacao (perspetiva de 'X') e o numero de nos visitados.
+- A memoria e limitada: so ha, no maximo, 'janela' blocos de posicoes em curso.
+Formatos de entrada:
+- jsonl: uma posicao por linha, no formato de tuplo_para_tabuleiro, ex: [[1,0,-1],[0,1,-1],[1,-1,0]]
+  ou {"tabuleiro": [[...], [...], [...]], "jogador": "O"}.
+  Sem "jogador", joga quem tem menos pecas na colocacao e 'X' na fase de movimento.
+- bin: registos de 2 bytes (uint16 little-endian) = chave_base3 * 2 + (1 se joga 'O').
+Uso:
+  python3 analisar.py posicoes.jsonl -o resultados.jsonl --nivel dificil --trabalhadores 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import struct
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from projeto_final import (
+    NIVEIS, tuplo_para_tabuleiro, eh_tabuleiro, obter_ganhador, posicao_para_str,
+    obter_movimento_auto, cria_copia_tabuleiro,
+    _esta_na_fase_colocacao, _executar_movimento, _avaliar_estado_terminal,
+    _algoritmo_minimax, _calcular_movimento_facil, _chave_tabuleiro, _tabuleiro_da_chave,
+    _ESTATISTICAS_PESQUISA, definir_tabela_transposicao,
+)
+# -------------------------------------------------------------------------------------------------
+# Leitura e escrita das posicoes
+# -------------------------------------------------------------------------------------------------
+_REGISTO_BIN = struct.Struct('<H')
+
+def _jogador_por_omissao(tabuleiro: list) -> str:
+    """Na colocacao joga quem tem menos pecas ('X' em caso de igualdade); no movimento, 'X'."""
+    if _esta_na_fase_colocacao(tabuleiro):
+        pecas = [p for linha in tabuleiro for p in linha]
+        return 'X' if pecas.count('X') == pecas.count('O') else 'O'
+    return 'X'
+
+def ler_jsonl(ficheiro):
+    """
+    Gera as posicoes de um ficheiro JSON lines, uma de cada vez.
+
+    Args:
+        ficheiro (file): Ficheiro de texto aberto para leitura.
+
+    Yields:
+        tuple: (tuplo 3x3, jogador ou None) por cada linha nao vazia (None se a linha for invalida).
+    """
+    for linha in ficheiro:
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            dados = json.loads(linha)
+        except json.JSONDecodeError:
+            dados = None
+        if isinstance(dados, dict):
+            yield dados.get('tabuleiro'), dados.get('jogador')
+        else:
+            yield dados, None
+
+def ler_binario(ficheiro):
+    """
+    Gera as posicoes de um ficheiro no formato binario compacto.
+
+    Args:
+        ficheiro (file): Ficheiro binario aberto para leitura.
+
+    Yields:
+        tuple: (chave do tabuleiro, jogador) por cada registo de 2 bytes.
+    """
+    while True:
+        dados = ficheiro.read(_REGISTO_BIN.size * 4096)
+        if not dados:
+            return
+        for (valor,) in _REGISTO_BIN.iter_unpack(dados[:len(dados) - len(dados) % _REGISTO_BIN.size]):
+            yield valor >> 1, 'O' if valor & 1 else 'X'
+
+def escrever_binario(posicoes, ficheiro) -> int:
+    """
+    Escreve posicoes no formato binario compacto.
+
+    Args:
+        posicoes (iterable): Pares (TAD tabuleiro, jogador).
+        ficheiro (file): Ficheiro binario aberto para escrita.
+
+    Returns:
+        int: O numero de registos escritos.
+    """
+    total = 0
+    for tabuleiro, jogador in posicoes:
+        ficheiro.write(_REGISTO_BIN.pack(_chave_tabuleiro(tabuleiro) * 2 + (jogador == 'O')))
+        total += 1
+    return total
+
+# -------------------------------------------------------------------------------------------------
+# Analise de uma posicao
+# -------------------------------------------------------------------------------------------------
+def _movimento_para_str(movimento: tuple) -> str:
+    """Representacao externa de um movimento ('a1' ou 'a1a2'), como no input manual."""
+    return ''.join(posicao_para_str(p) for p in movimento)
+
+def analisar_posicao(tabuleiro: list, jogador: str, nivel: str, profundidade: int = 5,
+                     iteracoes=None) -> dict:
+    """
+    Analisa uma posicao com o nivel dado.
+    O movimento e sempre o que obter_movimento_auto escolheria; 'dificil' e 'mcts' podem
+    usar outra profundidade ou outro orcamento.
+
+    Args:
+        tabuleiro (list): O TAD tabuleiro.
+        jogador (str): O TAD peca do jogador a jogar.
+        nivel (str): O nivel ('facil', 'normal', 'dificil', 'mcts', 'aprendido').
+        profundidade (int): Profundidade do Minimax (nivel 'dificil').
+        iteracoes (int | None): Orcamento do MCTS (None usa mcts.CONFIGURACAO).
+
+    Returns:
+        dict: {'movimento': str | None, 'pontuacao': numero, 'nos': int}.
+
+    Raises:
+        ValueError: Se o nivel for invalido.
+    """
+    if nivel not in NIVEIS:
+        raise ValueError('analisar_posicao: nivel invalido')
+    if obter_ganhador(tabuleiro) != ' ':
+        return {'movimento': None, 'pontuacao': _avaliar_estado_terminal(tabuleiro), 'nos': 0}
+
+    if _esta_na_fase_colocacao(tabuleiro) or nivel in ('facil', 'normal', 'aprendido'):
+        movimento = obter_movimento_auto(tabuleiro, jogador, nivel)
+        seguinte = _executar_movimento(cria_copia_tabuleiro(tabuleiro), jogador, movimento)
+        return {'movimento': _movimento_para_str(movimento),
+                'pontuacao': _avaliar_estado_terminal(seguinte), 'nos': 1}
+
+    if nivel == 'dificil':
+        _ESTATISTICAS_PESQUISA['nos'] = 0
+        pontuacao, movimento = _algoritmo_minimax(tabuleiro, jogador, max_depth=profundidade)
+        nos = _ESTATISTICAS_PESQUISA['nos']
+    elif nivel == 'mcts':
+        import mcts
+        opcoes = {} if iteracoes is None else {'iteracoes': iteracoes}
+        pontuacao, movimento = mcts.procurar_mcts(tabuleiro, jogador, **opcoes)
+        nos = mcts.ESTATISTICAS['iteracoes']
+    if not movimento:
+        movimento = _calcular_movimento_facil(tabuleiro, jogador)
+    return {'movimento': _movimento_para_str(movimento), 'pontuacao': pontuacao, 'nos': nos}
+
+def _ler_tabuleiro(tabuleiro_ou_chave) -> list:
+    """Converte uma chave ou um tuplo 3x3 num TAD tabuleiro valido (ValueError caso contrario)."""
+    try:
+        if isinstance(tabuleiro_ou_chave, int):
+            tabuleiro = _tabuleiro_da_chave(tabuleiro_ou_chave)
+        else:
+            tabuleiro = tuplo_para_tabuleiro(tuple(tuple(l) for l in tabuleiro_ou_chave))
+    except (ValueError, TypeError):
+        raise ValueError('analisar: tabuleiro invalido')
+    if not eh_tabuleiro(tabuleiro):
+        raise ValueError('analisar: tabuleiro invalido')
+    return tabuleiro
+
+def _analisar_bloco(bloco: list, nivel: str, profundidade: int, iteracoes) -> list:
+    """Analisa um bloco de posicoes (executado num processo trabalhador)."""
+    resultados = []
+    for indice, tabuleiro_ou_chave, jogador in bloco:
+        try:
+            tabuleiro = _ler_tabuleiro(tabuleiro_ou_chave)
+            if jogador is None:
+                jogador = _jogador_por_omissao(tabuleiro)
+            elif jogador not in ('X', 'O'):
+                raise ValueError('analisar: jogador invalido')
+            resultado = analisar_posicao(tabuleiro, jogador, nivel, profundidade, iteracoes)
+            resultado['jogador'] = jogador
+        except ValueError as erro:
+            resultado = {'erro': str(erro)}
+        resultados.append({'indice': indice, **resultado})
+    return resultados
+
+# -------------------------------------------------------------------------------------------------
+# Processamento em fluxo (memoria limitada, ordem de entrada preservada)
+# -------------------------------------------------------------------------------------------------
+def _blocos(posicoes, tamanho: int):
+    """Agrupa as posicoes em blocos de (indice, tabuleiro, jogador)."""
+    bloco = []
+    for indice, (tabuleiro, jogador) in enumerate(posicoes):
+        bloco.append((indice, tabuleiro, jogador))
+        if len(bloco) == tamanho:
+            yield bloco
+            bloco = []
+    if bloco:
+        yield bloco
+
+def analisar_fluxo(posicoes, nivel: str = 'dificil', profundidade: int = 5, iteracoes=None,
+                   trabalhadores=None, tamanho_bloco: int = 256, janela=None, tabela=None):
+    """
+    Analisa um fluxo de posicoes num conjunto de processos, mantendo a ordem de entrada.
+    Nunca ha mais do que 'janela' blocos submetidos e por escrever.
+
+    Args:
+        posicoes (iterable): Pares (tuplo 3x3 ou chave, jogador ou None).
+        nivel (str): O nivel de analise.
+        profundidade (int): Profundidade do Minimax (nivel 'dificil').
+        iteracoes (int | None): Orcamento do MCTS (nivel 'mcts').
+        trabalhadores (int | None): Numero de processos (None usa os.cpu_count()).
+        tamanho_bloco (int): Posicoes por tarefa.
+        janela (int | None): Blocos em curso no maximo (por omissao, 2 por trabalhador).
+        tabela (TabelaTransposicao | None): Tabela de transposicao partilhada a que todos os
+            processos se anexam (ver transposicao.py).
+
+    Yields:
+        dict: O resultado de cada posicao, pela ordem de entrada.
+
+    Raises:
+        ValueError: Se o nivel for invalido.
+    """
+    if nivel not in NIVEIS:
+        raise ValueError('analisar: nivel invalido')
+    trabalhadores = trabalhadores or os.cpu_count() or 1
+    janela = janela or 2 * trabalhadores
+    blocos = _blocos(posicoes, tamanho_bloco)
+
+    if trabalhadores == 1:
+        anterior = definir_tabela_transposicao(tabela) if tabela is not None else None
+        try:
+            for bloco in blocos:
+                yield from _analisar_bloco(bloco, nivel, profundidade, iteracoes)
+        finally:
+            if tabela is not None:
+                definir_tabela_transposicao(anterior)
+        return
+
+    inicializacao = {}
+    if tabela is not None:
+        from transposicao import inicializar_trabalhador
+        inicializacao = {'initializer': inicializar_trabalhador,
+                         'initargs': (tabela.nome, multiprocessing.Value('i', 0))}
+    with ProcessPoolExecutor(max_workers=trabalhadores, **inicializacao) as executor:
+        em_curso = deque()
+        for bloco in blocos:
+            em_curso.append(executor.submit(_analisar_bloco, bloco, nivel, profundidade, iteracoes))
+            if len(em_curso) >= janela:
+                yield from em_curso.popleft().result()
+        while em_curso:
+            yield from em_curso.popleft().result()
+
+def main(argumentos=None) -> int:
+    """Ponto de entrada da linha de comandos."""
+    parser = argparse.ArgumentParser(description='Analise em massa de posicoes do Moinho 3x3.')
+    parser.add_argument('entrada', help="ficheiro de posicoes ('-' para stdin)")
+    parser.add_argument('-o', '--saida', default='-', help="ficheiro de resultados ('-' para stdout)")
+    parser.add_argument('--formato', choices=('jsonl', 'bin'), default='jsonl')
+    parser.add_argument('--nivel', choices=NIVEIS, default='dificil')
+    parser.add_argument('--profundidade', type=int, default=5)
+    parser.add_argument('--iteracoes', type=int, default=None)
+    parser.add_argument('--trabalhadores', type=int, default=None)
+    parser.add_argument('--bloco', type=int, default=256)
+    parser.add_argument('--tabela', type=int, default=0, metavar='ENTRADAS',
+                        help='usa uma tabela de transposicao partilhada com este numero de entradas')
+    parser.add_argument('--instantaneo', default=None, metavar='FICHEIRO',
+                        help='carrega a tabela deste instantaneo (se existir) e guarda-a no fim')
+    args = parser.parse_args(argumentos)
+
+    if args.formato == 'bin':
+        entrada = sys.stdin.buffer if args.entrada == '-' else open(args.entrada, 'rb')
+        posicoes = ler_binario(entrada)
+    else:
+        entrada = sys.stdin if args.entrada == '-' else open(args.entrada, encoding='utf-8')
+        posicoes = ler_jsonl(entrada)
+    saida = sys.stdout if args.saida == '-' else open(args.saida, 'w', encoding='utf-8')
+    tabela = None
+    if args.tabela:
+        from transposicao import TabelaTransposicao, carregar_instantaneo, guardar_instantaneo
+        tabela = TabelaTransposicao(args.tabela)
+        if args.instantaneo and os.path.exists(args.instantaneo):
+            carregar_instantaneo(tabela, args.instantaneo)
+
+    try:
+        for resultado in analisar_fluxo(posicoes, args.nivel, args.profundidade, args.iteracoes,
+                                        args.trabalhadores, args.bloco, tabela=tabela):
+            saida.write(json.dumps(resultado) + '\n')
+        if tabela is not None:
+            sys.stderr.write(f'tabela de transposicao: {json.dumps(tabela.estatisticas())}\n')
+            if args.instantaneo:
+                guardar_instantaneo(tabela, args.instantaneo)
+    finally:
+        if tabela is not None:
+            tabela.fechar()
+        if entrada not in (sys.stdin, sys.stdin.buffer):
+            entrada.close()
+        if saida is not sys.stdout:
+            saida.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
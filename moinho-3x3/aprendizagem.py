@@ -0,0 +1,373 @@
+"""
+Tabela de valores aprendida por auto-jogo - nivel 'aprendido' de obter_movimento_auto.
+- Auto-jogo: jogos entre niveis existentes, com uma fracao 'epsilon' de jogadas aleatorias,
+  gravados em JSON lines ({"jogadas": ["b2", "a1", ..., "b2a2"], "vencedor": "X", ...}).
+- Treino (Monte Carlo): cada posicao (tabuleiro, jogador a jogar) atingida num jogo recebe a media
+  dos resultados ('X' = 1, 'O' = -1, empate = 0), agrupando as posicoes simetricas pela chave canonica.
+- Tabela: ficheiro binario com um int8 (valor * 127) por (chave canonica, jogador a jogar).
+- Politica: antevisao de 1 jogada; cada jogada candidata custa uma consulta a tabela.
+Uso:
+  python3 aprendizagem.py autojogo -n 2000 -o jogos.jsonl
+  python3 aprendizagem.py treinar jogos.jsonl -o tabela_valores.bin
+  python3 aprendizagem.py comparar -n 100 --tabela tabela_valores.bin
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from codificacao import NUM_CHAVES, chave_canonica, chave_tabuleiro
+from projeto_final import (
+    cria_tabuleiro, cria_copia_tabuleiro, obter_ganhador, obter_posicoes_livres, outro_jogador,
+    posicao_para_str, str_para_posicao, str_para_movimento, obter_movimento_auto,
+    definir_tabela_transposicao, _esta_na_fase_colocacao, _gerar_movimentos_validos, _executar_movimento,
+)
+# -------------------------------------------------------------------------------------------------
+# Constantes e tabela ativa
+# -------------------------------------------------------------------------------------------------
+_MAGICO = b'MOINHOVT'
+_CABECALHO = struct.Struct('<8sHHI')  # magico, versao, escala, numero de valores
+_VERSAO = 1
+_ESCALA = 127
+
+CAMINHO_POR_OMISSAO = os.environ.get(
+    'MOINHO_TABELA_VALORES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tabela_valores.bin'))
+
+_VALORES = None  # tabela carregada a pedido pelo nivel 'aprendido'
+
+def _indice(tabuleiro: list, jogador: str) -> int:
+    """Indice na tabela de valores: chave canonica * 2 + 1 se joga 'O'."""
+    return chave_canonica(chave_tabuleiro(tabuleiro))[0] * 2 + (jogador == 'O')
+
+def _movimento_para_str(movimento: tuple) -> str:
+    """Representacao externa de um movimento ('a1' ou 'a1a2')."""
+    return ''.join(posicao_para_str(p) for p in movimento)
+
+def _str_para_jogada(entrada: str) -> tuple:
+    """Operacao inversa de _movimento_para_str."""
+    return (str_para_posicao(entrada),) if len(entrada) == 2 else str_para_movimento(entrada)
+
+def _jogadas_legais(tabuleiro: list, jogador: str) -> tuple:
+    """Colocacoes livres ou movimentos validos, pela ordem de leitura."""
+    if _esta_na_fase_colocacao(tabuleiro):
+        return tuple((p,) for p in obter_posicoes_livres(tabuleiro))
+    return _gerar_movimentos_validos(tabuleiro, jogador)
+
+# -------------------------------------------------------------------------------------------------
+# Auto-jogo
+# -------------------------------------------------------------------------------------------------
+def jogar_autojogo(nivel_x: str, nivel_o: str, epsilon: float = 0.2, max_jogadas: int = 60,
+                   gerador=None) -> dict:
+    """
+    Joga um jogo completo entre dois niveis de obter_movimento_auto.
+
+    Args:
+        nivel_x (str): Nivel de 'X'.
+        nivel_o (str): Nivel de 'O'.
+        epsilon (float): Probabilidade de cada jogada ser uma jogada legal aleatoria.
+        max_jogadas (int): Limite de jogadas (empate se for atingido).
+        gerador (random.Random | None): Gerador de numeros aleatorios.
+
+    Returns:
+        dict: {'niveis': [nivel_x, nivel_o], 'jogadas': [str, ...], 'vencedor': 'X' | 'O' | ' '}.
+    """
+    gerador = gerador or random.Random()
+    tabuleiro = cria_tabuleiro()
+    turno, jogadas = 'X', []
+    while obter_ganhador(tabuleiro) == ' ' and len(jogadas) < max_jogadas:
+        if gerador.random() < epsilon:
+            movimento = gerador.choice(_jogadas_legais(tabuleiro, turno))
+        else:
+            movimento = obter_movimento_auto(tabuleiro, turno, nivel_x if turno == 'X' else nivel_o)
+        _executar_movimento(tabuleiro, turno, movimento)
+        jogadas.append(_movimento_para_str(movimento))
+        turno = outro_jogador(turno)
+    return {'niveis': [nivel_x, nivel_o], 'jogadas': jogadas, 'vencedor': obter_ganhador(tabuleiro)}
+
+def _jogar_bloco(emparelhamentos: list, epsilon: float, max_jogadas: int, semente: int) -> list:
+    """Joga um bloco de jogos de auto-jogo (executado num processo trabalhador)."""
+    gerador = random.Random(semente)
+    return [jogar_autojogo(nx, no, epsilon, max_jogadas, gerador) for (nx, no) in emparelhamentos]
+
+def gerar_autojogo(n_jogos: int, niveis=(('dificil', 'dificil'),), epsilon: float = 0.2,
+                   max_jogadas: int = 60, trabalhadores: int = 1, semente=None, tabela=None,
+                   tamanho_bloco: int = 16):
+    """
+    Gera jogos de auto-jogo, em paralelo se trabalhadores > 1.
+
+    Args:
+        n_jogos (int): Numero de jogos.
+        niveis (tuple): Pares (nivel_x, nivel_o), usados de forma rotativa.
+        epsilon (float): Probabilidade de jogada aleatoria.
+        max_jogadas (int): Limite de jogadas por jogo.
+        trabalhadores (int): Numero de processos.
+        semente (int | None): Semente para reproduzir os jogos.
+        tabela (TabelaTransposicao | None): Tabela partilhada a que os processos se anexam (com um so
+            trabalhador, e ativada neste processo durante a geracao).
+        tamanho_bloco (int): Jogos por tarefa.
+
+    Yields:
+        dict: Cada jogo (ver jogar_autojogo), pela ordem dos blocos.
+    """
+    sementes = random.Random(semente)
+    emparelhamentos = [niveis[i % len(niveis)] for i in range(n_jogos)]
+    blocos = [emparelhamentos[i:i + tamanho_bloco] for i in range(0, n_jogos, tamanho_bloco)]
+    if trabalhadores <= 1:
+        anterior = definir_tabela_transposicao(tabela) if tabela is not None else None
+        try:
+            for bloco in blocos:
+                yield from _jogar_bloco(bloco, epsilon, max_jogadas, sementes.getrandbits(32))
+        finally:
+            if tabela is not None:
+                definir_tabela_transposicao(anterior)
+        return
+
+    inicializacao = {}
+    if tabela is not None:
+        from transposicao import inicializar_trabalhador
+        inicializacao = {'initializer': inicializar_trabalhador,
+                         'initargs': (tabela.nome, multiprocessing.Value('i', 0))}
+    with ProcessPoolExecutor(max_workers=trabalhadores, **inicializacao) as executor:
+        futuros = [executor.submit(_jogar_bloco, bloco, epsilon, max_jogadas, sementes.getrandbits(32))
+                   for bloco in blocos]
+        for futuro in futuros:
+            yield from futuro.result()
+
+def ler_jogos(ficheiro):
+    """
+    Gera os jogos de um registo de auto-jogo em JSON lines.
+
+    Args:
+        ficheiro (file): Ficheiro de texto aberto para leitura.
+
+    Yields:
+        dict: Cada jogo com 'jogadas' e 'vencedor'.
+    """
+    for linha in ficheiro:
+        if linha.strip():
+            yield json.loads(linha)
+
+# -------------------------------------------------------------------------------------------------
+# Treino (media de Monte Carlo sobre posicoes canonicas)
+# -------------------------------------------------------------------------------------------------
+def treinar_tabela_valores(jogos) -> array:
+    """
+    Calcula a tabela de valores a partir de jogos de auto-jogo.
+    O valor de cada (posicao canonica, jogador a jogar) e a media dos resultados dos jogos
+    que passaram por ela, na perspetiva de 'X'; posicoes nunca vistas ficam com 0.
+
+    Args:
+        jogos (iterable): Jogos com 'jogadas' (lista de str) e 'vencedor' ('X', 'O' ou ' ').
+
+    Returns:
+        array: array('b') com 2 * NUM_CHAVES valores inteiros (valor * 127).
+    """
+    somas = [0] * (2 * NUM_CHAVES)
+    contagens = [0] * (2 * NUM_CHAVES)
+    for jogo in jogos:
+        resultado = 1 if jogo['vencedor'] == 'X' else (-1 if jogo['vencedor'] == 'O' else 0)
+        tabuleiro, turno = cria_tabuleiro(), 'X'
+        visitadas = [_indice(tabuleiro, turno)]
+        for jogada in jogo['jogadas']:
+            _executar_movimento(tabuleiro, turno, _str_para_jogada(jogada))
+            turno = outro_jogador(turno)
+            visitadas.append(_indice(tabuleiro, turno))
+        for i in visitadas:
+            somas[i] += resultado
+            contagens[i] += 1
+    return array('b', (round(_ESCALA * s / c) if c else 0 for s, c in zip(somas, contagens)))
+
+def guardar_tabela_valores(valores: array, caminho: str) -> None:
+    """
+    Escreve a tabela de valores num ficheiro binario (cabecalho + 1 byte por entrada).
+
+    Args:
+        valores (array): A tabela (array('b') com 2 * NUM_CHAVES valores).
+        caminho (str): O caminho do ficheiro.
+    """
+    with open(caminho, 'wb') as ficheiro:
+        ficheiro.write(_CABECALHO.pack(_MAGICO, _VERSAO, _ESCALA, len(valores)))
+        valores.tofile(ficheiro)
+
+def carregar_tabela_valores(caminho=None) -> array:
+    """
+    Le uma tabela de valores e torna-a a tabela ativa do nivel 'aprendido'.
+
+    Args:
+        caminho (str | None): O ficheiro (por omissao, CAMINHO_POR_OMISSAO).
+
+    Returns:
+        array: A tabela carregada.
+
+    Raises:
+        ValueError: Se o ficheiro nao existir ou nao for uma tabela valida.
+    """
+    global _VALORES
+    caminho = caminho or CAMINHO_POR_OMISSAO
+    try:
+        with open(caminho, 'rb') as ficheiro:
+            magico, versao, _, n = _CABECALHO.unpack(ficheiro.read(_CABECALHO.size))
+            if magico != _MAGICO or versao != _VERSAO or n != 2 * NUM_CHAVES:
+                raise ValueError('carregar_tabela_valores: ficheiro invalido')
+            valores = array('b')
+            valores.fromfile(ficheiro, n)
+    except (OSError, EOFError, struct.error):
+        raise ValueError('carregar_tabela_valores: tabela de valores inexistente ou invalida')
+    _VALORES = valores
+    return valores
+
+def tabela_disponivel() -> bool:
+    """Indica se ha tabela ativa, carregando a de CAMINHO_POR_OMISSAO se ainda nao houver."""
+    if _VALORES is None:
+        try:
+            carregar_tabela_valores()
+        except ValueError:
+            return False
+    return True
+
+# -------------------------------------------------------------------------------------------------
+# Politica (antevisao de 1 jogada)
+# -------------------------------------------------------------------------------------------------
+def escolher_movimento_aprendido(tabuleiro: list, jogador: str, valores=None) -> tuple:
+    """
+    Escolhe a jogada cujo tabuleiro seguinte tem o melhor valor na tabela para 'jogador'.
+    Uma vitoria imediata e sempre escolhida; em caso de empate ganha a primeira jogada.
+
+    Args:
+        tabuleiro (list): O TAD tabuleiro.
+        jogador (str): O TAD peca do jogador.
+        valores (array | None): A tabela (por omissao, a tabela ativa, carregada a pedido).
+
+    Returns:
+        tuple: O tuplo de movimento escolhido.
+    """
+    if valores is None:
+        valores = _VALORES if _VALORES is not None else carregar_tabela_valores()
+    sinal = 1 if jogador == 'X' else -1
+    adversario = outro_jogador(jogador)
+    melhor, melhor_valor = None, None
+    for movimento in _jogadas_legais(tabuleiro, jogador):
+        seguinte = _executar_movimento(cria_copia_tabuleiro(tabuleiro), jogador, movimento)
+        if obter_ganhador(seguinte) == jogador:
+            return movimento
+        valor = sinal * valores[_indice(seguinte, adversario)]
+        if melhor_valor is None or valor > melhor_valor:
+            melhor, melhor_valor = movimento, valor
+    return melhor
+
+# -------------------------------------------------------------------------------------------------
+# Comparacao com o nivel 'dificil'
+# -------------------------------------------------------------------------------------------------
+def comparar_com_dificil(n_jogos: int = 100, aberturas: int = 2, max_jogadas: int = 60, semente=None) -> dict:
+    """
+    Joga 'aprendido' contra 'dificil', alternando as cores, a partir de aberturas aleatorias
+    (as primeiras 'aberturas' jogadas sao aleatorias para variar os jogos).
+
+    Args:
+        n_jogos (int): Numero de jogos.
+        aberturas (int): Numero de jogadas aleatorias no inicio de cada jogo.
+        max_jogadas (int): Limite de jogadas (empate se for atingido).
+        semente (int | None): Semente das aberturas.
+
+    Returns:
+        dict: Vitorias/empates/derrotas de 'aprendido' e latencia media por jogada (ms) de cada nivel.
+    """
+    gerador = random.Random(semente)
+    resultados = {'vitorias': 0, 'empates': 0, 'derrotas': 0}
+    tempos = {'aprendido': [], 'dificil': []}
+    for i in range(n_jogos):
+        aprendido = 'X' if i % 2 == 0 else 'O'
+        tabuleiro, turno, jogadas = cria_tabuleiro(), 'X', 0
+        while obter_ganhador(tabuleiro) == ' ' and jogadas < max_jogadas:
+            if jogadas < aberturas:
+                movimento = gerador.choice(_jogadas_legais(tabuleiro, turno))
+            else:
+                nivel = 'aprendido' if turno == aprendido else 'dificil'
+                inicio = time.perf_counter()
+                movimento = obter_movimento_auto(tabuleiro, turno, nivel)
+                tempos[nivel].append(time.perf_counter() - inicio)
+            _executar_movimento(tabuleiro, turno, movimento)
+            turno = outro_jogador(turno)
+            jogadas += 1
+        ganhador = obter_ganhador(tabuleiro)
+        chave = 'empates' if ganhador == ' ' else ('vitorias' if ganhador == aprendido else 'derrotas')
+        resultados[chave] += 1
+    for nivel, medidas in tempos.items():
+        resultados[f'latencia_ms_{nivel}'] = 1000 * sum(medidas) / len(medidas) if medidas else 0.0
+    return resultados
+
+def main(argumentos=None) -> int:
+    """Ponto de entrada da linha de comandos (autojogo, treinar, comparar)."""
+    parser = argparse.ArgumentParser(description='Tabela de valores aprendida por auto-jogo.')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    autojogo = comandos.add_parser('autojogo', help='gera jogos de auto-jogo em JSON lines ou binario')
+    autojogo.add_argument('-n', '--jogos', type=int, default=1000)
+    autojogo.add_argument('-o', '--saida', default='-')
+    autojogo.add_argument('--formato', choices=('jsonl', 'bin'), default='jsonl',
+                          help='bin: registos compactos de registos.py')
+    autojogo.add_argument('--niveis', nargs='+', default=['dificil:dificil', 'normal:dificil', 'dificil:normal'],
+                          help="pares nivel_x:nivel_o")
+    autojogo.add_argument('--epsilon', type=float, default=0.2)
+    autojogo.add_argument('--trabalhadores', type=int, default=1)
+    autojogo.add_argument('--semente', type=int, default=None)
+    autojogo.add_argument('--tabela', type=int, default=0, metavar='ENTRADAS',
+                          help='tabela de transposicao partilhada entre os processos')
+    treinar = comandos.add_parser('treinar', help='treina a tabela de valores a partir de registos')
+    treinar.add_argument('registos', nargs='+', help='JSON lines, ou binario se terminar em .bin')
+    treinar.add_argument('-o', '--saida', default=CAMINHO_POR_OMISSAO)
+    comparar = comandos.add_parser('comparar', help="compara 'aprendido' com 'dificil'")
+    comparar.add_argument('-n', '--jogos', type=int, default=100)
+    comparar.add_argument('--tabela', default=None)
+    comparar.add_argument('--semente', type=int, default=None)
+    args = parser.parse_args(argumentos)
+
+    if args.comando == 'autojogo':
+        niveis = tuple(tuple(par.split(':')) for par in args.niveis)
+        tabela = None
+        if args.tabela:
+            from transposicao import TabelaTransposicao
+            tabela = TabelaTransposicao(args.tabela)
+        if args.formato == 'bin':
+            from registos import EscritorRegistos
+            saida = sys.stdout.buffer if args.saida == '-' else open(args.saida, 'wb')
+            escrever = EscritorRegistos(saida).escrever
+        else:
+            saida = sys.stdout if args.saida == '-' else open(args.saida, 'w', encoding='utf-8')
+            escrever = lambda jogo: saida.write(json.dumps(jogo) + '\n')
+        try:
+            for jogo in gerar_autojogo(args.jogos, niveis, args.epsilon, trabalhadores=args.trabalhadores,
+                                       semente=args.semente, tabela=tabela):
+                escrever(jogo)
+            if tabela is not None:
+                sys.stderr.write(f'tabela de transposicao: {json.dumps(tabela.estatisticas())}\n')
+        finally:
+            if saida not in (sys.stdout, sys.stdout.buffer):
+                saida.close()
+            if tabela is not None:
+                tabela.fechar()
+    elif args.comando == 'treinar':
+        def todos_os_jogos():
+            for caminho in args.registos:
+                if caminho.endswith('.bin'):
+                    from registos import ler_registos
+                    with open(caminho, 'rb') as ficheiro:
+                        yield from ler_registos(ficheiro)
+                else:
+                    with open(caminho, encoding='utf-8') as ficheiro:
+                        yield from ler_jogos(ficheiro)
+        guardar_tabela_valores(treinar_tabela_valores(todos_os_jogos()), args.saida)
+    else:
+        carregar_tabela_valores(args.tabela)
+        print(json.dumps(comparar_com_dificil(args.jogos, semente=args.semente)))
+    return 0
+
+if __name__ == '__main__':
+    # obter_movimento_auto importa 'aprendizagem': partilha a tabela ativa com este modulo
+    sys.modules.setdefault('aprendizagem', sys.modules[__name__])
+    sys.exit(main())
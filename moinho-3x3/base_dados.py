@@ -0,0 +1,248 @@
+"""
+Base de dados de jogos indexada por posicao (Moinho 3x3).
+- Cada posicao atingida por um jogo e indexada pela sua chave canonica (codificacao.chave_canonica,
+  mais o jogador a jogar), de modo que posicoes simetricas partilham a mesma entrada.
+- O indice e um array ordenado de entradas de 64 bits: posicao (16 bits) | jogo (32 bits) | jogada (16 bits).
+  As consultas sao uma pesquisa binaria (numpy.searchsorted) sobre o ficheiro mapeado em memoria.
+- Para cada posicao guardam-se tambem as vitorias de 'X', os empates (jogos sem vencedor) e as vitorias
+  de 'O', contando cada jogo uma vez.
+- Os jogos vem de registos binarios (registos.py) e sao validados ao entrar; os jogos com jogadas
+  ilegais nao entram na base.
+Ficheiro: cabecalho, cabecalhos dos jogos (3 bytes: niveis e vencedor), deslocamentos e codigos das
+jogadas, estatisticas (2 * NUM_CHAVES x 3 uint32) e entradas do indice (uint64).
+Uso:
+  python3 base_dados.py construir jogos.bin -o jogos.db
+  python3 base_dados.py consultar jogos.db '[[1,0,-1],[0,1,-1],[1,-1,0]]' --jogador X
+"""
+import argparse
+import json
+import mmap
+import struct
+import sys
+
+import numpy as np
+
+from projeto_final import NIVEIS, tuplo_para_tabuleiro, _chave_tabuleiro
+from codificacao import NUM_CHAVES, chave_canonica
+from registos import ler_registos_brutos, reproduzir_jogo, _codigo_para_str
+# -------------------------------------------------------------------------------------------------
+# Formato
+# -------------------------------------------------------------------------------------------------
+_MAGICO = b'MOINHODB'
+_CABECALHO = struct.Struct('<8sHHIQQ')  # magico, versao, reservado, jogos, entradas, bytes de jogadas
+_VERSAO = 1
+_VENCEDORES = (' ', 'X', 'O')
+_BITS_JOGADA, _BITS_JOGO = 16, 32
+_MAX_JOGOS = 1 << _BITS_JOGO
+
+_CANONICAS_POSICAO = None  # posicao (chave * 2 + jogador) -> posicao canonica, calculado a pedido
+
+def _canonicas_posicao() -> np.ndarray:
+    """Tabela (2 * NUM_CHAVES,) com a posicao canonica de cada posicao."""
+    global _CANONICAS_POSICAO
+    if _CANONICAS_POSICAO is None:
+        canonicas = np.array([chave_canonica(k)[0] for k in range(NUM_CHAVES)], dtype=np.uint64)
+        _CANONICAS_POSICAO = np.repeat(canonicas * 2, 2) + np.tile(np.array([0, 1], dtype=np.uint64), NUM_CHAVES)
+    return _CANONICAS_POSICAO
+
+def _alinhar(n: int) -> int:
+    """Arredonda n para o multiplo de 8 seguinte."""
+    return (n + 7) & ~7
+
+def _seccoes(jogos: int, entradas: int, bytes_jogadas: int) -> dict:
+    """Deslocamento (em bytes) de cada seccao do ficheiro."""
+    seccoes = {'cabecalhos': _alinhar(_CABECALHO.size)}
+    seccoes['deslocamentos'] = seccoes['cabecalhos'] + _alinhar(3 * jogos)
+    seccoes['jogadas'] = seccoes['deslocamentos'] + 8 * (jogos + 1)
+    seccoes['estatisticas'] = seccoes['jogadas'] + _alinhar(bytes_jogadas)
+    seccoes['entradas'] = seccoes['estatisticas'] + 4 * 3 * 2 * NUM_CHAVES
+    seccoes['fim'] = seccoes['entradas'] + 8 * entradas
+    return seccoes
+
+# -------------------------------------------------------------------------------------------------
+# Construcao
+# -------------------------------------------------------------------------------------------------
+def construir_base(jogos, caminho: str) -> dict:
+    """
+    Reproduz, valida e indexa jogos brutos, e escreve a base num ficheiro.
+
+    Args:
+        jogos (iterable): Tuplos (nivel_x, nivel_o, vencedor, codigos), como em registos.ler_registos_brutos.
+        caminho (str): O ficheiro da base.
+
+    Returns:
+        dict: jogos (indexados), invalidos (ignorados) e entradas do indice.
+
+    Raises:
+        ValueError: Se houver mais jogos do que os identificadores de 32 bits permitem.
+    """
+    canonicas = _canonicas_posicao()
+    estatisticas = np.zeros((2 * NUM_CHAVES, 3), dtype=np.uint32)
+    cabecalhos, deslocamentos, jogadas = bytearray(), [0], bytearray()
+    partes, invalidos = [], 0
+
+    for nivel_x, nivel_o, vencedor, codigos in jogos:
+        try:
+            posicoes = canonicas[reproduzir_jogo(codigos)]
+        except ValueError:
+            invalidos += 1
+            continue
+        jogo = len(deslocamentos) - 1
+        if jogo >= _MAX_JOGOS:
+            raise ValueError('construir_base: demasiados jogos')
+        resultado = _VENCEDORES.index(vencedor)
+        cabecalhos += bytes((NIVEIS.index(nivel_x) if nivel_x in NIVEIS else 255,
+                             NIVEIS.index(nivel_o) if nivel_o in NIVEIS else 255, resultado))
+        jogadas += codigos
+        deslocamentos.append(len(jogadas))
+        estatisticas[np.unique(posicoes), resultado] += 1
+        partes.append((posicoes << np.uint64(_BITS_JOGO + _BITS_JOGADA))
+                      | np.uint64(jogo << _BITS_JOGADA) | np.arange(len(posicoes), dtype=np.uint64))
+
+    entradas = np.sort(np.concatenate(partes)) if partes else np.zeros(0, dtype=np.uint64)
+    n_jogos = len(deslocamentos) - 1
+    seccoes = _seccoes(n_jogos, len(entradas), len(jogadas))
+    with open(caminho, 'wb') as ficheiro:
+        def escrever_em(deslocamento: int, dados: bytes) -> None:
+            ficheiro.write(bytes(deslocamento - ficheiro.tell()))  # preenchimento de alinhamento
+            ficheiro.write(dados)
+        escrever_em(0, _CABECALHO.pack(_MAGICO, _VERSAO, 0, n_jogos, len(entradas), len(jogadas)))
+        escrever_em(seccoes['cabecalhos'], bytes(cabecalhos))
+        escrever_em(seccoes['deslocamentos'], np.array(deslocamentos, dtype='<u8').tobytes())
+        escrever_em(seccoes['jogadas'], bytes(jogadas))
+        escrever_em(seccoes['estatisticas'], estatisticas.astype('<u4').tobytes())
+        escrever_em(seccoes['entradas'], entradas.astype('<u8').tobytes())
+    return {'jogos': n_jogos, 'invalidos': invalidos, 'entradas': len(entradas)}
+
+# -------------------------------------------------------------------------------------------------
+# Consulta (ficheiro mapeado em memoria)
+# -------------------------------------------------------------------------------------------------
+class BaseJogos:
+    """Vista, so de leitura, de uma base de jogos mapeada em memoria."""
+    __slots__ = ('jogos', '_ficheiro', '_mapa', '_cabecalhos', '_deslocamentos', '_jogadas',
+                 '_estatisticas', '_entradas')
+
+    def __init__(self, caminho: str):
+        """
+        Args:
+            caminho (str): O ficheiro criado por construir_base.
+
+        Raises:
+            ValueError: Se o ficheiro nao existir ou nao for uma base de jogos.
+        """
+        try:
+            self._ficheiro = open(caminho, 'rb')
+            self._mapa = mmap.mmap(self._ficheiro.fileno(), 0, access=mmap.ACCESS_READ)
+            magico, versao, _, jogos, entradas, bytes_jogadas = _CABECALHO.unpack_from(self._mapa, 0)
+        except (OSError, ValueError, struct.error):
+            raise ValueError('BaseJogos: base de jogos inexistente ou invalida')
+        seccoes = _seccoes(jogos, entradas, bytes_jogadas)
+        if magico != _MAGICO or versao != _VERSAO or len(self._mapa) != seccoes['fim']:
+            self.fechar()
+            raise ValueError('BaseJogos: base de jogos inexistente ou invalida')
+        self.jogos = jogos
+        self._cabecalhos = np.frombuffer(self._mapa, np.uint8, 3 * jogos, seccoes['cabecalhos']).reshape(-1, 3)
+        self._deslocamentos = np.frombuffer(self._mapa, '<u8', jogos + 1, seccoes['deslocamentos'])
+        self._jogadas = np.frombuffer(self._mapa, np.uint8, bytes_jogadas, seccoes['jogadas'])
+        self._estatisticas = np.frombuffer(self._mapa, '<u4', 3 * 2 * NUM_CHAVES,
+                                           seccoes['estatisticas']).reshape(-1, 3)
+        self._entradas = np.frombuffer(self._mapa, '<u8', entradas, seccoes['entradas'])
+
+    @staticmethod
+    def _posicao(tabuleiro: list, jogador: str) -> int:
+        """Posicao canonica de (tabuleiro, jogador a jogar)."""
+        return int(_canonicas_posicao()[_chave_tabuleiro(tabuleiro) * 2 + (jogador == 'O')])
+
+    def estatisticas(self, tabuleiro: list, jogador: str) -> dict:
+        """
+        Resultados dos jogos que passaram pela posicao (ou por uma posicao simetrica).
+
+        Args:
+            tabuleiro (list): O TAD tabuleiro.
+            jogador (str): O TAD peca do jogador a jogar.
+
+        Returns:
+            dict: {'jogos', 'vitorias_x', 'empates', 'vitorias_o'}.
+        """
+        empates, vitorias_x, vitorias_o = (int(v) for v in self._estatisticas[self._posicao(tabuleiro, jogador)])
+        return {'jogos': empates + vitorias_x + vitorias_o, 'vitorias_x': vitorias_x,
+                'empates': empates, 'vitorias_o': vitorias_o}
+
+    def ocorrencias(self, tabuleiro: list, jogador: str, limite=None) -> list:
+        """
+        Jogos e jogadas em que a posicao (ou uma posicao simetrica) foi atingida.
+
+        Args:
+            tabuleiro (list): O TAD tabuleiro.
+            jogador (str): O TAD peca do jogador a jogar.
+            limite (int | None): Numero maximo de ocorrencias devolvidas.
+
+        Returns:
+            list: Pares (jogo, numero da jogada), por ordem de jogo e de jogada (0 = tabuleiro inicial).
+        """
+        posicao = np.uint64(self._posicao(tabuleiro, jogador) << (_BITS_JOGO + _BITS_JOGADA))
+        inicio, fim = np.searchsorted(self._entradas, [posicao, posicao + np.uint64(1 << (_BITS_JOGO + _BITS_JOGADA))])
+        if limite is not None:
+            fim = min(fim, inicio + limite)
+        fatia = self._entradas[inicio:fim]
+        jogos = (fatia >> np.uint64(_BITS_JOGADA)) & np.uint64(_MAX_JOGOS - 1)
+        return list(zip(jogos.tolist(), (fatia & np.uint64((1 << _BITS_JOGADA) - 1)).tolist()))
+
+    def jogo(self, identificador: int) -> dict:
+        """
+        Devolve um jogo da base.
+
+        Args:
+            identificador (int): O identificador do jogo (ordem de entrada, a partir de 0).
+
+        Returns:
+            dict: {'niveis', 'jogadas', 'vencedor'}, como em registos.ler_registos.
+        """
+        nivel_x, nivel_o, vencedor = self._cabecalhos[identificador].tolist()
+        codigos = self._jogadas[self._deslocamentos[identificador]:self._deslocamentos[identificador + 1]]
+        return {'niveis': [NIVEIS[n] if n < len(NIVEIS) else 'humano' for n in (nivel_x, nivel_o)],
+                'jogadas': [_codigo_para_str(c) for c in codigos.tolist()], 'vencedor': _VENCEDORES[vencedor]}
+
+    def fechar(self) -> None:
+        """Liberta o mapeamento e o ficheiro."""
+        for nome in ('_cabecalhos', '_deslocamentos', '_jogadas', '_estatisticas', '_entradas'):
+            if hasattr(self, nome):
+                delattr(self, nome)  # os arrays tem de ser libertados antes do mmap
+        if hasattr(self, '_mapa'):
+            self._mapa.close()
+        if hasattr(self, '_ficheiro'):
+            self._ficheiro.close()
+
+def main(argumentos=None) -> int:
+    """Ponto de entrada da linha de comandos (construir, consultar)."""
+    parser = argparse.ArgumentParser(description='Base de jogos do Moinho 3x3 indexada por posicao.')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    construir = comandos.add_parser('construir', help='indexa registos binarios (registos.py)')
+    construir.add_argument('registos', nargs='+')
+    construir.add_argument('-o', '--saida', required=True)
+    consultar = comandos.add_parser('consultar', help='estatisticas e jogos de uma posicao')
+    consultar.add_argument('base')
+    consultar.add_argument('tabuleiro', help='tuplo 3x3 em JSON, ex: [[1,0,-1],[0,1,-1],[1,-1,0]]')
+    consultar.add_argument('--jogador', choices=('X', 'O'), default='X')
+    consultar.add_argument('--limite', type=int, default=20)
+    args = parser.parse_args(argumentos)
+
+    if args.comando == 'construir':
+        def todos_os_jogos():
+            for caminho in args.registos:
+                with open(caminho, 'rb') as ficheiro:
+                    yield from ler_registos_brutos(ficheiro)
+        print(json.dumps(construir_base(todos_os_jogos(), args.saida)))
+        return 0
+
+    base = BaseJogos(args.base)
+    try:
+        tabuleiro = tuplo_para_tabuleiro(tuple(tuple(l) for l in json.loads(args.tabuleiro)))
+        print(json.dumps({**base.estatisticas(tabuleiro, args.jogador),
+                          'ocorrencias': base.ocorrencias(tabuleiro, args.jogador, args.limite)}))
+    finally:
+        base.fechar()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
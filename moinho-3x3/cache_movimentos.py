@@ -0,0 +1,114 @@
+"""
+Cache de jogadas da IA (LRU, de tamanho limitado) a frente de obter_movimento_auto.
+- Chave compacta: (chave do tabuleiro * 2 + turno de 'O') * len(NIVEIS) + indice do nivel.
+  Na fase de colocacao todos os niveis jogam igual, logo partilham a mesma entrada.
+- So se guardam os niveis deterministicos (por omissao 'facil', 'normal' e 'dificil'); os outros
+  sao calculados sempre. Sem simetrias, a cache devolve exatamente as jogadas do caminho sem cache.
+- Com simetrias=True, as 8 imagens simetricas de uma posicao partilham uma entrada: guarda-se a
+  jogada da IA para a forma canonica e devolve-se a sua imagem. A jogada e igualmente boa, mas
+  pode nao ser a mesma que a IA escolheria (os desempates seguem a ordem de leitura). Passar
+  continua a usar a primeira peca pela ordem de leitura, como _gerar_movimentos_validos.
+Uso:
+  cache = CacheMovimentos(4096)
+  definir_cache_movimentos(cache)   # obter_movimento_auto (e moinho) passam a usar a cache
+  ...
+  cache.estatisticas, cache.taxa_acertos
+"""
+from collections import OrderedDict
+
+from projeto_final import (
+    COLUNAS, LINHAS, NIVEIS, cria_posicao, obter_posicoes_jogador, _calcular_movimento_auto, _chave_tabuleiro,
+    _tabuleiro_da_chave, _esta_na_fase_colocacao,
+)
+from codificacao import SIMETRIAS, chave_canonica
+# -------------------------------------------------------------------------------------------------
+# Constantes
+# -------------------------------------------------------------------------------------------------
+NIVEIS_DETERMINISTICOS = ('facil', 'normal', 'dificil')
+
+# Posicoes pela ordem de leitura e o indice de cada uma
+_POSICOES = tuple(cria_posicao(c, l) for l in LINHAS for c in COLUNAS)
+_INDICES = {posicao: i for i, posicao in enumerate(_POSICOES)}
+
+# -------------------------------------------------------------------------------------------------
+# Cache
+# -------------------------------------------------------------------------------------------------
+class CacheMovimentos:
+    """Cache LRU de jogadas da IA, com contadores de acertos, falhas e despejos."""
+    __slots__ = ('capacidade', 'simetrias', 'niveis', '_entradas', 'estatisticas')
+
+    def __init__(self, capacidade: int = 4096, simetrias: bool = False, niveis=NIVEIS_DETERMINISTICOS):
+        """
+        Args:
+            capacidade (int): Numero maximo de entradas.
+            simetrias (bool): Junta as posicoes simetricas numa entrada (ver o topo do modulo).
+            niveis (tuple): Niveis guardados na cache.
+
+        Raises:
+            ValueError: Se a capacidade ou os niveis forem invalidos.
+        """
+        if not (isinstance(capacidade, int) and capacidade > 0 and all(n in NIVEIS for n in niveis)):
+            raise ValueError('CacheMovimentos: argumentos invalidos')
+        self.capacidade = capacidade
+        self.simetrias = simetrias
+        self.niveis = tuple(niveis)
+        self._entradas = OrderedDict()
+        self.estatisticas = {'acertos': 0, 'falhas': 0, 'despejos': 0, 'sem_cache': 0}
+
+    def obter(self, tabuleiro: list, jogador: str, nivel: str) -> tuple:
+        """
+        Devolve a jogada da IA, da cache ou calculada (e guardada).
+
+        Args:
+            tabuleiro (list): O TAD tabuleiro.
+            jogador (str): O TAD peca da IA.
+            nivel (str): O nivel da IA.
+
+        Returns:
+            tuple: O tuplo de movimento.
+        """
+        if nivel not in self.niveis:
+            self.estatisticas['sem_cache'] += 1
+            return _calcular_movimento_auto(tabuleiro, jogador, nivel)
+
+        chave_tabuleiro, simetria = _chave_tabuleiro(tabuleiro), 0
+        if self.simetrias:
+            chave_tabuleiro, simetria = chave_canonica(chave_tabuleiro)
+        indice_nivel = 0 if _esta_na_fase_colocacao(tabuleiro) else NIVEIS.index(nivel)
+        chave = (chave_tabuleiro * 2 + (jogador == 'O')) * len(NIVEIS) + indice_nivel
+
+        casas = self._entradas.get(chave)
+        if casas is not None:
+            self._entradas.move_to_end(chave)
+            self.estatisticas['acertos'] += 1
+        else:
+            self.estatisticas['falhas'] += 1
+            origem = _tabuleiro_da_chave(chave_tabuleiro) if self.simetrias else tabuleiro
+            casas = tuple(_INDICES[p] for p in _calcular_movimento_auto(origem, jogador, nivel))
+            self._entradas[chave] = casas
+            if len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+                self.estatisticas['despejos'] += 1
+
+        if self.simetrias:
+            if len(casas) == 2 and casas[0] == casas[1]:
+                # Passar usa sempre a primeira peca pela ordem de leitura, que nao e simetrica
+                primeira = obter_posicoes_jogador(tabuleiro, jogador)[0]
+                return primeira, primeira
+            # A casa i da forma canonica e a casa SIMETRIAS[simetria][i] do tabuleiro dado
+            permutacao = SIMETRIAS[simetria]
+            return tuple(_POSICOES[permutacao[i]] for i in casas)
+        return tuple(_POSICOES[i] for i in casas)
+
+    @property
+    def taxa_acertos(self) -> float:
+        """Fracao das consultas guardaveis que foram respondidas pela cache."""
+        consultas = self.estatisticas['acertos'] + self.estatisticas['falhas']
+        return self.estatisticas['acertos'] / consultas if consultas else 0.0
+
+    def limpar(self) -> None:
+        """Esvazia a cache (os contadores mantem-se)."""
+        self._entradas.clear()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
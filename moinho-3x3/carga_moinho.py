@@ -0,0 +1,260 @@
+"""
+Testes de carga de ponta a ponta do moinho (projeto_final.moinho), com jogadas do humano
+escritas num guiao ou geradas por uma politica.
+- Cada processo trabalhador joga jogos completos de moinho com sys.stdin e sys.stdout trocados:
+  a entrada responde a cada pedido de jogada e a saida so conta os bytes (ou guarda o texto).
+- Mede, por turno, o tempo de I/O (pedido e leitura da jogada), de validacao
+  (_interpretar_movimento_manual) e da IA (obter_movimento_auto), e o debito em jogos por segundo.
+- Um jogo cujo guiao acaba (ou que passa max_jogadas do humano) termina com o ValueError de
+  obter_movimento_manual e conta como interrompido.
+Guiao: um jogo por linha, com as jogadas do humano separadas por espacos (ex: 'b2 a1 c3 b2b1').
+Uso:
+  python3 carga_moinho.py --jogos 2000 --jogador [X] --nivel dificil --humano aleatorio --trabalhadores 4
+  python3 carga_moinho.py --guiao jogos.txt --jogador [O] --nivel normal
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import projeto_final
+from projeto_final import NIVEIS, posicao_para_str, obter_posicoes_livres, _esta_na_fase_colocacao, \
+    _gerar_movimentos_validos
+# -------------------------------------------------------------------------------------------------
+# Entrada e saida simuladas
+# -------------------------------------------------------------------------------------------------
+_COMPONENTES = ('io', 'validacao', 'ia')
+
+class _Saida:
+    """sys.stdout de teste: conta (e opcionalmente guarda) o texto, medindo o tempo das escritas."""
+    __slots__ = ('bytes', 'texto', 'tempos')
+
+    def __init__(self, capturar: bool, tempos: dict):
+        self.bytes = 0
+        self.texto = [] if capturar else None
+        self.tempos = tempos
+
+    def write(self, texto: str) -> int:
+        inicio = time.perf_counter()
+        self.bytes += len(texto)
+        if self.texto is not None:
+            self.texto.append(texto)
+        self.tempos['escrita'] += time.perf_counter() - inicio
+        return len(texto)
+
+    def flush(self) -> None:
+        pass
+
+class _Entrada:
+    """sys.stdin de teste: devolve a proxima jogada do guiao ou da politica ('' quando acaba)."""
+    __slots__ = ('guiao', 'politica', 'max_jogadas', 'gerador', 'tabuleiro', 'jogador', 'jogadas', 'tempos')
+
+    def __init__(self, guiao, politica: str, max_jogadas: int, gerador, tempos: dict):
+        self.guiao = iter(guiao) if guiao is not None else None
+        self.politica = politica
+        self.max_jogadas = max_jogadas
+        self.gerador = gerador
+        self.tabuleiro, self.jogador = None, None
+        self.jogadas = 0
+        self.tempos = tempos
+
+    def _gerar(self) -> str:
+        """Jogada da politica para o tabuleiro atual (a politica nao conta como tempo medido)."""
+        if self.politica == 'aleatorio':
+            if _esta_na_fase_colocacao(self.tabuleiro):
+                movimento = (self.gerador.choice(obter_posicoes_livres(self.tabuleiro)),)
+            else:
+                movimento = self.gerador.choice(_gerar_movimentos_validos(self.tabuleiro, self.jogador))
+        else:
+            movimento = _OBTER_MOVIMENTO_AUTO(self.tabuleiro, self.jogador, self.politica)
+        return ''.join(posicao_para_str(p) for p in movimento)
+
+    def readline(self) -> str:
+        if self.jogadas >= self.max_jogadas:
+            return ''
+        self.jogadas += 1
+        inicio = time.perf_counter()
+        jogada = next(self.guiao, '') if self.guiao is not None else self._gerar()
+        self.tempos['politica'] += time.perf_counter() - inicio
+        return jogada + '\n' if jogada else ''
+
+_OBTER_MOVIMENTO_AUTO = projeto_final.obter_movimento_auto
+_OBTER_MOVIMENTO_MANUAL = projeto_final.obter_movimento_manual
+_INTERPRETAR = projeto_final._interpretar_movimento_manual
+
+# -------------------------------------------------------------------------------------------------
+# Um bloco de jogos (processo trabalhador)
+# -------------------------------------------------------------------------------------------------
+def _jogar_bloco(jogos: list, jogador: str, nivel: str, politica: str, max_jogadas: int, capturar: bool,
+                 semente: int, silencioso: bool = False) -> dict:
+    """
+    Joga um bloco de jogos de moinho com E/S simulada e devolve as medicoes.
+    Instrumenta projeto_final so durante o bloco (o moinho e chamado sem alteracoes).
+    """
+    gerador = random.Random(semente)
+    amostras = {c: [] for c in _COMPONENTES}
+    tempos = dict.fromkeys(('escrita', 'validacao', 'politica'), 0.0)
+    resultado = {'jogos': 0, 'concluidos': 0, 'vitorias_humano': 0, 'jogadas_humano': 0, 'jogadas_ia': 0,
+                 'bytes_saida': 0, 'duracoes': [], 'saidas': [] if capturar else None}
+    humano = jogador[1]
+    entrada = None
+
+    def obter_movimento_manual(tabuleiro, peca):
+        entrada.tabuleiro, entrada.jogador = tabuleiro, peca
+        validacao, politica = tempos['validacao'], tempos['politica']
+        inicio = time.perf_counter()
+        try:
+            return _OBTER_MOVIMENTO_MANUAL(tabuleiro, peca)
+        finally:
+            total = time.perf_counter() - inicio
+            validacao = tempos['validacao'] - validacao
+            amostras['validacao'].append(validacao)
+            amostras['io'].append(total - validacao - (tempos['politica'] - politica))
+            resultado['jogadas_humano'] += 1
+
+    def interpretar(tabuleiro, peca, texto):
+        inicio = time.perf_counter()
+        try:
+            return _INTERPRETAR(tabuleiro, peca, texto)
+        finally:
+            tempos['validacao'] += time.perf_counter() - inicio
+
+    def obter_movimento_auto(tabuleiro, peca, nivel_ia):
+        inicio = time.perf_counter()
+        try:
+            return _OBTER_MOVIMENTO_AUTO(tabuleiro, peca, nivel_ia)
+        finally:
+            amostras['ia'].append(time.perf_counter() - inicio)
+            resultado['jogadas_ia'] += 1
+
+    originais = (sys.stdin, sys.stdout)
+    projeto_final.obter_movimento_manual = obter_movimento_manual
+    projeto_final._interpretar_movimento_manual = interpretar
+    projeto_final.obter_movimento_auto = obter_movimento_auto
+    try:
+        for guiao in jogos:
+            entrada = _Entrada(guiao, politica, max_jogadas, gerador, tempos)
+            saida = _Saida(capturar, tempos)
+            sys.stdin, sys.stdout = entrada, saida
+            inicio = time.perf_counter()
+            try:
+                ganhador = projeto_final.moinho(jogador, nivel, projeto_final.SaidaSilenciosa() if silencioso else None)
+                resultado['concluidos'] += 1
+                resultado['vitorias_humano'] += ganhador == jogador
+            except ValueError:
+                pass
+            finally:
+                sys.stdin, sys.stdout = originais
+            resultado['duracoes'].append(time.perf_counter() - inicio)
+            resultado['jogos'] += 1
+            resultado['bytes_saida'] += saida.bytes
+            if capturar:
+                resultado['saidas'].append(''.join(saida.texto))
+    finally:
+        sys.stdin, sys.stdout = originais
+        projeto_final.obter_movimento_manual = _OBTER_MOVIMENTO_MANUAL
+        projeto_final._interpretar_movimento_manual = _INTERPRETAR
+        projeto_final.obter_movimento_auto = _OBTER_MOVIMENTO_AUTO
+    resultado['amostras'] = amostras
+    resultado['escrita_s'] = tempos['escrita']
+    return resultado
+
+# -------------------------------------------------------------------------------------------------
+# Execucao e relatorio
+# -------------------------------------------------------------------------------------------------
+def _resumo(amostras: list) -> dict:
+    """Media, p50, p99 (em ms) e total (em s) de uma lista de tempos."""
+    if not amostras:
+        return {'turnos': 0, 'media_ms': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'total_s': 0.0}
+    ordenadas = sorted(amostras)
+    total = sum(ordenadas)
+    return {'turnos': len(ordenadas), 'media_ms': 1000 * total / len(ordenadas),
+            'p50_ms': 1000 * ordenadas[len(ordenadas) // 2],
+            'p99_ms': 1000 * ordenadas[min(len(ordenadas) - 1, int(0.99 * len(ordenadas)))], 'total_s': total}
+
+def executar_carga(n_jogos: int = 100, jogador: str = '[X]', nivel: str = 'facil', politica: str = 'aleatorio',
+                   guioes=None, trabalhadores: int = 1, max_jogadas: int = 100, capturar: bool = False,
+                   semente=None, tamanho_bloco: int = 50, silencioso: bool = False) -> dict:
+    """
+    Joga muitos jogos completos de moinho, em paralelo se trabalhadores > 1.
+
+    Args:
+        n_jogos (int): Numero de jogos (ignorado se houver guioes).
+        jogador (str): A peca do humano ('[X]' ou '[O]').
+        nivel (str): O nivel do computador.
+        politica (str): Quem gera as jogadas do humano: 'aleatorio' ou um nivel de obter_movimento_auto.
+        guioes (list | None): Listas de jogadas do humano (str), uma por jogo.
+        trabalhadores (int): Numero de processos.
+        max_jogadas (int): Jogadas do humano por jogo antes de o interromper.
+        capturar (bool): Guarda o texto escrito por cada jogo em 'saidas'.
+        semente (int | None): Semente das politicas.
+        tamanho_bloco (int): Jogos por tarefa.
+        silencioso (bool): Joga com SaidaSilenciosa (sem mensagens nem tabuleiros; so os pedidos de jogada).
+
+    Returns:
+        dict: Contagens, jogos_por_segundo, resumo (media, p50, p99) da duracao de cada jogo e, por turno,
+            de io (pedido e leitura da jogada do humano), validacao e ia; escrita_s e o tempo total
+            de todas as escritas (incluindo os tabuleiros).
+
+    Raises:
+        ValueError: Se os argumentos forem invalidos.
+    """
+    if jogador not in ('[X]', '[O]') or nivel not in NIVEIS or politica not in ('aleatorio',) + NIVEIS:
+        raise ValueError('executar_carga: argumentos invalidos')
+    jogos = list(guioes) if guioes is not None else [None] * n_jogos
+    blocos = [jogos[i:i + tamanho_bloco] for i in range(0, len(jogos), tamanho_bloco)]
+    sementes = random.Random(semente)
+    argumentos = [(bloco, jogador, nivel, politica, max_jogadas, capturar, sementes.getrandbits(32), silencioso)
+                  for bloco in blocos]
+
+    inicio = time.perf_counter()
+    if trabalhadores <= 1:
+        parciais = [_jogar_bloco(*a) for a in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=trabalhadores) as executor:
+            parciais = [f.result() for f in [executor.submit(_jogar_bloco, *a) for a in argumentos]]
+    decorrido = time.perf_counter() - inicio
+
+    relatorio = {chave: sum(p[chave] for p in parciais)
+                 for chave in ('jogos', 'concluidos', 'vitorias_humano', 'jogadas_humano', 'jogadas_ia', 'bytes_saida')}
+    relatorio['interrompidos'] = relatorio['jogos'] - relatorio['concluidos']
+    relatorio['segundos'] = decorrido
+    relatorio['jogos_por_segundo'] = relatorio['jogos'] / decorrido if decorrido else 0.0
+    relatorio['escrita_s'] = sum(p['escrita_s'] for p in parciais)
+    relatorio['jogo'] = _resumo([d for p in parciais for d in p['duracoes']])
+    for componente in _COMPONENTES:
+        relatorio[componente] = _resumo([t for p in parciais for t in p['amostras'][componente]])
+    if capturar:
+        relatorio['saidas'] = [s for p in parciais for s in p['saidas']]
+    return relatorio
+
+def main(argumentos=None) -> int:
+    """Ponto de entrada da linha de comandos."""
+    parser = argparse.ArgumentParser(description='Testes de carga do moinho com jogadas simuladas.')
+    parser.add_argument('--jogos', type=int, default=200)
+    parser.add_argument('--jogador', choices=('[X]', '[O]'), default='[X]')
+    parser.add_argument('--nivel', choices=NIVEIS, default='facil')
+    parser.add_argument('--humano', choices=('aleatorio',) + NIVEIS, default='aleatorio',
+                        help='politica que gera as jogadas do humano')
+    parser.add_argument('--guiao', default=None, help='ficheiro com as jogadas do humano, um jogo por linha')
+    parser.add_argument('--trabalhadores', type=int, default=None)
+    parser.add_argument('--max-jogadas', type=int, default=100)
+    parser.add_argument('--semente', type=int, default=None)
+    parser.add_argument('--silencioso', action='store_true', help='nao desenha os tabuleiros nem as mensagens')
+    args = parser.parse_args(argumentos)
+
+    guioes = None
+    if args.guiao:
+        with open(args.guiao, encoding='utf-8') as ficheiro:
+            guioes = [linha.split() for linha in ficheiro if linha.strip()]
+    relatorio = executar_carga(args.jogos, args.jogador, args.nivel, args.humano, guioes,
+                               args.trabalhadores or os.cpu_count() or 1, args.max_jogadas,
+                               semente=args.semente, silencioso=args.silencioso)
+    print(json.dumps(relatorio, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""
+Codificacao compacta de posicoes do Moinho 3x3.
+- Chave de um tabuleiro: rank em base 3 (ver projeto_final._chave_tabuleiro), 0 <= chave < 3**9.
+- Simetrias: as 8 simetrias do quadrado (rotacoes e reflexoes) preservam as ligacoes
+  (_LIGACOES) e as linhas vencedoras, logo posicoes simetricas tem o mesmo valor.
+- Chave canonica: a menor chave entre as 8 imagens simetricas do tabuleiro.
+- Codigo de sessao: o estado completo de uma SessaoJogo num inteiro de 32 bits (4 bytes):
+  bits 0-14 chave do tabuleiro | 15 turno ('O') | 16 fase (movimento) | 17 humano ('O')
+  | 18-20 indice do nivel em NIVEIS | 21-31 numero de jogadas (satura em 2047).
+Funcoes publicas:
+- chave_tabuleiro, tabuleiro_da_chave, chave_canonica, aplicar_simetria, SIMETRIAS, NUM_CHAVES
+- codificar_estado, descodificar_estado, codificar_sessao, descodificar_sessao,
+  codificar_sessoes, descodificar_sessoes, guardar_sessoes, carregar_sessoes
+"""
+import struct
+from array import array
+
+from projeto_final import (
+    NIVEIS, SessaoJogo, eh_tabuleiro, _chave_tabuleiro, _tabuleiro_da_chave, _esta_na_fase_colocacao,
+)
+# -------------------------------------------------------------------------------------------------
+# Constantes
+# -------------------------------------------------------------------------------------------------
+NUM_CHAVES = 3 ** 9
+
+def _permutacao(transformacao) -> tuple:
+    """Permutacao p das casas (ordem de leitura) tal que nova[i] = antiga[p[i]]."""
+    origens = (transformacao(i // 3, i % 3) for i in range(9))
+    return tuple(linha * 3 + coluna for (linha, coluna) in origens)
+
+# Cada simetria e dada como permutacao das 9 casas; a primeira e a identidade
+SIMETRIAS = tuple(_permutacao(f) for f in (
+    lambda l, c: (l, c),
+    lambda l, c: (2 - c, l),
+    lambda l, c: (2 - l, 2 - c),
+    lambda l, c: (c, 2 - l),
+    lambda l, c: (l, 2 - c),
+    lambda l, c: (2 - l, c),
+    lambda l, c: (c, l),
+    lambda l, c: (2 - c, 2 - l),
+))
+
+_POTENCIAS = tuple(3 ** i for i in range(9))
+_CANONICAS = None  # (chave canonica, indice da simetria) para cada chave, calculado a pedido
+
+# Campos do codigo de sessao
+_BIT_TURNO, _BIT_FASE, _BIT_HUMANO = 1 << 15, 1 << 16, 1 << 17
+_DESLOCAMENTO_NIVEL, _DESLOCAMENTO_JOGADAS = 18, 21
+MAX_JOGADAS_CODIGO = (1 << 11) - 1
+
+_MAGICO_SESSOES = b'MOINHOSS'
+_CABECALHO_SESSOES = struct.Struct('<8sHI')  # magico, versao, numero de registos
+_REGISTO_SESSAO = struct.Struct('<QI')       # identificador, codigo
+_VERSAO_SESSOES = 1
+
+# -------------------------------------------------------------------------------------------------
+# Chaves
+# -------------------------------------------------------------------------------------------------
+def chave_tabuleiro(tabuleiro: list) -> int:
+    """
+    Devolve a chave (rank em base 3) de um TAD tabuleiro.
+
+    Args:
+        tabuleiro (list): O TAD tabuleiro.
+
+    Returns:
+        int: A chave, entre 0 e NUM_CHAVES - 1.
+    """
+    return _chave_tabuleiro(tabuleiro)
+
+def tabuleiro_da_chave(chave: int) -> list:
+    """
+    Reconstroi o TAD tabuleiro a partir da sua chave.
+
+    Args:
+        chave (int): A chave (0 <= chave < NUM_CHAVES).
+
+    Returns:
+        list: O TAD tabuleiro.
+    """
+    return _tabuleiro_da_chave(chave)
+
+def _digitos(chave: int) -> list:
+    """Os 9 digitos em base 3 de uma chave (casa a casa, pela ordem de leitura)."""
+    digitos = []
+    for _ in range(9):
+        chave, digito = divmod(chave, 3)
+        digitos.append(digito)
+    return digitos
+
+def aplicar_simetria(chave: int, simetria: int) -> int:
+    """
+    Devolve a chave da imagem de um tabuleiro por uma das 8 simetrias.
+
+    Args:
+        chave (int): A chave do tabuleiro.
+        simetria (int): O indice da simetria em SIMETRIAS (0..7).
+
+    Returns:
+        int: A chave do tabuleiro transformado.
+    """
+    digitos = _digitos(chave)
+    return sum(digitos[j] * _POTENCIAS[i] for i, j in enumerate(SIMETRIAS[simetria]))
+
+def _calcular_canonicas() -> list:
+    """Calcula a chave canonica e a simetria que a produz para todas as chaves."""
+    canonicas = []
+    for chave in range(NUM_CHAVES):
+        digitos = _digitos(chave)
+        imagens = [sum(digitos[j] * _POTENCIAS[i] for i, j in enumerate(p)) for p in SIMETRIAS]
+        menor = min(imagens)
+        canonicas.append((menor, imagens.index(menor)))
+    return canonicas
+
+def chave_canonica(chave: int) -> tuple:
+    """
+    Devolve a chave canonica (a menor entre as 8 imagens simetricas) de uma chave.
+
+    Args:
+        chave (int): A chave do tabuleiro.
+
+    Returns:
+        tuple (int, int): (chave canonica, indice da simetria que leva o tabuleiro a forma canonica).
+    """
+    global _CANONICAS
+    if _CANONICAS is None:
+        _CANONICAS = _calcular_canonicas()
+    return _CANONICAS[chave]
+
+# -------------------------------------------------------------------------------------------------
+# Codigo de sessao (4 bytes)
+# -------------------------------------------------------------------------------------------------
+def codificar_estado(tabuleiro: list, turno: str, nivel: str = 'facil', jogadas: int = 0,
+                     humano: str = 'X') -> int:
+    """
+    Codifica o estado de um jogo num inteiro de 32 bits.
+
+    Args:
+        tabuleiro (list): O TAD tabuleiro.
+        turno (str): O TAD peca do jogador com o turno.
+        nivel (str): O nivel do computador (ver NIVEIS).
+        jogadas (int): Numero de jogadas ja feitas (satura em MAX_JOGADAS_CODIGO).
+        humano (str): O TAD peca do jogador humano.
+
+    Returns:
+        int: O codigo (0 <= codigo < 2**32).
+
+    Raises:
+        ValueError: Se o nivel for invalido.
+    """
+    if nivel not in NIVEIS:
+        raise ValueError('codificar_estado: nivel invalido')
+    codigo = _chave_tabuleiro(tabuleiro)
+    if turno == 'O':
+        codigo |= _BIT_TURNO
+    if not _esta_na_fase_colocacao(tabuleiro):
+        codigo |= _BIT_FASE
+    if humano == 'O':
+        codigo |= _BIT_HUMANO
+    return codigo | NIVEIS.index(nivel) << _DESLOCAMENTO_NIVEL \
+        | min(jogadas, MAX_JOGADAS_CODIGO) << _DESLOCAMENTO_JOGADAS
+
+def descodificar_estado(codigo: int) -> tuple:
+    """
+    Operacao inversa de codificar_estado.
+
+    Args:
+        codigo (int): O codigo de 32 bits.
+
+    Returns:
+        tuple (list, str, str, int, str): (tabuleiro, turno, nivel, jogadas, humano).
+
+    Raises:
+        ValueError: Se o codigo nao corresponder a um estado valido.
+    """
+    chave = codigo & (_BIT_TURNO - 1)
+    indice_nivel = (codigo >> _DESLOCAMENTO_NIVEL) & 0b111
+    if not (0 <= codigo < 1 << 32) or chave >= NUM_CHAVES or indice_nivel >= len(NIVEIS):
+        raise ValueError('descodificar_estado: codigo invalido')
+    tabuleiro = _tabuleiro_da_chave(chave)
+    if not eh_tabuleiro(tabuleiro) or bool(codigo & _BIT_FASE) == _esta_na_fase_colocacao(tabuleiro):
+        raise ValueError('descodificar_estado: codigo invalido')
+    return (tabuleiro, 'O' if codigo & _BIT_TURNO else 'X', NIVEIS[indice_nivel],
+            codigo >> _DESLOCAMENTO_JOGADAS, 'O' if codigo & _BIT_HUMANO else 'X')
+
+def codificar_sessao(sessao: SessaoJogo) -> int:
+    """
+    Codifica uma SessaoJogo (o historico nao e guardado, so o numero de jogadas).
+
+    Args:
+        sessao (SessaoJogo): A sessao.
+
+    Returns:
+        int: O codigo de 32 bits.
+    """
+    return codificar_estado(sessao.tabuleiro, sessao.turno, sessao.nivel, sessao.jogadas, sessao.humano)
+
+def descodificar_sessao(codigo: int) -> SessaoJogo:
+    """
+    Reconstroi uma SessaoJogo a partir do seu codigo (com o historico vazio).
+
+    Args:
+        codigo (int): O codigo de 32 bits.
+
+    Returns:
+        SessaoJogo: A sessao.
+
+    Raises:
+        ValueError: Se o codigo nao corresponder a um estado valido.
+    """
+    tabuleiro, turno, nivel, jogadas, humano = descodificar_estado(codigo)
+    sessao = SessaoJogo(f'[{humano}]', nivel, tabuleiro, turno)
+    sessao.jogadas = jogadas
+    return sessao
+
+def codificar_sessoes(sessoes) -> array:
+    """
+    Codifica muitas sessoes para um array compacto (4 bytes por sessao).
+
+    Args:
+        sessoes (iterable): As SessaoJogo.
+
+    Returns:
+        array: array('I') com os codigos, pela mesma ordem.
+    """
+    return array('I', map(codificar_sessao, sessoes))
+
+def descodificar_sessoes(codigos) -> list:
+    """
+    Operacao inversa de codificar_sessoes.
+
+    Args:
+        codigos (iterable): Os codigos de 32 bits.
+
+    Returns:
+        list: As SessaoJogo, pela mesma ordem.
+    """
+    return [descodificar_sessao(codigo) for codigo in codigos]
+
+# -------------------------------------------------------------------------------------------------
+# Ficheiro chave-valor de sessoes
+# -------------------------------------------------------------------------------------------------
+def guardar_sessoes(sessoes: dict, caminho: str) -> int:
+    """
+    Escreve sessoes num ficheiro binario (cabecalho + 12 bytes por sessao, por identificador).
+
+    Args:
+        sessoes (dict): {identificador (int, 0..2**64-1): SessaoJogo ou codigo de 32 bits}.
+        caminho (str): O caminho do ficheiro.
+
+    Returns:
+        int: O numero de sessoes escritas.
+    """
+    with open(caminho, 'wb') as ficheiro:
+        ficheiro.write(_CABECALHO_SESSOES.pack(_MAGICO_SESSOES, _VERSAO_SESSOES, len(sessoes)))
+        for identificador in sorted(sessoes):
+            sessao = sessoes[identificador]
+            codigo = sessao if isinstance(sessao, int) else codificar_sessao(sessao)
+            ficheiro.write(_REGISTO_SESSAO.pack(identificador, codigo))
+    return len(sessoes)
+
+def carregar_sessoes(caminho: str) -> dict:
+    """
+    Le um ficheiro escrito por guardar_sessoes (os codigos nao sao descodificados).
+
+    Args:
+        caminho (str): O caminho do ficheiro.
+
+    Returns:
+        dict: {identificador: codigo}; usar descodificar_sessao para retomar um jogo.
+
+    Raises:
+        ValueError: Se o ficheiro nao existir ou nao for um ficheiro de sessoes.
+    """
+    try:
+        with open(caminho, 'rb') as ficheiro:
+            magico, versao, n = _CABECALHO_SESSOES.unpack(ficheiro.read(_CABECALHO_SESSOES.size))
+            if magico != _MAGICO_SESSOES or versao != _VERSAO_SESSOES:
+                raise ValueError('carregar_sessoes: ficheiro invalido')
+            dados = ficheiro.read(n * _REGISTO_SESSAO.size)
+            if len(dados) != n * _REGISTO_SESSAO.size:
+                raise ValueError('carregar_sessoes: ficheiro truncado')
+    except (OSError, struct.error):
+        raise ValueError('carregar_sessoes: ficheiro de sessoes inexistente ou invalido')
+    return dict(_REGISTO_SESSAO.iter_unpack(dados))
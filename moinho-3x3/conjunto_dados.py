@@ -0,0 +1,299 @@
+"""
+Exportacao em fluxo de posicoes etiquetadas do Moinho 3x3 para ficheiros NumPy (.npz), por blocos.
+- Fontes: todas as posicoes alcancaveis (perft.posicoes_alcancaveis) ou as posicoes visitadas em
+  registos de jogos (registos.py em binario ou aprendizagem.py em JSON lines).
+- Etiquetas de resolver_jogo: analise retrograda de todas as posicoes alcancaveis, com o valor
+  teorico (jogo perfeito, sem limite de jogadas), a distancia ao fim e a melhor jogada.
+- Cada ficheiro '<prefixo>-NNNNN.npz' tem ate 'tamanho_bloco' linhas e as colunas:
+    tabuleiros (N, 9) int8   casas pela ordem de leitura, codificadas como peca_para_inteiro
+    jogadores  (N,) int8     quem joga (1 'X', -1 'O')
+    chaves     (N,) int32    chave do tabuleiro * 2 + 1 se joga 'O'
+    colocacao  (N,) bool     fase de colocacao
+    valores    (N,) int8     valor teorico na perspetiva de 'X' (1, 0 empate, -1)
+    distancias (N,) int16    jogadas ate ao fim com jogo perfeito (-1 se empate)
+    melhores   (N,) int8     codigo da melhor jogada (projeto_final.movimento_para_codigo; -1 se acabou)
+    mobilidade (N,) int8     movimentos reais de quem joga (sem contar passar); -1 na colocacao
+    mobilidade_adversario    o mesmo para o adversario
+    profundidades (N,) int16 numero de jogadas desde o tabuleiro vazio (a menor, no enumerador)
+    resultados (N,) int8     so nos registos: o resultado do jogo na perspetiva de 'X'
+- A memoria e constante: um bloco de linhas, as etiquetas (uma entrada por chave de posicao) e,
+  com simetrias, o conjunto das posicoes canonicas ja escritas.
+- Com simetrias=True cada classe de posicoes simetricas (codificacao.chave_canonica) sai uma so vez,
+  na forma canonica.
+Uso:
+  python3 conjunto_dados.py -o dados/posicoes --simetrias
+  python3 conjunto_dados.py -o dados/autojogo --registos jogos.bin
+"""
+import argparse
+import glob
+import os
+import sys
+from array import array
+from collections import deque
+
+import numpy as np
+
+import perft
+from codificacao import chave_canonica
+from projeto_final import peca_para_inteiro, _tabuleiro_da_chave, _esta_na_fase_colocacao, _codigo_eh_passar
+from registos import ler_registos, reproduzir_jogo, _str_para_codigo
+# -------------------------------------------------------------------------------------------------
+# Constantes
+# -------------------------------------------------------------------------------------------------
+NUM_POSICOES = 2 * 3 ** 9
+SEM_JOGADA = -1
+
+# Resultado na perspetiva de quem joga
+GANHA, EMPATA, PERDE = 1, 0, -1
+
+_SOLUCAO = None  # (valores, distancias, melhores), calculado a pedido
+
+# -------------------------------------------------------------------------------------------------
+# Analise retrograda
+# -------------------------------------------------------------------------------------------------
+def resolver_jogo() -> tuple:
+    """
+    Resolve o jogo por analise retrograda sobre todas as posicoes alcancaveis.
+    Uma posicao com ganhador perde para quem joga; uma posicao ganha se alguma jogada leva a uma
+    posicao perdida, perde se todas levam a posicoes ganhas e empata nos restantes casos (ciclos).
+    Com vitoria, a melhor jogada e a que ganha mais depressa; com derrota, a que mais a adia; com
+    empate, a primeira que mantem o empate (desempates pela ordem das jogadas).
+
+    Returns:
+        tuple (array, array, array): (valores, distancias, melhores), indexados pela chave da posicao
+            (chave do tabuleiro * 2 + 1 se joga 'O'): valor na perspetiva de 'X' ('b'), distancia ao
+            fim ('h', -1 se empate) e codigo da melhor jogada ('b', SEM_JOGADA se o jogo acabou ou a
+            posicao nao e alcancavel).
+    """
+    global _SOLUCAO
+    if _SOLUCAO is not None:
+        return _SOLUCAO
+
+    jogadas, predecessores, pendentes = {}, {}, {}
+    resultados, distancias = {}, {}
+    fila = deque()
+    for posicao, tabuleiro, jogador, _ in perft.posicoes_alcancaveis():
+        codigos = perft.jogadas(tabuleiro, jogador)
+        if not codigos:
+            resultados[posicao], distancias[posicao] = PERDE, 0  # o adversario acabou de ganhar
+            fila.append(posicao)
+        jogadas[posicao] = tuple(zip(codigos, perft.sucessores(posicao)))
+        seguintes = {seguinte for _, seguinte in jogadas[posicao]}
+        pendentes[posicao] = len(seguintes)
+        for seguinte in seguintes:
+            predecessores.setdefault(seguinte, []).append(posicao)
+
+    # Em largura a partir dos fins: as distancias saem pela ordem crescente
+    while fila:
+        posicao = fila.popleft()
+        for anterior in predecessores.get(posicao, ()):
+            if anterior in resultados:
+                continue
+            if resultados[posicao] == PERDE:
+                resultados[anterior], distancias[anterior] = GANHA, distancias[posicao] + 1
+                fila.append(anterior)
+            else:
+                pendentes[anterior] -= 1
+                if pendentes[anterior] == 0:
+                    resultados[anterior], distancias[anterior] = PERDE, distancias[posicao] + 1
+                    fila.append(anterior)
+
+    valores = array('b', [0]) * NUM_POSICOES
+    tabela_distancias = array('h', [-1]) * NUM_POSICOES
+    melhores = array('b', [SEM_JOGADA]) * NUM_POSICOES
+    for posicao, opcoes in jogadas.items():
+        resultado = resultados.get(posicao, EMPATA)
+        valores[posicao] = -resultado if posicao & 1 else resultado
+        tabela_distancias[posicao] = distancias.get(posicao, -1)
+        if not opcoes:
+            continue
+        if resultado == GANHA:
+            codigo, _ = min(((c, s) for c, s in opcoes if resultados.get(s) == PERDE), key=lambda o: distancias[o[1]])
+        elif resultado == PERDE:
+            codigo, _ = max(opcoes, key=lambda o: distancias[o[1]])
+        else:
+            codigo = next(c for c, s in opcoes if s not in resultados)
+        melhores[posicao] = codigo
+    _SOLUCAO = valores, tabela_distancias, melhores
+    return _SOLUCAO
+
+# -------------------------------------------------------------------------------------------------
+# Fontes de posicoes: (chave da posicao, profundidade, resultado do jogo ou None)
+# -------------------------------------------------------------------------------------------------
+def posicoes_enumeradas():
+    """Gera todas as posicoes alcancaveis (ver perft.posicoes_alcancaveis), sem resultado de jogo."""
+    for posicao, _, _, profundidade in perft.posicoes_alcancaveis():
+        yield posicao, profundidade, None
+
+def posicoes_de_jogos(jogos, contagens=None):
+    """
+    Gera as posicoes visitadas em jogos (no formato de aprendizagem.ler_jogos), a inicial incluida.
+
+    Args:
+        jogos (iterable): Jogos {'jogadas': [...], 'vencedor': 'X' | 'O' | ' '}.
+        contagens (dict | None): Se dado, soma 'jogos' e 'invalidos' (jogos ignorados por terem
+            jogadas ilegais ou mal escritas).
+
+    Yields:
+        tuple: (chave da posicao, numero da jogada, resultado do jogo na perspetiva de 'X').
+    """
+    contagens = {} if contagens is None else contagens
+    for jogo in jogos:
+        contagens['jogos'] = contagens.get('jogos', 0) + 1
+        try:
+            posicoes = reproduzir_jogo(bytes(_str_para_codigo(j) for j in jogo['jogadas']))
+        except (KeyError, ValueError):
+            contagens['invalidos'] = contagens.get('invalidos', 0) + 1
+            continue
+        resultado = {'X': 1, 'O': -1}.get(jogo['vencedor'], 0)
+        for profundidade, posicao in enumerate(posicoes):
+            yield posicao, profundidade, resultado
+
+# -------------------------------------------------------------------------------------------------
+# Exportacao
+# -------------------------------------------------------------------------------------------------
+def _mobilidade(codigos) -> int:
+    """Numero de movimentos reais (sem passar) numa lista de codigos."""
+    return sum(1 for c in codigos if not _codigo_eh_passar(c))
+
+class _Bloco:
+    """Colunas de um bloco de linhas, pre-alocadas com 'tamanho' linhas."""
+    __slots__ = ('colunas', 'n')
+
+    def __init__(self, tamanho: int, resultados: bool):
+        self.colunas = {
+            'tabuleiros': np.zeros((tamanho, 9), dtype=np.int8),
+            'jogadores': np.zeros(tamanho, dtype=np.int8),
+            'chaves': np.zeros(tamanho, dtype=np.int32),
+            'colocacao': np.zeros(tamanho, dtype=bool),
+            'valores': np.zeros(tamanho, dtype=np.int8),
+            'distancias': np.zeros(tamanho, dtype=np.int16),
+            'melhores': np.zeros(tamanho, dtype=np.int8),
+            'mobilidade': np.zeros(tamanho, dtype=np.int8),
+            'mobilidade_adversario': np.zeros(tamanho, dtype=np.int8),
+            'profundidades': np.zeros(tamanho, dtype=np.int16),
+        }
+        if resultados:
+            self.colunas['resultados'] = np.zeros(tamanho, dtype=np.int8)
+        self.n = 0
+
+def exportar_conjunto(fonte, prefixo: str, tamanho_bloco: int = 65536, simetrias: bool = False,
+                      comprimir: bool = False) -> dict:
+    """
+    Escreve as posicoes de uma fonte, etiquetadas, em ficheiros '<prefixo>-NNNNN.npz' (ver o topo do modulo).
+
+    Args:
+        fonte (iterable): (chave da posicao, profundidade, resultado ou None), como posicoes_enumeradas
+            ou posicoes_de_jogos. A coluna 'resultados' so existe se a primeira linha tiver resultado.
+        prefixo (str): Caminho dos ficheiros, sem o sufixo (a pasta tem de existir).
+        tamanho_bloco (int): Numero maximo de linhas por ficheiro.
+        simetrias (bool): Escreve cada classe de posicoes simetricas uma so vez, na forma canonica.
+        comprimir (bool): Usa np.savez_compressed.
+
+    Returns:
+        dict: {'linhas', 'ficheiros', 'repetidas'} (repetidas: posicoes ignoradas por simetria).
+
+    Raises:
+        ValueError: Se o tamanho do bloco for invalido.
+    """
+    if not (isinstance(tamanho_bloco, int) and tamanho_bloco > 0):
+        raise ValueError('exportar_conjunto: tamanho de bloco invalido')
+    valores, distancias, melhores = resolver_jogo()
+    guardar = np.savez_compressed if comprimir else np.savez
+    contagens = {'linhas': 0, 'ficheiros': 0, 'repetidas': 0}
+    vistas, bloco = set(), None
+
+    def despejar():
+        colunas = {nome: coluna[:bloco.n] for nome, coluna in bloco.colunas.items()}
+        guardar(f"{prefixo}-{contagens['ficheiros']:05d}.npz", **colunas)
+        contagens['ficheiros'] += 1
+        bloco.n = 0
+
+    for posicao, profundidade, resultado in fonte:
+        if simetrias:
+            posicao = chave_canonica(posicao >> 1)[0] * 2 + (posicao & 1)
+            if posicao in vistas:
+                contagens['repetidas'] += 1
+                continue
+            vistas.add(posicao)
+        if bloco is None:
+            bloco = _Bloco(tamanho_bloco, resultado is not None)
+        tabuleiro = _tabuleiro_da_chave(posicao >> 1)
+        jogador, adversario = ('O', 'X') if posicao & 1 else ('X', 'O')
+        colocacao = _esta_na_fase_colocacao(tabuleiro)
+
+        colunas, i = bloco.colunas, bloco.n
+        colunas['tabuleiros'][i] = [peca_para_inteiro(p) for linha in tabuleiro for p in linha]
+        colunas['jogadores'][i] = peca_para_inteiro(jogador)
+        colunas['chaves'][i] = posicao
+        colunas['colocacao'][i] = colocacao
+        colunas['valores'][i] = valores[posicao]
+        colunas['distancias'][i] = distancias[posicao]
+        colunas['melhores'][i] = melhores[posicao]
+        colunas['mobilidade'][i] = -1 if colocacao else _mobilidade(perft.jogadas(tabuleiro, jogador))
+        colunas['mobilidade_adversario'][i] = -1 if colocacao else _mobilidade(perft.jogadas(tabuleiro, adversario))
+        colunas['profundidades'][i] = profundidade
+        if 'resultados' in colunas:
+            colunas['resultados'][i] = resultado
+        bloco.n += 1
+        contagens['linhas'] += 1
+        if bloco.n == tamanho_bloco:
+            despejar()
+    if bloco is not None and bloco.n:
+        despejar()
+    return contagens
+
+def ler_conjunto(prefixo: str):
+    """
+    Gera os blocos escritos por exportar_conjunto, pela ordem.
+
+    Args:
+        prefixo (str): O prefixo dado a exportar_conjunto.
+
+    Yields:
+        dict: {coluna: array} de cada ficheiro.
+    """
+    for caminho in sorted(glob.glob(glob.escape(prefixo) + '-[0-9][0-9][0-9][0-9][0-9].npz')):
+        with np.load(caminho) as dados:
+            yield {nome: dados[nome] for nome in dados.files}
+
+# -------------------------------------------------------------------------------------------------
+# Linha de comandos
+# -------------------------------------------------------------------------------------------------
+def _ler_jogos_ficheiro(caminho: str):
+    """Jogos de um registo binario (registos.py) ou, se terminar em .jsonl, de JSON lines (aprendizagem.py)."""
+    if caminho.endswith('.jsonl'):
+        from aprendizagem import ler_jogos
+        with open(caminho, encoding='utf-8') as ficheiro:
+            yield from ler_jogos(ficheiro)
+    else:
+        with open(caminho, 'rb') as ficheiro:
+            yield from ler_registos(ficheiro)
+
+def main(argumentos=None) -> int:
+    """Ponto de entrada da linha de comandos."""
+    parser = argparse.ArgumentParser(description='Exporta posicoes etiquetadas do Moinho 3x3 para .npz.')
+    parser.add_argument('-o', '--saida', required=True, help='prefixo dos ficheiros .npz')
+    parser.add_argument('--registos', nargs='+', help='registos de jogos (.bin de registos.py ou .jsonl)')
+    parser.add_argument('--simetrias', action='store_true', help='uma so posicao por classe de simetria')
+    parser.add_argument('--bloco', type=int, default=65536, help='linhas por ficheiro')
+    parser.add_argument('--comprimir', action='store_true')
+    args = parser.parse_args(argumentos)
+
+    pasta = os.path.dirname(args.saida)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    jogos = {}
+    if args.registos:
+        fonte = posicoes_de_jogos((j for c in args.registos for j in _ler_jogos_ficheiro(c)), jogos)
+    else:
+        fonte = posicoes_enumeradas()
+    contagens = exportar_conjunto(fonte, args.saida, args.bloco, args.simetrias, args.comprimir)
+    print(f"{contagens['linhas']} posicoes em {contagens['ficheiros']} ficheiros"
+          f" ({contagens['repetidas']} repetidas por simetria)")
+    if jogos:
+        print(f"{jogos['jogos']} jogos ({jogos.get('invalidos', 0)} invalidos)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+Difusao de jogos para espectadores (asyncio), com atualizacoes incrementais.
+- Cada jogo tem um CanalJogo; cada jogada e publicada uma unica vez como um delta pequeno
+  (peca, origem, destino) e entregue a N subscritores, sem redesenhar o tabuleiro.
+- Quem chega a meio recebe o ultimo instantaneo (guardado a cada 'intervalo' jogadas) e os
+  deltas seguintes, e fica sincronizado.
+- Cada subscritor tem uma fila limitada: se um espectador lento a deixar encher, a fila e
+  esvaziada e substituida por um instantaneo atual. O jogo nunca espera pelos espectadores.
+Mensagens (uma por linha):
+- S <seq> <9 casas pela ordem de leitura, '.' para livre> <turno>   instantaneo
+- D <seq> <peca> <jogada>    delta: 'b2' (colocacao) ou 'a1a2' (movimento; 'a1a1' e passar)
+- F <[X]|[O]>                fim do jogo
+Uso (espectador): ligar ao servidor de criar_servidor_espectadores e enviar 'VER <id do jogo>'.
+"""
+import asyncio
+
+from projeto_final import posicao_para_str, str_para_posicao, _ORDEM_LEITURA_MAP
+# -------------------------------------------------------------------------------------------------
+# Canal de um jogo
+# -------------------------------------------------------------------------------------------------
+class Subscritor:
+    """Fila limitada de mensagens de um espectador."""
+    __slots__ = ('fila', 'ressincronizacoes')
+
+    def __init__(self, capacidade: int):
+        self.fila = asyncio.Queue(capacidade)
+        self.ressincronizacoes = 0
+
+    async def receber(self) -> str:
+        """Espera pela proxima mensagem."""
+        return await self.fila.get()
+
+    def pendentes(self) -> list:
+        """Retira, sem esperar, todas as mensagens ja na fila."""
+        mensagens = []
+        while not self.fila.empty():
+            mensagens.append(self.fila.get_nowait())
+        return mensagens
+
+class CanalJogo:
+    """
+    Estado publico de um jogo e os seus subscritores.
+    Os metodos devem ser chamados no ciclo de eventos onde os subscritores leem.
+    """
+    __slots__ = ('casas', 'turno', 'sequencia', 'ganhador', 'intervalo', '_instantaneo', '_deltas',
+                 '_subscritores', 'estatisticas')
+
+    def __init__(self, tabuleiro=None, turno: str = 'X', intervalo: int = 32):
+        """
+        Args:
+            tabuleiro (list | None): O tabuleiro inicial (None para um tabuleiro vazio).
+            turno (str): O jogador com o turno.
+            intervalo (int): Jogadas entre instantaneos guardados para quem chega a meio.
+        """
+        self.casas = ['.'] * 9 if tabuleiro is None else \
+            [p if p != ' ' else '.' for linha in tabuleiro for p in linha]
+        self.turno = turno
+        self.sequencia = 0
+        self.ganhador = ' '
+        self.intervalo = intervalo
+        self._instantaneo = self.instantaneo()
+        self._deltas = []
+        self._subscritores = set()
+        self.estatisticas = {'mensagens': 0, 'entregas': 0, 'ressincronizacoes': 0}
+
+    def instantaneo(self) -> str:
+        """A mensagem S com o estado atual."""
+        return f'S {self.sequencia} {"".join(self.casas)} {self.turno}'
+
+    def publicar(self, jogador: str, movimento: tuple) -> str:
+        """
+        Aplica uma jogada ao estado publico e envia o delta a todos os subscritores.
+
+        Args:
+            jogador (str): O TAD peca de quem jogou.
+            movimento (tuple): O tuplo de movimento (1 ou 2 posicoes).
+
+        Returns:
+            str: A mensagem D publicada.
+        """
+        destino = _ORDEM_LEITURA_MAP[posicao_para_str(movimento[-1])]
+        if len(movimento) == 2:
+            self.casas[_ORDEM_LEITURA_MAP[posicao_para_str(movimento[0])]] = '.'
+        self.casas[destino] = jogador
+        self.turno = 'O' if jogador == 'X' else 'X'
+        self.sequencia += 1
+        mensagem = f'D {self.sequencia} {jogador} {"".join(posicao_para_str(p) for p in movimento)}'
+
+        self._deltas.append(mensagem)
+        if len(self._deltas) >= self.intervalo:
+            self._instantaneo, self._deltas = self.instantaneo(), []
+        self._difundir(mensagem)
+        return mensagem
+
+    def terminar(self, ganhador: str) -> None:
+        """Publica o fim do jogo (ganhador 'X' ou 'O')."""
+        self.ganhador = ganhador
+        self._difundir(f'F [{ganhador}]')
+
+    def _difundir(self, mensagem: str) -> None:
+        """Entrega a mensagem sem esperar; um subscritor com a fila cheia recebe um instantaneo."""
+        self.estatisticas['mensagens'] += 1
+        for subscritor in self._subscritores:
+            try:
+                subscritor.fila.put_nowait(mensagem)
+            except asyncio.QueueFull:
+                subscritor.pendentes()
+                subscritor.fila.put_nowait(self.instantaneo())
+                if self.ganhador != ' ':
+                    subscritor.fila.put_nowait(f'F [{self.ganhador}]')
+                subscritor.ressincronizacoes += 1
+                self.estatisticas['ressincronizacoes'] += 1
+            self.estatisticas['entregas'] += 1
+
+    def subscrever(self, capacidade: int = 64) -> Subscritor:
+        """
+        Cria um subscritor ja sincronizado: ultimo instantaneo guardado e deltas seguintes
+        (ou o instantaneo atual, se nao couberem na fila).
+
+        Args:
+            capacidade (int): Tamanho maximo da fila do subscritor (pelo menos 2: instantaneo e 'F').
+
+        Returns:
+            Subscritor: O subscritor.
+
+        Raises:
+            ValueError: Se a capacidade for menor do que 2.
+        """
+        if not (isinstance(capacidade, int) and capacidade >= 2):
+            raise ValueError('subscrever: capacidade invalida (minimo 2)')
+        subscritor = Subscritor(capacidade)
+        if len(self._deltas) + 2 <= capacidade:
+            for mensagem in [self._instantaneo] + self._deltas:
+                subscritor.fila.put_nowait(mensagem)
+        else:
+            subscritor.fila.put_nowait(self.instantaneo())
+        if self.ganhador != ' ':
+            subscritor.fila.put_nowait(f'F [{self.ganhador}]')
+        self._subscritores.add(subscritor)
+        return subscritor
+
+    def cancelar(self, subscritor: Subscritor) -> None:
+        """Remove um subscritor."""
+        self._subscritores.discard(subscritor)
+
+    def __len__(self) -> int:
+        return len(self._subscritores)
+
+# -------------------------------------------------------------------------------------------------
+# Lado do espectador
+# -------------------------------------------------------------------------------------------------
+def aplicar_mensagem(estado, mensagem: str) -> dict:
+    """
+    Atualiza a vista de um espectador com uma mensagem S, D ou F.
+
+    Args:
+        estado (dict | None): {'sequencia', 'casas', 'turno', 'ganhador'} (None antes do primeiro S).
+        mensagem (str): A mensagem recebida.
+
+    Returns:
+        dict: O estado atualizado.
+
+    Raises:
+        ValueError: Se a mensagem for invalida ou faltar um delta (sequencia fora de ordem).
+    """
+    partes = mensagem.split()
+    if partes[:1] == ['S'] and len(partes) == 4:
+        return {'sequencia': int(partes[1]), 'casas': list(partes[2]), 'turno': partes[3], 'ganhador': ' '}
+    if estado is None:
+        raise ValueError('aplicar_mensagem: falta o instantaneo inicial')
+    if partes[:1] == ['F'] and len(partes) == 2:
+        return {**estado, 'ganhador': partes[1][1]}
+    if partes[:1] != ['D'] or len(partes) != 4 or int(partes[1]) != estado['sequencia'] + 1:
+        raise ValueError('aplicar_mensagem: mensagem invalida ou fora de ordem')
+    jogador, jogada = partes[2], partes[3]
+    casas = list(estado['casas'])
+    if len(jogada) == 4:
+        casas[_ORDEM_LEITURA_MAP[posicao_para_str(str_para_posicao(jogada[:2]))]] = '.'
+    casas[_ORDEM_LEITURA_MAP[posicao_para_str(str_para_posicao(jogada[-2:]))]] = jogador
+    return {'sequencia': int(partes[1]), 'casas': casas, 'turno': 'O' if jogador == 'X' else 'X',
+            'ganhador': ' '}
+
+# -------------------------------------------------------------------------------------------------
+# Servidor de espectadores
+# -------------------------------------------------------------------------------------------------
+async def _tratar_espectador(canais: dict, capacidade: int, leitor, escritor) -> None:
+    """Le 'VER <id>' e envia as mensagens do canal ate ao fim do jogo ou ao fim da ligacao."""
+    subscritor, canal = None, None
+    try:
+        pedido = (await leitor.readline()).decode('utf-8', 'replace').split()
+        canal = canais.get(pedido[1]) if len(pedido) == 2 and pedido[0] == 'VER' else None
+        if canal is None:
+            escritor.write(b'ERRO jogo inexistente\n')
+            return
+        subscritor = canal.subscrever(capacidade)
+        while True:
+            mensagem = await subscritor.receber()
+            escritor.write((mensagem + '\n').encode('utf-8'))
+            await escritor.drain()  # so atrasa este espectador
+            if mensagem[0] == 'F':
+                return
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        if subscritor is not None:
+            canal.cancelar(subscritor)
+        escritor.close()
+
+async def criar_servidor_espectadores(canais: dict, anfitriao: str = '127.0.0.1', porta: int = 7779,
+                                      capacidade: int = 64):
+    """
+    Poe a escuta um servidor de espectadores para os canais dados.
+
+    Args:
+        canais (dict): {id do jogo (str): CanalJogo}; pode mudar enquanto o servidor corre.
+        anfitriao (str): Endereco de escuta.
+        porta (int): Porta de escuta (0 escolhe uma porta livre).
+        capacidade (int): Tamanho da fila de cada espectador (pelo menos 2).
+
+    Returns:
+        asyncio.Server: O servidor.
+
+    Raises:
+        ValueError: Se a capacidade for menor do que 2.
+    """
+    if not (isinstance(capacidade, int) and capacidade >= 2):
+        raise ValueError('criar_servidor_espectadores: capacidade invalida (minimo 2)')
+    async def atender(leitor, escritor):
+        await _tratar_espectador(canais, capacidade, leitor, escritor)
+    return await asyncio.start_server(atender, anfitriao, porta, limit=256)
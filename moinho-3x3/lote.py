@@ -0,0 +1,392 @@
+"""
+Motor vetorizado (NumPy) para lotes de tabuleiros do Moinho 3x3.
+- Um lote e um array (N, 9) de int8, com as casas pela ordem de leitura
+  (a1, b1, c1, a2, ..., c3) e a mesma codificacao de peca_para_inteiro:
+  1 para 'X', -1 para 'O', 0 para ' '.
+- Todas as operacoes (ganhador, contagem de pecas, fase, movimentos legais,
+  sucessores e politicas 'facil'/'normal') sao aplicadas aos N tabuleiros de uma vez.
+- Um movimento e representado por (origem, destino) em indices 0..8:
+  colocacao -> origem == -1; passar -> origem == destino.
+Funcoes publicas:
+- Conversao: tabuleiros_para_lote, tuplos_para_lote, lote_para_tabuleiros
+- Consulta: contar_pecas_lote, fase_colocacao_lote, obter_ganhadores_lote
+- Jogadas: mascara_colocacao_lote, mascara_movimentos_lote, sucessores_lote,
+  aplicar_movimentos_lote
+- Politicas e simulacao: escolher_movimentos_lote, avancar_lote, simular_jogos_lote
+"""
+import numpy as np
+
+from projeto_final import (
+    COLUNAS, LINHAS, LINHAS_VENCEDORAS, _LIGACOES, _ORDEM_LEITURA_MAP,
+    cria_tabuleiro, obter_peca, cria_posicao, peca_para_inteiro,
+)
+# -------------------------------------------------------------------------------------------------
+# Constantes (derivadas das regras do projeto)
+# -------------------------------------------------------------------------------------------------
+NUM_CASAS = 9
+COLOCACAO = -1  # origem de uma jogada de colocacao
+
+# Indices (0..8) das casas de cada linha vencedora: shape (6, 3)
+_INDICES_LINHAS = np.array(
+    [[lin * 3 + col for (lin, col) in linha] for linha in LINHAS_VENCEDORAS], dtype=np.intp)
+
+# _LINHA_CONTEM[l, i] e True se a casa i pertence a linha vencedora l: shape (6, 9)
+_LINHA_CONTEM = np.zeros((len(LINHAS_VENCEDORAS), NUM_CASAS), dtype=bool)
+for _l, _casas in enumerate(_INDICES_LINHAS):
+    _LINHA_CONTEM[_l, _casas] = True
+
+# _ADJACENCIA[o, d] e True se d e adjacente a o (mesmas ligacoes que obter_posicoes_adjacentes)
+_ADJACENCIA = np.zeros((NUM_CASAS, NUM_CASAS), dtype=bool)
+for _origem, _vizinhos in _LIGACOES.items():
+    for _destino in _vizinhos:
+        _ADJACENCIA[_ORDEM_LEITURA_MAP[_origem], _ORDEM_LEITURA_MAP[_destino]] = True
+
+# Prioridade da colocacao apos vitoria/bloqueio: centro -> cantos -> laterais
+_ORDEM_COLOCACAO = np.array([4, 0, 2, 6, 8, 1, 3, 5, 7], dtype=np.intp)
+
+_POLITICAS = ('facil', 'normal', 'aleatorio')
+
+# -------------------------------------------------------------------------------------------------
+# Conversao entre TAD tabuleiro e lote
+# -------------------------------------------------------------------------------------------------
+def _validar_lote(lote) -> np.ndarray:
+    """Valida e devolve o lote como array (N, 9) de int8."""
+    lote = np.asarray(lote)
+    if lote.ndim != 2 or lote.shape[1] != NUM_CASAS:
+        raise ValueError('lote: esperado um array (N, 9)')
+    if not np.isin(lote, (1, 0, -1)).all():
+        raise ValueError('lote: valores invalidos (usar 1, 0, -1)')
+    return lote.astype(np.int8, copy=False)
+
+def _validar_jogadores(jogadores, n: int) -> np.ndarray:
+    """Expande 'jogadores' (escalar ou (N,)) para um array (N,) de int8 com 1/-1."""
+    jogadores = np.broadcast_to(np.asarray(jogadores, dtype=np.int8), (n,))
+    if not np.isin(jogadores, (1, -1)).all():
+        raise ValueError('lote: jogadores invalidos (usar 1 ou -1)')
+    return jogadores
+
+def tabuleiros_para_lote(tabuleiros) -> np.ndarray:
+    """
+    Converte uma sequencia de TADs tabuleiro num lote (N, 9).
+
+    Args:
+        tabuleiros (iterable): Os TADs tabuleiro.
+
+    Returns:
+        np.ndarray: O lote (N, 9) de int8.
+    """
+    posicoes = [cria_posicao(c, l) for l in LINHAS for c in COLUNAS]
+    valores = [[peca_para_inteiro(obter_peca(t, p)) for p in posicoes] for t in tabuleiros]
+    return np.array(valores, dtype=np.int8).reshape(-1, NUM_CASAS)
+
+def tuplos_para_lote(tuplos) -> np.ndarray:
+    """
+    Converte uma sequencia de tuplos 3x3 de inteiros (formato de tuplo_para_tabuleiro) num lote.
+
+    Args:
+        tuplos (iterable): Os tuplos 3x3 (1 para 'X', -1 para 'O', 0 para ' ').
+
+    Returns:
+        np.ndarray: O lote (N, 9) de int8.
+    """
+    return _validar_lote(np.array(list(tuplos), dtype=np.int8).reshape(-1, NUM_CASAS))
+
+def lote_para_tabuleiros(lote) -> list:
+    """
+    Converte um lote (N, 9) numa lista de TADs tabuleiro.
+
+    Args:
+        lote (np.ndarray): O lote de tabuleiros.
+
+    Returns:
+        list: Uma lista com N TADs tabuleiro.
+    """
+    simbolos = {1: 'X', -1: 'O', 0: ' '}
+    tabuleiros = []
+    for linha_lote in _validar_lote(lote).tolist():
+        tabuleiro = cria_tabuleiro()
+        for i, valor in enumerate(linha_lote):
+            tabuleiro[i // 3][i % 3] = simbolos[valor]
+        tabuleiros.append(tabuleiro)
+    return tabuleiros
+
+# -------------------------------------------------------------------------------------------------
+# Consultas vetorizadas
+# -------------------------------------------------------------------------------------------------
+def contar_pecas_lote(lote) -> tuple:
+    """
+    Conta as pecas de cada jogador em cada tabuleiro do lote.
+
+    Args:
+        lote (np.ndarray): O lote (N, 9).
+
+    Returns:
+        tuple (np.ndarray, np.ndarray): (pecas de 'X', pecas de 'O'), cada um com shape (N,).
+    """
+    lote = _validar_lote(lote)
+    return (lote == 1).sum(axis=1), (lote == -1).sum(axis=1)
+
+def fase_colocacao_lote(lote) -> np.ndarray:
+    """
+    Equivalente vetorizado de _esta_na_fase_colocacao (menos de 6 pecas no total).
+
+    Args:
+        lote (np.ndarray): O lote (N, 9).
+
+    Returns:
+        np.ndarray: Array (N,) de bool.
+    """
+    return (_validar_lote(lote) != 0).sum(axis=1) < 6
+
+def obter_ganhadores_lote(lote) -> np.ndarray:
+    """
+    Equivalente vetorizado de obter_ganhador ('X' e verificado primeiro).
+
+    Args:
+        lote (np.ndarray): O lote (N, 9).
+
+    Returns:
+        np.ndarray: Array (N,) de int8 com 1 ('X'), -1 ('O') ou 0 (sem ganhador).
+    """
+    somas = _validar_lote(lote)[:, _INDICES_LINHAS].sum(axis=2, dtype=np.int8)
+    vence_x = (somas == 3).any(axis=1)
+    vence_o = (somas == -3).any(axis=1)
+    return np.where(vence_x, 1, np.where(vence_o, -1, 0)).astype(np.int8)
+
+# -------------------------------------------------------------------------------------------------
+# Jogadas legais e sucessores
+# -------------------------------------------------------------------------------------------------
+def mascara_colocacao_lote(lote) -> np.ndarray:
+    """
+    Mascara das colocacoes legais (casas livres) de cada tabuleiro.
+
+    Args:
+        lote (np.ndarray): O lote (N, 9).
+
+    Returns:
+        np.ndarray: Array (N, 9) de bool.
+    """
+    return _validar_lote(lote) == 0
+
+def mascara_movimentos_lote(lote, jogadores) -> np.ndarray:
+    """
+    Equivalente vetorizado de _gerar_movimentos_validos.
+    mascara[n, o, d] e True se o jogador do tabuleiro n pode mover de o para d.
+    Se o jogador estiver bloqueado, apenas "passar" com a primeira peca (o == d) e legal.
+    A ordem (o, d) achatada coincide com a ordem de _gerar_movimentos_validos.
+
+    Args:
+        lote (np.ndarray): O lote (N, 9).
+        jogadores (int | np.ndarray): O jogador a mover (1 ou -1), global ou por tabuleiro.
+
+    Returns:
+        np.ndarray: Array (N, 9, 9) de bool.
+    """
+    lote = _validar_lote(lote)
+    jogadores = _validar_jogadores(jogadores, lote.shape[0])
+    proprias = lote == jogadores[:, None]
+    livres = lote == 0
+    mascara = proprias[:, :, None] & livres[:, None, :] & _ADJACENCIA[None, :, :]
+
+    bloqueados = ~mascara.any(axis=(1, 2)) & proprias.any(axis=1)
+    if bloqueados.any():
+        linhas = np.flatnonzero(bloqueados)
+        primeira = proprias[linhas].argmax(axis=1)
+        mascara[linhas, primeira, primeira] = True
+    return mascara
+
+def aplicar_movimentos_lote(lote, jogadores, origens, destinos) -> np.ndarray:
+    """
+    Aplica um movimento a cada tabuleiro do lote (sem validar legalidade).
+    Equivalente vetorizado de _executar_movimento; devolve um novo lote.
+
+    Args:
+        lote (np.ndarray): O lote (N, 9).
+        jogadores (int | np.ndarray): O jogador que joga em cada tabuleiro (1 ou -1).
+        origens (np.ndarray): Indices de origem (N,); COLOCACAO (-1) para colocar.
+        destinos (np.ndarray): Indices de destino (N,).
+
+    Returns:
+        np.ndarray: O novo lote (N, 9).
+    """
+    novo = _validar_lote(lote).copy()
+    jogadores = _validar_jogadores(jogadores, novo.shape[0])
+    origens = np.asarray(origens, dtype=np.intp)
+    destinos = np.asarray(destinos, dtype=np.intp)
+    linhas = np.arange(novo.shape[0])
+
+    moves = origens != COLOCACAO
+    novo[linhas[moves], origens[moves]] = 0
+    novo[linhas, destinos] = jogadores
+    return novo
+
+def sucessores_lote(lote, jogadores) -> tuple:
+    """
+    Gera todos os tabuleiros sucessores de todos os tabuleiros do lote.
+    Usa colocacoes na fase de colocacao e movimentos na fase de movimento.
+    Tabuleiros com ganhador nao geram sucessores.
+
+    Args:
+        lote (np.ndarray): O lote (N, 9).
+        jogadores (int | np.ndarray): O jogador a jogar em cada tabuleiro (1 ou -1).
+
+    Returns:
+        tuple: (sucessores (M, 9), pais (M,), origens (M,), destinos (M,)),
+        pela ordem dos tabuleiros e, dentro de cada um, pela ordem de leitura.
+    """
+    lote = _validar_lote(lote)
+    jogadores = _validar_jogadores(jogadores, lote.shape[0])
+    ativos = obter_ganhadores_lote(lote) == 0
+    colocacao = fase_colocacao_lote(lote)
+
+    # Codigo de jogada 0..80 (o*9 + d) para movimentos, 81..89 para colocacoes
+    jogadas = np.zeros((lote.shape[0], NUM_CASAS * NUM_CASAS + NUM_CASAS), dtype=bool)
+    jogadas[:, :81] = mascara_movimentos_lote(lote, jogadores).reshape(-1, 81) & ~colocacao[:, None]
+    jogadas[:, 81:] = mascara_colocacao_lote(lote) & colocacao[:, None]
+    jogadas &= ativos[:, None]
+
+    pais, codigos = np.nonzero(jogadas)
+    origens = np.where(codigos >= 81, COLOCACAO, codigos // NUM_CASAS)
+    destinos = np.where(codigos >= 81, codigos - 81, codigos % NUM_CASAS)
+    sucessores = aplicar_movimentos_lote(lote[pais], jogadores[pais], origens, destinos)
+    return sucessores, pais, origens, destinos
+
+# -------------------------------------------------------------------------------------------------
+# Politicas vetorizadas ('facil', 'normal', 'aleatorio')
+# -------------------------------------------------------------------------------------------------
+def _primeiro_verdadeiro(mascara: np.ndarray) -> tuple:
+    """Devolve (indice do primeiro True por linha, existe algum True) para uma mascara (N, K)."""
+    return mascara.argmax(axis=1), mascara.any(axis=1)
+
+def _casas_vencedoras_colocacao(lote: np.ndarray, jogadores: np.ndarray) -> np.ndarray:
+    """Mascara (N, 9) das casas livres onde colocar uma peca de 'jogadores' completa uma linha."""
+    somas = lote[:, _INDICES_LINHAS].sum(axis=2, dtype=np.int8)
+    linhas_quase = somas == 2 * jogadores[:, None]
+    vence = (linhas_quase[:, :, None] & _LINHA_CONTEM[None, :, :]).any(axis=1)
+    return vence & (lote == 0)
+
+def _colocacao_lote(lote: np.ndarray, jogadores: np.ndarray) -> np.ndarray:
+    """Equivalente vetorizado de _escolher_colocacao_ia: devolve o destino (N,) de cada tabuleiro."""
+    livres = lote == 0
+    destino_ordem, _ = _primeiro_verdadeiro(livres[:, _ORDEM_COLOCACAO])
+    destinos = _ORDEM_COLOCACAO[destino_ordem]
+
+    # Prioridade inversa: o bloqueio sobrepoe-se a ordem fixa e a vitoria ao bloqueio
+    for alvo in (-jogadores, jogadores):
+        casa, existe = _primeiro_verdadeiro(_casas_vencedoras_colocacao(lote, alvo))
+        destinos = np.where(existe, casa, destinos)
+    return destinos
+
+def _movimentos_vencedores(lote: np.ndarray, jogadores: np.ndarray, mascara: np.ndarray) -> np.ndarray:
+    """Mascara (N, 81) dos movimentos reais (o != d) de 'mascara' que dao vitoria imediata."""
+    somas = lote[:, _INDICES_LINHAS].sum(axis=2, dtype=np.int8)
+    linhas_quase = somas == 2 * jogadores[:, None]
+    # Mover o -> d completa a linha l se d pertence a l, o nao pertence a l e l tem 2 pecas proprias
+    completa = linhas_quase[:, :, None, None] & _LINHA_CONTEM[None, :, None, :] & ~_LINHA_CONTEM[None, :, :, None]
+    vence = completa.any(axis=1) & mascara
+    vence[:, np.arange(NUM_CASAS), np.arange(NUM_CASAS)] = False
+    return vence.reshape(-1, NUM_CASAS * NUM_CASAS)
+
+def escolher_movimentos_lote(lote, jogadores, nivel: str, gerador=None) -> tuple:
+    """
+    Equivalente vetorizado de obter_movimento_auto para os niveis 'facil' e 'normal',
+    e ainda uma politica 'aleatorio' (jogada legal uniforme) para auto-jogo.
+
+    Args:
+        lote (np.ndarray): O lote (N, 9), sem tabuleiros terminados.
+        jogadores (int | np.ndarray): O jogador a jogar em cada tabuleiro (1 ou -1).
+        nivel (str): 'facil', 'normal' ou 'aleatorio'.
+        gerador (np.random.Generator | None): Gerador para a politica 'aleatorio'.
+
+    Returns:
+        tuple (np.ndarray, np.ndarray): (origens, destinos), com origem COLOCACAO (-1) nas colocacoes.
+
+    Raises:
+        ValueError: Se o nivel for invalido.
+    """
+    if nivel not in _POLITICAS:
+        raise ValueError('escolher_movimentos_lote: nivel invalido')
+    lote = _validar_lote(lote)
+    jogadores = _validar_jogadores(jogadores, lote.shape[0])
+    colocacao = fase_colocacao_lote(lote)
+    mascara = mascara_movimentos_lote(lote, jogadores)
+    planos = mascara.reshape(-1, NUM_CASAS * NUM_CASAS)
+
+    if nivel == 'aleatorio':
+        gerador = gerador if gerador is not None else np.random.default_rng()
+        ruido = gerador.random((lote.shape[0], NUM_CASAS * NUM_CASAS))
+        codigos = np.where(planos, ruido, -1.0).argmax(axis=1)
+        casas = np.where(lote == 0, gerador.random(lote.shape), -1.0).argmax(axis=1)
+        origens = np.where(colocacao, COLOCACAO, codigos // NUM_CASAS)
+        destinos = np.where(colocacao, casas, codigos % NUM_CASAS)
+        return origens, destinos
+
+    # 'facil': primeiro movimento pela ordem de leitura (origem, depois destino)
+    codigos, _ = _primeiro_verdadeiro(planos)
+    if nivel == 'normal':
+        vencedor, existe = _primeiro_verdadeiro(_movimentos_vencedores(lote, jogadores, mascara))
+        codigos = np.where(existe, vencedor, codigos)
+
+    origens = np.where(colocacao, COLOCACAO, codigos // NUM_CASAS)
+    destinos = np.where(colocacao, _colocacao_lote(lote, jogadores), codigos % NUM_CASAS)
+    return origens, destinos
+
+# -------------------------------------------------------------------------------------------------
+# Simulacao de jogos em passo sincronizado
+# -------------------------------------------------------------------------------------------------
+def avancar_lote(lote, jogadores, nivel_x: str, nivel_o: str, gerador=None) -> np.ndarray:
+    """
+    Avanca uma jogada em todos os jogos ainda sem ganhador.
+    Cada tabuleiro usa a politica do jogador a jogar ('X' -> nivel_x, 'O' -> nivel_o).
+
+    Args:
+        lote (np.ndarray): O lote (N, 9).
+        jogadores (int | np.ndarray): O jogador a jogar em cada tabuleiro (1 ou -1).
+        nivel_x (str): Politica de 'X' ('facil', 'normal' ou 'aleatorio').
+        nivel_o (str): Politica de 'O' ('facil', 'normal' ou 'aleatorio').
+        gerador (np.random.Generator | None): Gerador para a politica 'aleatorio'.
+
+    Returns:
+        np.ndarray: O novo lote (os jogos terminados ficam inalterados).
+    """
+    lote = _validar_lote(lote)
+    jogadores = _validar_jogadores(jogadores, lote.shape[0])
+    novo = lote.copy()
+    ativos = obter_ganhadores_lote(lote) == 0
+
+    for valor, nivel in ((1, nivel_x), (-1, nivel_o)):
+        linhas = np.flatnonzero(ativos & (jogadores == valor))
+        if linhas.size == 0:
+            continue
+        origens, destinos = escolher_movimentos_lote(lote[linhas], valor, nivel, gerador)
+        novo[linhas] = aplicar_movimentos_lote(lote[linhas], valor, origens, destinos)
+    return novo
+
+def simular_jogos_lote(lote, nivel_x: str, nivel_o: str, jogadores=1, max_jogadas: int = 100,
+                       gerador=None) -> tuple:
+    """
+    Joga em passo sincronizado todos os jogos do lote ate terem ganhador ou atingirem max_jogadas.
+
+    Args:
+        lote (np.ndarray): As posicoes iniciais (N, 9).
+        nivel_x (str): Politica de 'X' ('facil', 'normal' ou 'aleatorio').
+        nivel_o (str): Politica de 'O' ('facil', 'normal' ou 'aleatorio').
+        jogadores (int | np.ndarray): O jogador a jogar em cada posicao inicial (por omissao 'X').
+        max_jogadas (int): Limite de jogadas (os jogos por terminar contam como empate).
+        gerador (np.random.Generator | None): Gerador para a politica 'aleatorio'.
+
+    Returns:
+        tuple (np.ndarray, np.ndarray, np.ndarray): (ganhadores (N,), numero de jogadas (N,), lote final).
+    """
+    lote = _validar_lote(lote).copy()
+    jogadores = _validar_jogadores(jogadores, lote.shape[0]).copy()
+    jogadas = np.zeros(lote.shape[0], dtype=np.int32)
+
+    for _ in range(max_jogadas):
+        ativos = obter_ganhadores_lote(lote) == 0
+        if not ativos.any():
+            break
+        lote = avancar_lote(lote, jogadores, nivel_x, nivel_o, gerador)
+        jogadas += ativos
+        jogadores = np.where(ativos, -jogadores, jogadores).astype(np.int8)
+    return obter_ganhadores_lote(lote), jogadas, lote
@@ -0,0 +1,243 @@
+"""
+Monte Carlo Tree Search (UCT) para o Moinho 3x3 - nivel 'mcts' de obter_movimento_auto.
+- A forca depende do orcamento (iteracoes e/ou tempo), nao de uma profundidade fixa.
+- As folhas sao recolhidas em lotes e os rollouts de cada lote sao jogados de uma vez
+  com o motor vetorizado (lote.simular_jogos_lote), com a politica 'aleatorio' ou 'facil'/'normal'.
+- Com trabalhadores > 1 cada processo constroi a sua arvore (paralelizacao na raiz)
+  e as visitas dos filhos da raiz sao somadas no fim.
+Funcoes publicas:
+- procurar_mcts, configurar_mcts
+"""
+import atexit
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import lote
+from projeto_final import COLUNAS, LINHAS, cria_posicao, peca_para_inteiro
+# -------------------------------------------------------------------------------------------------
+# Configuracao (usada pelo nivel 'mcts' de obter_movimento_auto)
+# -------------------------------------------------------------------------------------------------
+CONFIGURACAO = {
+    'iteracoes': 3000,        # numero de folhas avaliadas (None para usar so o tempo)
+    'tempo': None,            # limite em segundos (None para usar so as iteracoes)
+    'trabalhadores': 1,       # processos com arvores independentes
+    'tamanho_lote': 64,       # folhas recolhidas antes de cada rollout vetorizado
+    'rollouts_por_folha': 4,  # jogos simulados por folha
+    'politica_rollout': 'aleatorio',
+    'max_jogadas_rollout': 40,
+    'exploracao': 1.4,
+    'semente': None,
+}
+
+ESTATISTICAS = {'iteracoes': 0, 'rollouts': 0}
+
+_POSICOES = tuple(cria_posicao(c, l) for l in LINHAS for c in COLUNAS)
+_EXECUTOR = None
+_EXECUTOR_TRABALHADORES = 0
+
+def configurar_mcts(**opcoes) -> dict:
+    """
+    Altera a configuracao por omissao do nivel 'mcts'.
+
+    Args:
+        **opcoes: Chaves de CONFIGURACAO a alterar (ex: iteracoes=10000, trabalhadores=4).
+
+    Returns:
+        dict: A configuracao resultante.
+
+    Raises:
+        ValueError: Se alguma opcao nao existir ou se a pesquisa ficar sem limite (iteracoes e tempo None).
+    """
+    for chave in opcoes:
+        if chave not in CONFIGURACAO:
+            raise ValueError(f'configurar_mcts: opcao invalida ({chave})')
+    if _sem_limite({**CONFIGURACAO, **opcoes}):
+        raise ValueError('configurar_mcts: iteracoes e tempo nao podem ser ambos None')
+    CONFIGURACAO.update(opcoes)
+    return dict(CONFIGURACAO)
+
+def _sem_limite(config: dict) -> bool:
+    """True se a configuracao nao limitar a pesquisa (nem iteracoes nem tempo)."""
+    return config['iteracoes'] is None and config['tempo'] is None
+
+# -------------------------------------------------------------------------------------------------
+# Arvore de pesquisa
+# -------------------------------------------------------------------------------------------------
+class _No:
+    """No da arvore: estado (9,) int8, jogador a jogar e estatisticas de quem jogou para aqui."""
+    __slots__ = ('estado', 'jogador', 'codigo', 'pai', 'filhos', 'por_expandir',
+                 'visitas', 'valor', 'ganhador')
+
+    def __init__(self, estado, jogador: int, codigo=None, pai=None):
+        self.estado = estado
+        self.jogador = jogador
+        self.codigo = codigo
+        self.pai = pai
+        self.filhos = []
+        self.por_expandir = None
+        self.visitas = 0
+        self.valor = 0.0
+        self.ganhador = int(lote.obter_ganhadores_lote(estado[None])[0])
+
+    def expandir_proximo(self):
+        """Cria o proximo filho ainda nao expandido (None se ja nao houver)."""
+        if self.por_expandir is None:
+            sucessores, _, origens, destinos = lote.sucessores_lote(self.estado[None], self.jogador)
+            codigos = zip(origens.tolist(), destinos.tolist())
+            self.por_expandir = list(zip(codigos, sucessores))[::-1]
+        if not self.por_expandir:
+            return None
+        codigo, estado = self.por_expandir.pop()
+        filho = _No(estado, -self.jogador, codigo, self)
+        self.filhos.append(filho)
+        return filho
+
+    def melhor_filho_uct(self, exploracao: float):
+        """Filho com maior valor UCT (valor medio + termo de exploracao)."""
+        log_pai = math.log(self.visitas)
+        return max(self.filhos,
+                   key=lambda f: f.valor / f.visitas + exploracao * math.sqrt(log_pai / f.visitas))
+
+def _selecionar(raiz: _No, exploracao: float) -> _No:
+    """Desce pela arvore (UCT) ate uma folha nova ou terminal, contando ja a visita no caminho."""
+    no = raiz
+    while no.ganhador == 0:
+        filho = no.expandir_proximo()
+        if filho is not None:
+            no = filho
+            break
+        if not no.filhos:
+            break
+        no = no.melhor_filho_uct(exploracao)
+    caminho = no
+    while caminho is not None:
+        caminho.visitas += 1
+        caminho = caminho.pai
+    return no
+
+def _retropropagar(folha: _No, ganhador: float) -> None:
+    """Soma o resultado (1 'X', -1 'O', 0 empate) na perspetiva de quem jogou para cada no."""
+    no = folha
+    while no is not None:
+        no.valor += ganhador * -no.jogador
+        no = no.pai
+
+def _procurar_arvore(estado, jogador: int, iteracoes, tempo, tamanho_lote: int, rollouts_por_folha: int,
+                     politica: str, max_jogadas: int, exploracao: float, semente) -> dict:
+    """
+    Constroi uma arvore UCT a partir de (estado, jogador) ate esgotar o orcamento.
+
+    Returns:
+        dict: {codigo (origem, destino): (visitas, valor)} dos filhos da raiz e contadores.
+    """
+    gerador = np.random.default_rng(semente)
+    raiz = _No(np.asarray(estado, dtype=np.int8), jogador)
+    limite = time.perf_counter() + tempo if tempo is not None else None
+    feitas, rollouts = 0, 0
+
+    while (iteracoes is None or feitas < iteracoes) and (limite is None or time.perf_counter() < limite):
+        por_fazer = tamanho_lote if iteracoes is None else min(tamanho_lote, iteracoes - feitas)
+        folhas = [_selecionar(raiz, exploracao) for _ in range(por_fazer)]
+        feitas += por_fazer
+
+        abertas = [f for f in folhas if f.ganhador == 0]
+        for f in folhas:
+            if f.ganhador != 0:
+                _retropropagar(f, f.ganhador)
+        if abertas:
+            estados = np.repeat(np.stack([f.estado for f in abertas]), rollouts_por_folha, axis=0)
+            jogadores = np.repeat([f.jogador for f in abertas], rollouts_por_folha).astype(np.int8)
+            ganhadores, _, _ = lote.simular_jogos_lote(estados, politica, politica, jogadores,
+                                                       max_jogadas, gerador)
+            medias = ganhadores.reshape(len(abertas), rollouts_por_folha).mean(axis=1)
+            for f, media in zip(abertas, medias.tolist()):
+                _retropropagar(f, media)
+            rollouts += estados.shape[0]
+
+    filhos = {f.codigo: (f.visitas, f.valor) for f in raiz.filhos}
+    return {'filhos': filhos, 'iteracoes': feitas, 'rollouts': rollouts}
+
+def _obter_executor(trabalhadores: int) -> ProcessPoolExecutor:
+    """Devolve (e reutiliza entre jogadas) o conjunto de processos trabalhadores."""
+    global _EXECUTOR, _EXECUTOR_TRABALHADORES
+    if _EXECUTOR is None or _EXECUTOR_TRABALHADORES != trabalhadores:
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown()
+        _EXECUTOR = ProcessPoolExecutor(max_workers=trabalhadores)
+        _EXECUTOR_TRABALHADORES = trabalhadores
+    return _EXECUTOR
+
+@atexit.register
+def _fechar_executor() -> None:
+    """Termina o conjunto de processos trabalhadores (a saida do programa)."""
+    global _EXECUTOR, _EXECUTOR_TRABALHADORES
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown()
+        _EXECUTOR, _EXECUTOR_TRABALHADORES = None, 0
+
+# -------------------------------------------------------------------------------------------------
+# Ponto de entrada
+# -------------------------------------------------------------------------------------------------
+def procurar_mcts(tabuleiro: list, jogador: str, **opcoes) -> tuple:
+    """
+    Escolhe um movimento por Monte Carlo Tree Search (UCT).
+    O movimento escolhido e o filho da raiz com mais visitas.
+
+    Args:
+        tabuleiro (list): O TAD tabuleiro.
+        jogador (str): O TAD peca do jogador a jogar.
+        **opcoes: Substituem, so nesta pesquisa, as chaves de CONFIGURACAO.
+
+    Returns:
+        tuple (float, tuple | None): (pontuacao na perspetiva de 'X', melhor_movimento),
+        como em _algoritmo_minimax.
+
+    Raises:
+        ValueError: Se alguma opcao nao existir ou se a pesquisa ficar sem limite (iteracoes e tempo None).
+    """
+    config = dict(CONFIGURACAO)
+    for chave, valor in opcoes.items():
+        if chave not in config:
+            raise ValueError(f'procurar_mcts: opcao invalida ({chave})')
+        config[chave] = valor
+    if _sem_limite(config):
+        raise ValueError('procurar_mcts: iteracoes e tempo nao podem ser ambos None')
+    trabalhadores = config['trabalhadores'] or os.cpu_count() or 1
+
+    estado = lote.tabuleiros_para_lote([tabuleiro])[0]
+    valor_jogador = peca_para_inteiro(jogador)
+    iteracoes = config['iteracoes']
+    argumentos = (config['tamanho_lote'], config['rollouts_por_folha'], config['politica_rollout'],
+                  config['max_jogadas_rollout'], config['exploracao'])
+
+    if trabalhadores == 1:
+        resultados = [_procurar_arvore(estado, valor_jogador, iteracoes, config['tempo'],
+                                       *argumentos, config['semente'])]
+    else:
+        sementes = np.random.SeedSequence(config['semente']).spawn(trabalhadores)
+        por_trabalhador = None if iteracoes is None else max(1, iteracoes // trabalhadores)
+        executor = _obter_executor(trabalhadores)
+        futuros = [executor.submit(_procurar_arvore, estado, valor_jogador, por_trabalhador,
+                                   config['tempo'], *argumentos, s) for s in sementes]
+        resultados = [f.result() for f in futuros]
+
+    # Junta as estatisticas dos filhos da raiz de todas as arvores
+    filhos = {}
+    for resultado in resultados:
+        for codigo, (visitas, valor) in resultado['filhos'].items():
+            v, s = filhos.get(codigo, (0, 0.0))
+            filhos[codigo] = (v + visitas, s + valor)
+    ESTATISTICAS['iteracoes'] = sum(r['iteracoes'] for r in resultados)
+    ESTATISTICAS['rollouts'] = sum(r['rollouts'] for r in resultados)
+
+    if not filhos:
+        return 0.0, None
+    (origem, destino), (visitas, valor) = max(filhos.items(), key=lambda item: item[1][0])
+    pontuacao = (valor / visitas) * valor_jogador
+    if origem == lote.COLOCACAO:
+        return pontuacao, (_POSICOES[destino],)
+    return pontuacao, (_POSICOES[origem], _POSICOES[destino])
@@ -0,0 +1,222 @@
+"""
+Enumeracao das posicoes alcancaveis do Moinho 3x3 e contagens 'perft' (linha de comandos).
+- Parte-se do tabuleiro vazio com 'X' a jogar: colocacao ate existirem 6 pecas e depois movimento
+  (com a jogada de passar quando o jogador esta bloqueado). Uma posicao com ganhador nao tem jogadas.
+- perft(n): numero de folhas (caminhos de jogo) a cada profundidade 1..n. Sem 'unicas' percorre-se a
+  arvore toda em profundidade, gerando as jogadas em cada no: e a medida da velocidade do gerador.
+  Com 'unicas', avanca-se uma profundidade de cada vez com uma contagem por posicao (chave do
+  tabuleiro * 2 + 1 se joga 'O'): as folhas sao as mesmas e conta-se tambem o numero de posicoes
+  diferentes em cada profundidade.
+- posicoes_alcancaveis(): gera, em largura, cada posicao alcancavel uma so vez (na menor profundidade).
+  A memoria e so o conjunto das chaves ja vistas (no maximo 2 * 3**9).
+- verificar_gerador(f): compara f(tabuleiro, jogador) com _gerar_movimentos_validos em todas as
+  posicoes alcancaveis da fase de movimento (oraculo para geradores otimizados). A linha de comandos
+  compara tambem _gerar_movimentos_validos com movimentos_por_regras (as regras, sem tabelas).
+Uso:
+  python3 perft.py 8                   # folhas por profundidade, tempo e nos por segundo
+  python3 perft.py 8 --confianca       # o mesmo, com o modo de confianca do motor
+  python3 perft.py 30 --unicas         # com o numero de posicoes diferentes
+  python3 perft.py --alcancaveis       # total de posicoes alcancaveis e verificacao do gerador
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+
+from projeto_final import (
+    CODIGO_COLOCACAO, cria_copia_tabuleiro, cria_tabuleiro, obter_ganhador, codigo_para_movimento,
+    obter_posicoes_jogador, obter_posicoes_adjacentes, eh_posicao_livre,
+    _esta_na_fase_colocacao, _executar_codigo, _gerar_codigos_validos, _gerar_movimentos_validos,
+    _chave_tabuleiro, _tabuleiro_da_chave, definir_modo_confianca,
+)
+# -------------------------------------------------------------------------------------------------
+# Jogadas
+# -------------------------------------------------------------------------------------------------
+def jogadas(tabuleiro: list, jogador: str) -> tuple:
+    """
+    Codigos das jogadas do jogador (colocacoes ou movimentos, pela ordem de leitura).
+
+    Args:
+        tabuleiro (list): O TAD tabuleiro.
+        jogador (str): O TAD peca do jogador ('X' ou 'O').
+
+    Returns:
+        tuple: Os codigos das jogadas; vazio se ja houver ganhador.
+    """
+    if obter_ganhador(tabuleiro) != ' ':
+        return ()
+    if _esta_na_fase_colocacao(tabuleiro):
+        return tuple(CODIGO_COLOCACAO + i for i in range(9) if tabuleiro[i // 3][i % 3] == ' ')
+    return tuple(_gerar_codigos_validos(tabuleiro, jogador))
+
+def sucessores(posicao: int) -> list:
+    """
+    Posicoes seguintes de uma posicao (chave do tabuleiro * 2 + 1 se joga 'O'), uma por jogada.
+
+    Args:
+        posicao (int): A posicao.
+
+    Returns:
+        list: As posicoes seguintes, pela ordem das jogadas (pode haver repetidas).
+    """
+    tabuleiro = _tabuleiro_da_chave(posicao >> 1)
+    jogador = 'O' if posicao & 1 else 'X'
+    seguinte = 0 if posicao & 1 else 1
+    return [_chave_tabuleiro(_executar_codigo(cria_copia_tabuleiro(tabuleiro), jogador, codigo)) * 2 + seguinte
+            for codigo in jogadas(tabuleiro, jogador)]
+
+# -------------------------------------------------------------------------------------------------
+# Perft
+# -------------------------------------------------------------------------------------------------
+def _folhas(tabuleiro: list, jogador: str, profundidade: int, contagens: list, nivel: int) -> None:
+    """Soma a contagens[nivel..] os nos da subarvore de 'tabuleiro' (percurso em profundidade)."""
+    if nivel == profundidade:
+        return
+    adversario = 'O' if jogador == 'X' else 'X'
+    for codigo in jogadas(tabuleiro, jogador):
+        contagens[nivel] += 1
+        _folhas(_executar_codigo(cria_copia_tabuleiro(tabuleiro), jogador, codigo), adversario,
+                profundidade, contagens, nivel + 1)
+
+def perft(profundidade: int, unicas: bool = False) -> list:
+    """
+    Conta as folhas a cada profundidade a partir do tabuleiro vazio.
+
+    Args:
+        profundidade (int): A profundidade maxima (numero de jogadas).
+        unicas (bool): Conta tambem as posicoes diferentes a cada profundidade (ver o topo do modulo).
+
+    Returns:
+        list: Um dicionario por profundidade 1..n com 'profundidade', 'folhas' e, com unicas, 'unicas'.
+
+    Raises:
+        ValueError: Se a profundidade for invalida.
+    """
+    if not (isinstance(profundidade, int) and profundidade >= 0):
+        raise ValueError('perft: profundidade invalida')
+    if not unicas:
+        contagens = [0] * profundidade
+        _folhas(cria_tabuleiro(), 'X', profundidade, contagens, 0)
+        return [{'profundidade': d + 1, 'folhas': n} for d, n in enumerate(contagens)]
+
+    resultado, transicoes, atuais = [], {}, Counter({0: 1})
+    for d in range(profundidade):
+        seguintes = Counter()
+        for posicao, caminhos in atuais.items():
+            if posicao not in transicoes:
+                transicoes[posicao] = sucessores(posicao)
+            for seguinte in transicoes[posicao]:
+                seguintes[seguinte] += caminhos
+        resultado.append({'profundidade': d + 1, 'folhas': sum(seguintes.values()), 'unicas': len(seguintes)})
+        atuais = seguintes
+    return resultado
+
+# -------------------------------------------------------------------------------------------------
+# Posicoes alcancaveis
+# -------------------------------------------------------------------------------------------------
+def posicoes_alcancaveis(profundidade_maxima=None):
+    """
+    Gera, em largura, todas as posicoes alcancaveis a partir do tabuleiro vazio, cada uma uma so vez.
+
+    Args:
+        profundidade_maxima (int | None): Ultima profundidade gerada (None para todas).
+
+    Yields:
+        tuple: (posicao, tabuleiro, jogador, profundidade), com a posicao como em sucessores
+            e a menor profundidade a que e alcancada.
+    """
+    vistas, atuais, profundidade = {0}, [0], 0
+    while atuais and (profundidade_maxima is None or profundidade <= profundidade_maxima):
+        seguintes = []
+        for posicao in atuais:
+            yield posicao, _tabuleiro_da_chave(posicao >> 1), 'O' if posicao & 1 else 'X', profundidade
+            for seguinte in sucessores(posicao):
+                if seguinte not in vistas:
+                    vistas.add(seguinte)
+                    seguintes.append(seguinte)
+        atuais, profundidade = seguintes, profundidade + 1
+
+def verificar_gerador(gerador, referencia=_gerar_movimentos_validos) -> dict:
+    """
+    Compara um gerador de movimentos com a referencia em todas as posicoes alcancaveis da fase de
+    movimento sem ganhador.
+
+    Args:
+        gerador (callable): Funcao (tabuleiro, jogador) -> tuplo de movimentos (tuplos de posicoes).
+        referencia (callable): O gerador de referencia.
+
+    Returns:
+        dict: {'posicoes', 'diferentes', 'exemplo'} com o numero de posicoes comparadas, o numero
+            de posicoes com resultados diferentes e a primeira delas (None se nenhuma).
+    """
+    contagens = {'posicoes': 0, 'diferentes': 0, 'exemplo': None}
+    for posicao, tabuleiro, jogador, _ in posicoes_alcancaveis():
+        if _esta_na_fase_colocacao(tabuleiro) or obter_ganhador(tabuleiro) != ' ':
+            continue
+        contagens['posicoes'] += 1
+        if tuple(gerador(tabuleiro, jogador)) != tuple(referencia(tabuleiro, jogador)):
+            contagens['diferentes'] += 1
+            if contagens['exemplo'] is None:
+                contagens['exemplo'] = posicao
+    return contagens
+
+def movimentos_por_regras(tabuleiro: list, jogador: str) -> tuple:
+    """Os movimentos legais calculados diretamente pelas regras (TADs), sem tabelas nem mascaras."""
+    proprias = obter_posicoes_jogador(tabuleiro, jogador)
+    movimentos = tuple((origem, destino) for origem in proprias
+                       for destino in obter_posicoes_adjacentes(origem) if eh_posicao_livre(tabuleiro, destino))
+    return movimentos or ((proprias[0], proprias[0]),)
+
+def _gerador_por_codigos(tabuleiro: list, jogador: str) -> tuple:
+    """_gerar_codigos_validos convertido em tuplos de movimento."""
+    return tuple(codigo_para_movimento(c) for c in _gerar_codigos_validos(tabuleiro, jogador))
+
+# -------------------------------------------------------------------------------------------------
+# Linha de comandos
+# -------------------------------------------------------------------------------------------------
+def main(argumentos=None) -> int:
+    """Ponto de entrada da linha de comandos."""
+    parser = argparse.ArgumentParser(description='Contagens perft e posicoes alcancaveis do Moinho 3x3.')
+    parser.add_argument('profundidade', type=int, nargs='?', default=10)
+    parser.add_argument('--unicas', action='store_true', help='conta tambem as posicoes diferentes')
+    parser.add_argument('--confianca', action='store_true', help='usa o modo de confianca do motor')
+    parser.add_argument('--alcancaveis', action='store_true',
+                        help='conta as posicoes alcancaveis e verifica os geradores de movimentos')
+    args = parser.parse_args(argumentos)
+    anterior = definir_modo_confianca(args.confianca)
+    try:
+        return _executar(args)
+    finally:
+        definir_modo_confianca(anterior)
+
+def _executar(args) -> int:
+    """Executa o pedido da linha de comandos (ver main)."""
+    if args.alcancaveis:
+        inicio = time.perf_counter()
+        por_profundidade = Counter(d for _, _, _, d in posicoes_alcancaveis())
+        print(f'{sum(por_profundidade.values())} posicoes alcancaveis (profundidade maxima '
+              f'{max(por_profundidade)}) em {time.perf_counter() - inicio:.2f}s')
+        diferentes = 0
+        for nome, gerador, referencia in (
+                ('_gerar_movimentos_validos', _gerar_movimentos_validos, movimentos_por_regras),
+                ('_gerar_codigos_validos', _gerador_por_codigos, _gerar_movimentos_validos)):
+            verificacao = verificar_gerador(gerador, referencia)
+            print(f"{nome}: {verificacao['posicoes']} posicoes, {verificacao['diferentes']} diferentes")
+            diferentes += verificacao['diferentes']
+        return 1 if diferentes else 0
+
+    inicio = time.perf_counter()
+    linhas = perft(args.profundidade, unicas=args.unicas)
+    segundos = time.perf_counter() - inicio
+    for linha in linhas:
+        extra = f"  {linha['unicas']:>8} unicas" if args.unicas else ''
+        print(f"{linha['profundidade']:>3} {linha['folhas']:>14}{extra}")
+    nos = sum(linha['folhas'] for linha in linhas)
+    if args.unicas:
+        print(f'{segundos:.2f}s')
+    else:
+        print(f'{nos} nos em {segundos:.2f}s ({nos / segundos if segundos else 0:.0f} nos/s)')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
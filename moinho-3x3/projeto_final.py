@@ -17,6 +17,9 @@ TADs e funcoes publicas:
   tuplo_para_tabuleiro, obter_ganhador, obter_posicoes_livres,
   obter_posicoes_jogador
 - Jogo: obter_movimento_manual (I/O), obter_movimento_auto (AI), moinho (principal)
+- Sessao sem I/O: SessaoJogo (movimentos_legais, jogar, movimento_ia, resultado)
+- Modo de confianca: definir_modo_confianca (o motor deixa de validar os TADs que ele proprio gera)
+- Movimentos codificados (inteiros 0..89): movimento_para_codigo, codigo_para_movimento
 Mensagens obrigatorias:
 - Erros:
   'cria_posicao: argumentos invalidos'
@@ -29,6 +32,8 @@ Mensagens obrigatorias:
   'Turno do computador (<nivel>):'
 - Notas de IA:
   - Na fase de movimento, usa-se Minimax com filtragem de ramos alpha-beta.
+  - O nivel 'mcts' usa Monte Carlo Tree Search (modulo mcts) com orcamento configuravel.
+  - O nivel 'aprendido' consulta uma tabela de valores treinada por auto-jogo (modulo aprendizagem).
 """
 import sys
 # -------------------------------------------------------------------------------------------------
@@ -43,6 +48,10 @@ ERRO_POSICAO = 'cria_posicao: argumentos invalidos'
 ERRO_PECA = 'cria_peca: argumento invalido'
 ERRO_JOGADA_MANUAL = 'obter_movimento_manual: escolha invalida'
 ERRO_JOGO = 'moinho: argumentos invalidos'
+ERRO_SESSAO_JOGADA = 'SessaoJogo.jogar: jogada invalida'
+
+# --- Niveis de dificuldade ---
+NIVEIS = ('facil', 'normal', 'dificil', 'mcts', 'aprendido')
 
 # --- Representacao ASCII ---
 CABECALHO = '   a   b   c'
@@ -533,12 +542,181 @@ def move_peca(tabuleiro: list, p_origem: tuple, p_destino: tuple) -> list:
     coloca_peca(tabuleiro, peca_jogador, p_destino)
     return tabuleiro
 
-def _existe_alinhamento_vencedor(tabuleiro: list, jogador: str) -> bool:
-    """Verifica se um jogador tem uma linha vitoriosa (horizontal ou vertical)."""
-    for (a, b, c) in LINHAS_VENCEDORAS:
-        if tabuleiro[a[0]][a[1]] == jogador and tabuleiro[b[0]][b[1]] == jogador and tabuleiro[c[0]][c[1]] == jogador:
-            return True
-    return False
+# -------------------------------------------------------------------------------------------------
+# Camada interna sem validacao (modo de confianca)
+# -------------------------------------------------------------------------------------------------
+# Com o modo de confianca ativo, os caminhos internos do motor (Minimax, IA facil, geracao de
+# posicoes e SessaoJogo.movimento_ia) usam as funcoes abaixo, que assumem argumentos validos:
+# posicoes geradas pelo proprio motor e movimentos legais. As funcoes publicas validam sempre.
+_MODO_CONFIANCA = False
+
+# Posicoes pela ordem de leitura, com os indices (linha, coluna) e as adjacentes de cada uma
+_POSICOES_LEITURA = tuple(cria_posicao(c, l) for l in LINHAS for c in COLUNAS)
+_INDICES_POSICOES = {posicao: divmod(i, 3) for i, posicao in enumerate(_POSICOES_LEITURA)}
+_ADJACENTES_POSICOES = {posicao: obter_posicoes_adjacentes(posicao) for posicao in _POSICOES_LEITURA}
+
+def definir_modo_confianca(ativo: bool) -> bool:
+    """
+    Ativa (ou desativa) o modo de confianca: o motor deixa de validar os TADs que ele proprio gera.
+    As jogadas escolhidas sao exatamente as mesmas; as funcoes publicas mantem as validacoes e os erros.
+
+    Args:
+        ativo (bool): True para usar a camada interna sem validacao.
+
+    Returns:
+        bool: O modo que estava ativo.
+    """
+    global _MODO_CONFIANCA
+    anterior = _MODO_CONFIANCA
+    _MODO_CONFIANCA = bool(ativo)
+    return anterior
+
+def _peca_sem_validar(tabuleiro: list, posicao: tuple) -> str:
+    """obter_peca para uma posicao valida."""
+    lin_idx, col_idx = _INDICES_POSICOES[posicao]
+    return tabuleiro[lin_idx][col_idx]
+
+def _colocar_sem_validar(tabuleiro: list, peca_jogador: str, posicao: tuple) -> list:
+    """coloca_peca sem verificacoes (peca 'X' ou 'O' e posicao valida e livre)."""
+    lin_idx, col_idx = _INDICES_POSICOES[posicao]
+    tabuleiro[lin_idx][col_idx] = peca_jogador
+    return tabuleiro
+
+def _mover_sem_validar(tabuleiro: list, p_origem: tuple, p_destino: tuple) -> list:
+    """move_peca sem verificacoes (origem ocupada, destino livre e adjacente)."""
+    lin_origem, col_origem = _INDICES_POSICOES[p_origem]
+    lin_destino, col_destino = _INDICES_POSICOES[p_destino]
+    tabuleiro[lin_destino][col_destino] = tabuleiro[lin_origem][col_origem]
+    tabuleiro[lin_origem][col_origem] = ' '
+    return tabuleiro
+
+# -------------------------------------------------------------------------------------------------
+# Codificacao inteira dos movimentos
+# -------------------------------------------------------------------------------------------------
+# Dentro do motor (geracao, ordenacao e Minimax, tabela de transposicao, tabelas.py e registos.py)
+# um movimento e um inteiro: origem * 9 + destino (0..80, casas pela ordem de leitura; origem == destino
+# e passar) ou CODIGO_COLOCACAO + destino para uma colocacao (81..89). Os tuplos de movimento so
+# aparecem na fronteira, com movimento_para_codigo e codigo_para_movimento.
+CODIGO_COLOCACAO = 81
+NUM_CODIGOS = CODIGO_COLOCACAO + 9
+
+# Tuplo de movimento de cada codigo e codigo de cada tuplo
+_MOVIMENTOS_CODIGOS = (tuple(cria_movimento(origem, destino) for origem in _POSICOES_LEITURA for destino in _POSICOES_LEITURA)
+                       + tuple(cria_mov_colocacao(posicao) for posicao in _POSICOES_LEITURA))
+_CODIGOS_MOVIMENTOS = {movimento: codigo for codigo, movimento in enumerate(_MOVIMENTOS_CODIGOS)}
+
+def movimento_para_codigo(movimento: tuple) -> int:
+    """
+    Converte um tuplo de movimento (colocacao, movimento ou passar) no seu codigo inteiro.
+
+    Args:
+        movimento (tuple): O tuplo de movimento (1 ou 2 TADs posicao).
+
+    Returns:
+        int: O codigo (0 <= codigo < NUM_CODIGOS).
+
+    Raises:
+        ValueError: Se o argumento nao for um movimento.
+    """
+    try:
+        codigo = _CODIGOS_MOVIMENTOS.get(movimento)
+    except TypeError:
+        codigo = None
+    if codigo is None:
+        raise ValueError('movimento_para_codigo: movimento invalido')
+    return codigo
+
+def codigo_para_movimento(codigo: int) -> tuple:
+    """
+    Operacao inversa de movimento_para_codigo.
+
+    Args:
+        codigo (int): O codigo (0 <= codigo < NUM_CODIGOS).
+
+    Returns:
+        tuple: O tuplo de movimento.
+
+    Raises:
+        ValueError: Se o codigo for invalido.
+    """
+    if not (isinstance(codigo, int) and 0 <= codigo < NUM_CODIGOS):
+        raise ValueError('codigo_para_movimento: codigo invalido')
+    return _MOVIMENTOS_CODIGOS[codigo]
+
+def _codigo_eh_passar(codigo: int) -> bool:
+    """True se o codigo for uma jogada de passar (origem * 9 + origem = 10 * origem)."""
+    return codigo < CODIGO_COLOCACAO and codigo % 10 == 0
+
+def _executar_codigo(tabuleiro: list, jogador: str, codigo: int) -> list:
+    """
+    Aplica um movimento codificado ao tabuleiro (como _executar_movimento, mas o tipo vem do codigo).
+    Modifica destrutivamente o tabuleiro.
+
+    Args:
+        tabuleiro (list): O TAD tabuleiro.
+        jogador (str): O TAD peca do jogador.
+        codigo (int): O codigo do movimento.
+
+    Returns:
+        list: O proprio tabuleiro, modificado.
+    """
+    if _MODO_CONFIANCA:
+        if codigo >= CODIGO_COLOCACAO:
+            lin_idx, col_idx = divmod(codigo - CODIGO_COLOCACAO, 3)
+            tabuleiro[lin_idx][col_idx] = jogador
+        elif codigo % 10:  # nao e passar
+            origem, destino = divmod(codigo, 9)
+            lin_origem, col_origem = divmod(origem, 3)
+            lin_destino, col_destino = divmod(destino, 3)
+            tabuleiro[lin_destino][col_destino] = tabuleiro[lin_origem][col_origem]
+            tabuleiro[lin_origem][col_origem] = ' '
+        return tabuleiro
+    movimento = _MOVIMENTOS_CODIGOS[codigo]
+    if eh_colocacao(movimento):
+        coloca_peca(tabuleiro, jogador, movimento[0])
+    elif not eh_passar(movimento):
+        move_peca(tabuleiro, movimento[0], movimento[1])
+    return tabuleiro
+
+# --- Mascaras de ocupacao (o bit i e a casa i pela ordem de leitura) ---
+_BITS_POSICOES = {cria_posicao(c, l): 1 << (3 * i + j) for i, l in enumerate(LINHAS) for j, c in enumerate(COLUNAS)}
+_POSICOES_BITS = {bit: posicao for posicao, bit in _BITS_POSICOES.items()}
+_MASCARAS_LINHAS = tuple(sum(1 << (3 * l + c) for (l, c) in linha) for linha in LINHAS_VENCEDORAS)
+_MASCARA_CHEIA = (1 << 9) - 1
+
+# Tabelas de 512 entradas, indexadas pela mascara das pecas de um jogador
+_NUM_PECAS = tuple(bin(m).count('1') for m in range(1 << 9))
+_TEM_LINHA = tuple(any(m & linha == linha for linha in _MASCARAS_LINHAS) for m in range(1 << 9))
+_LINHAS_AMEACADAS = tuple(tuple(linha for linha in _MASCARAS_LINHAS if _NUM_PECAS[m & linha] == 2)
+                          for m in range(1 << 9))  # linhas com 2 das 3 casas
+_CASAS_VENCEDORAS = tuple(sum({linha & ~m for linha in _LINHAS_AMEACADAS[m]}) for m in range(1 << 9))
+
+# Mascaras ja calculadas, pelo conteudo do tabuleiro (no maximo 3**9 entradas)
+_MASCARAS_TABULEIROS = {}
+
+def _calcular_mascaras(tabuleiro: list):
+    """(mascara de 'X', mascara de 'O') do tabuleiro, ou None se alguma casa nao for um TAD peca."""
+    mascara_x = mascara_o = 0
+    bit = 1
+    for linha in tabuleiro:
+        for peca in linha:
+            if peca == 'X':
+                mascara_x |= bit
+            elif peca == 'O':
+                mascara_o |= bit
+            elif peca != ' ':
+                return None
+            bit <<= 1
+    return mascara_x, mascara_o
+
+def _mascaras(tabuleiro: list) -> tuple:
+    """(mascara de 'X', mascara de 'O') de um TAD tabuleiro, com cache pelo conteudo."""
+    chave = (*tabuleiro[0], *tabuleiro[1], *tabuleiro[2])
+    mascaras = _MASCARAS_TABULEIROS.get(chave)
+    if mascaras is None:
+        mascaras = _calcular_mascaras(tabuleiro)
+        _MASCARAS_TABULEIROS[chave] = mascaras
+    return mascaras
 
 def eh_tabuleiro(arg) -> bool:
     """
@@ -553,16 +731,13 @@ def eh_tabuleiro(arg) -> bool:
     """
     if not (isinstance(arg, list) and len(arg) == 3 and all(isinstance(l, list) and len(l) == 3 for l in arg)):
         return False
-    pecas = [pos for linha in arg for pos in linha]
-    if not all(eh_peca(pos) for pos in pecas):
+    mascaras = _calcular_mascaras(arg)
+    if mascaras is None:
         return False
-    x = pecas.count('X')
-    o = pecas.count('O')
+    x, o = _NUM_PECAS[mascaras[0]], _NUM_PECAS[mascaras[1]]
     if x > 3 or o > 3 or abs(x - o) > 1:
         return False
-    if _existe_alinhamento_vencedor(arg, 'X') and _existe_alinhamento_vencedor(arg, 'O'):
-        return False
-    return True
+    return not (_TEM_LINHA[mascaras[0]] and _TEM_LINHA[mascaras[1]])
 
 def eh_posicao_livre(tabuleiro: list, posicao: tuple) -> bool:
     """
@@ -592,9 +767,13 @@ def tabuleiros_iguais(tabuleiro_1, tabuleiro_2) -> bool:
         return False
     return all(tabuleiro_1[r][c] == tabuleiro_2[r][c] for r in range(3) for c in range(3))
 
+# Desenhos ja calculados, pelo conteudo do tabuleiro (no maximo 3**9 entradas)
+_DESENHOS = {}
+
 def tabuleiro_para_str(tabuleiro: list) -> str:
     """
     Transformador: Converte o TAD tabuleiro para a sua representacao externa.
+    Cada desenho e calculado uma unica vez e guardado em _DESENHOS.
 
     Args:
         tabuleiro (list): O TAD tabuleiro.
@@ -602,11 +781,16 @@ def tabuleiro_para_str(tabuleiro: list) -> str:
     Returns:
         str: A representacao em string do tabuleiro, com varias linhas.
     """
+    chave = (*tabuleiro[0], *tabuleiro[1], *tabuleiro[2])
+    desenho = _DESENHOS.get(chave)
+    if desenho is None:
+        def linha_str(i: int) -> str:
+            return f"{LINHAS[i]} " + "-".join(peca_para_str(tabuleiro[i][j]) for j in range(3))
 
-    def linha_str(i: int) -> str:
-        return f"{LINHAS[i]} " + "-".join(peca_para_str(tabuleiro[i][j]) for j in range(3))
-
-    return "\n".join([CABECALHO, linha_str(0), CONEXAO_1, linha_str(1), CONEXAO_2, linha_str(2)])
+        desenho = "\n".join([CABECALHO, linha_str(0), CONEXAO_1, linha_str(1), CONEXAO_2, linha_str(2)])
+        if len(_DESENHOS) < 3 ** 9:
+            _DESENHOS[chave] = desenho
+    return desenho
 
 def tuplo_para_tabuleiro(tuplo_3x3: tuple) -> list:
     """
@@ -641,6 +825,44 @@ def tuplo_para_tabuleiro(tuplo_3x3: tuple) -> list:
             tabuleiro[r][c] = jogador
     return tabuleiro
 
+def _chave_tabuleiro(tabuleiro: list) -> int:
+    """
+    Devolve a chave compacta (rank em base 3) do tabuleiro, entre 0 e 3**9 - 1.
+    A casa i (ordem de leitura) vale 3**i vezes 0 (' '), 1 ('X') ou 2 ('O').
+
+    Args:
+        tabuleiro (list): O TAD tabuleiro.
+
+    Returns:
+        int: A chave do tabuleiro.
+    """
+    chave = 0
+    for linha in reversed(tabuleiro):
+        for peca in reversed(linha):
+            chave = chave * 3 + (1 if peca == 'X' else (2 if peca == 'O' else 0))
+    return chave
+
+def _tabuleiro_da_chave(chave: int) -> list:
+    """
+    Operacao inversa de _chave_tabuleiro: reconstroi o TAD tabuleiro a partir da chave.
+
+    Args:
+        chave (int): A chave (0 <= chave < 3**9).
+
+    Returns:
+        list: O TAD tabuleiro correspondente.
+
+    Raises:
+        ValueError: Se a chave estiver fora do intervalo.
+    """
+    if not (isinstance(chave, int) and 0 <= chave < 3 ** 9):
+        raise ValueError('_tabuleiro_da_chave: chave invalida')
+    tabuleiro = cria_tabuleiro()
+    for i in range(9):
+        chave, digito = divmod(chave, 3)
+        tabuleiro[i // 3][i % 3] = ' XO'[digito]
+    return tabuleiro
+
 def obter_ganhador(tabuleiro: list) -> str:
     """
     Funcao de alto nivel: Verifica se ha um ganhador no tabuleiro.
@@ -651,9 +873,13 @@ def obter_ganhador(tabuleiro: list) -> str:
     Returns:
         str: O TAD peca do ganhador ('X' ou 'O'), ou ' ' se nao houver ganhador.
     """
-    if _existe_alinhamento_vencedor(tabuleiro, 'X'):
+    mascaras = _mascaras(tabuleiro)
+    if mascaras is None:  # casa que nao e um TAD peca: contam so as linhas de 'X' ou de 'O'
+        mascaras = _calcular_mascaras([[p if p in ('X', 'O') else ' ' for p in linha] for linha in tabuleiro])
+    mascara_x, mascara_o = mascaras
+    if _TEM_LINHA[mascara_x]:
         return 'X'
-    if _existe_alinhamento_vencedor(tabuleiro, 'O'):
+    if _TEM_LINHA[mascara_o]:
         return 'O'
     return ' '
 
@@ -676,6 +902,8 @@ def obter_posicoes_livres(tabuleiro: list) -> tuple:
     Returns:
         tuple: Um tuplo de TADs posicao livres.
     """
+    if _MODO_CONFIANCA:
+        return tuple(p for p in _POSICOES_LEITURA if _peca_sem_validar(tabuleiro, p) == ' ')
     return tuple(posicao_atual for posicao_atual in _iterador_posicoes_leitura() if eh_posicao_livre(tabuleiro, posicao_atual))
 
 def obter_posicoes_jogador(tabuleiro: list, jogador: str) -> tuple:
@@ -689,10 +917,15 @@ def obter_posicoes_jogador(tabuleiro: list, jogador: str) -> tuple:
     Returns:
         tuple: Um tuplo de TADs posicao ocupadas.
     """
+    if _MODO_CONFIANCA:
+        return tuple(p for p in _POSICOES_LEITURA if _peca_sem_validar(tabuleiro, p) == jogador)
     return tuple(posicao_atual for posicao_atual in _iterador_posicoes_leitura() if obter_peca(tabuleiro, posicao_atual) == jogador)
 
 def _contar_pecas_total(tabuleiro: list) -> int:
     """Conta o numero total de pecas ('X' e 'O') no tabuleiro."""
+    if _MODO_CONFIANCA:
+        mascara_x, mascara_o = _mascaras(tabuleiro)
+        return _NUM_PECAS[mascara_x | mascara_o]
     return sum(1 for _ in _iterador_posicoes_leitura() if obter_peca(tabuleiro, _) != ' ')
 
 def _esta_na_fase_colocacao(tabuleiro: list) -> bool:
@@ -709,6 +942,8 @@ def _esta_na_fase_colocacao(tabuleiro: list) -> bool:
 
 def _posicoes_adjacentes_livres(tabuleiro: list, posicao: tuple) -> tuple:
     """Devolve um tuplo de posicoes adjacentes a 'posicao' que estao livres."""
+    if _MODO_CONFIANCA:
+        return tuple(p for p in _ADJACENTES_POSICOES[posicao] if _peca_sem_validar(tabuleiro, p) == ' ')
     return tuple(p for p in obter_posicoes_adjacentes(posicao) if eh_posicao_livre(tabuleiro, p))
 
 def _gerar_movimentos_validos(tabuleiro: list, jogador: str) -> tuple:
@@ -724,6 +959,14 @@ def _gerar_movimentos_validos(tabuleiro: list, jogador: str) -> tuple:
     Returns:
         tuple: Um tuplo de movimentos validos (cada movimento e um tuplo de 2 posicoes).
     """
+    if jogador in ('X', 'O'):
+        # A lista de _gerar_codigos_validos, ja convertida em tuplos (tambem numa tabela)
+        tabela = _TABELA_MOVIMENTOS if _TABELA_MOVIMENTOS is not None else _carregar_tabela_movimentos()
+        mascara_x, mascara_o = _mascaras(tabuleiro)
+        if jogador == 'X':
+            return tabela[_TERNARIO[mascara_x] + 2 * _TERNARIO[mascara_o]]
+        return tabela[_TERNARIO[mascara_o] + 2 * _TERNARIO[mascara_x]]
+
     jogadas = []
     for posicao_atual in obter_posicoes_jogador(tabuleiro, jogador):
         for adj in _posicoes_adjacentes_livres(tabuleiro, posicao_atual):
@@ -734,6 +977,69 @@ def _gerar_movimentos_validos(tabuleiro: list, jogador: str) -> tuple:
             jogadas.append((posicoes_do_jogador[0], posicoes_do_jogador[0]))  # passar
     return tuple(jogadas)
 
+def _gerar_codigos_validos(tabuleiro: list, jogador: str) -> bytes:
+    """
+    Os movimentos de _gerar_movimentos_validos, pela mesma ordem, como codigos (ver movimento_para_codigo).
+
+    Args:
+        tabuleiro (list): O TAD tabuleiro.
+        jogador (str): O TAD peca do jogador ('X' ou 'O').
+
+    Returns:
+        bytes: Os codigos dos movimentos validos.
+    """
+    # Uma consulta a tabela de movimentos legais, pelo par de mascaras (proprias, adversario)
+    tabela = _TABELA_CODIGOS if _TABELA_CODIGOS is not None else _carregar_tabela_codigos()
+    mascara_x, mascara_o = _mascaras(tabuleiro)
+    if jogador == 'X':
+        return tabela[_TERNARIO[mascara_x] + 2 * _TERNARIO[mascara_o]]
+    return tabela[_TERNARIO[mascara_o] + 2 * _TERNARIO[mascara_x]]
+
+# Tabelas de movimentos legais (codigos e os mesmos movimentos em tuplos), calculadas na primeira
+# utilizacao (tabelas.py guarda uma copia em disco, mas o motor nao depende dela)
+_TABELA_CODIGOS = None
+_TABELA_MOVIMENTOS = None
+# Indice em base 3 das casas de uma mascara (casa i vale 3**i)
+_TERNARIO = tuple(sum(3 ** i for i in range(9) if m >> i & 1) for m in range(1 << 9))
+
+def _construir_tabela_codigos() -> list:
+    """
+    Calcula os codigos dos movimentos legais para todos os pares de mascaras.
+    O indice e em base 3 (casa i vale 3**i vezes 1 se for propria, 2 se for do adversario); os
+    movimentos seguem a ordem de leitura das origens e depois a dos destinos (a de
+    obter_posicoes_adjacentes). Sem movimentos, a jogada e passar com a primeira peca.
+
+    Returns:
+        list: Os bytes de codigos de cada indice (3**9 entradas).
+    """
+    adjacentes = tuple(tuple(_POSICOES_LEITURA.index(p) for p in _ADJACENTES_POSICOES[posicao])
+                       for posicao in _POSICOES_LEITURA)
+    tabela = []
+    for indice in range(3 ** 9):
+        digitos = []
+        for _ in range(9):
+            indice, digito = divmod(indice, 3)
+            digitos.append(digito)
+        codigos = bytearray(origem * 9 + destino for origem in range(9) if digitos[origem] == 1
+                            for destino in adjacentes[origem] if digitos[destino] == 0)
+        if not codigos and 1 in digitos:
+            codigos.append(digitos.index(1) * 10)  # passar: origem == destino
+        tabela.append(bytes(codigos))
+    return tabela
+
+def _carregar_tabela_codigos() -> list:
+    """Calcula a tabela de codigos de movimentos legais usada por _gerar_codigos_validos."""
+    global _TABELA_CODIGOS
+    _TABELA_CODIGOS = _construir_tabela_codigos()
+    return _TABELA_CODIGOS
+
+def _carregar_tabela_movimentos() -> list:
+    """Converte a tabela de codigos na tabela de tuplos usada por _gerar_movimentos_validos."""
+    global _TABELA_MOVIMENTOS
+    tabela = _TABELA_CODIGOS if _TABELA_CODIGOS is not None else _carregar_tabela_codigos()
+    _TABELA_MOVIMENTOS = [tuple(_MOVIMENTOS_CODIGOS[c] for c in codigos) for codigos in tabela]
+    return _TABELA_MOVIMENTOS
+
 # -----------------------------------------------------------------------------------------------
 # (3) Regra de "passar"
 # -----------------------------------------------------------------------------------------------
@@ -766,28 +1072,22 @@ def jogada_valida(tabuleiro: list, jogador: str, p_origem: tuple, p_destino: tup
 # -------------------------------------------------------------------------------------------------
 # I/O: obter_movimento_manual
 # -------------------------------------------------------------------------------------------------
-def obter_movimento_manual(tabuleiro: list, jogador: str) -> tuple:
+def _interpretar_movimento_manual(tabuleiro: list, jogador: str, entrada: str) -> tuple:
     """
-    Funcao de I/O. Pede ao utilizador humano uma jogada (colocacao ou movimento)
-    e valida-a.
-
-    Mostra "Turno do jogador. Escolha uma posicao: " ou
-    "Turno do jogador. Escolha um movimento: ".
+    Converte e valida a jogada escrita pelo utilizador (sem I/O).
 
     Args:
         tabuleiro (list): O TAD tabuleiro.
         jogador (str): O TAD peca do jogador humano.
+        entrada (str): A jogada escrita ('a1' na colocacao, 'a1a2' no movimento).
 
     Returns:
         tuple: Um tuplo de movimento (1 posicao para colocacao, 2 para movimento).
 
     Raises:
-        ValueError: Se a jogada introduzida for invalida (ERRO_JOGADA_MANUAL).
+        ValueError: Se a jogada for invalida (ERRO_JOGADA_MANUAL).
     """
     if _esta_na_fase_colocacao(tabuleiro):
-        sys.stdout.write('Turno do jogador. Escolha uma posicao: ')
-        sys.stdout.flush()
-        entrada = sys.stdin.readline().strip()
         try:
             pos = str_para_posicao(entrada)
         except ValueError:
@@ -796,9 +1096,6 @@ def obter_movimento_manual(tabuleiro: list, jogador: str) -> tuple:
             return (pos,)
         raise ValueError(ERRO_JOGADA_MANUAL)
 
-    sys.stdout.write('Turno do jogador. Escolha um movimento: ')
-    sys.stdout.flush()
-    entrada = sys.stdin.readline().strip()
     try:
         p_origem, p_destino = str_para_movimento(entrada)
     except ValueError:
@@ -807,6 +1104,32 @@ def obter_movimento_manual(tabuleiro: list, jogador: str) -> tuple:
         return p_origem, p_destino
     raise ValueError(ERRO_JOGADA_MANUAL)
 
+def obter_movimento_manual(tabuleiro: list, jogador: str) -> tuple:
+    """
+    Funcao de I/O. Pede ao utilizador humano uma jogada (colocacao ou movimento)
+    e valida-a.
+
+    Mostra "Turno do jogador. Escolha uma posicao: " ou
+    "Turno do jogador. Escolha um movimento: ".
+
+    Args:
+        tabuleiro (list): O TAD tabuleiro.
+        jogador (str): O TAD peca do jogador humano.
+
+    Returns:
+        tuple: Um tuplo de movimento (1 posicao para colocacao, 2 para movimento).
+
+    Raises:
+        ValueError: Se a jogada introduzida for invalida (ERRO_JOGADA_MANUAL).
+    """
+    if _esta_na_fase_colocacao(tabuleiro):
+        sys.stdout.write('Turno do jogador. Escolha uma posicao: ')
+    else:
+        sys.stdout.write('Turno do jogador. Escolha um movimento: ')
+    sys.stdout.flush()
+    entrada = sys.stdin.readline().strip()
+    return _interpretar_movimento_manual(tabuleiro, jogador, entrada)
+
 # -------------------------------------------------------------------------------------------------
 # AI: colocacao
 # -------------------------------------------------------------------------------------------------
@@ -823,12 +1146,16 @@ def _obter_posicoes_laterais() -> tuple:
 def _encontrar_vitoria_colocacao(tabuleiro: list, jogador: str):
     """Encontra a primeira posicao livre (ordem de leitura) que resulta
     em vitoria imediata para o 'jogador'."""
-    for posicao_atual in obter_posicoes_livres(tabuleiro):
-        tabuleiro_simulado = cria_copia_tabuleiro(tabuleiro)
-        coloca_peca(tabuleiro_simulado, jogador, posicao_atual)
-        if obter_ganhador(tabuleiro_simulado) == jogador:
-            return posicao_atual
-    return None
+    mascara_x, mascara_o = _mascaras(tabuleiro)
+    if jogador == 'X':
+        proprias = mascara_x
+    elif jogador == 'O' and not _TEM_LINHA[mascara_x]:  # obter_ganhador da prioridade a 'X'
+        proprias = mascara_o
+    else:
+        return None
+    livres = _MASCARA_CHEIA & ~(mascara_x | mascara_o)
+    casas = livres if _TEM_LINHA[proprias] else _CASAS_VENCEDORAS[proprias] & livres
+    return _POSICOES_BITS[casas & -casas] if casas else None
 
 def _encontrar_bloqueio_colocacao(tabuleiro: list, jogador: str):
     """Encontra a primeira posicao livre que bloqueia uma vitoria
@@ -891,10 +1218,16 @@ def _calcular_movimento_facil(tabuleiro: list, jogador: str) -> tuple:
     Returns:
         tuple: Um tuplo de movimento (de 2 elementos).
     """
-    for posicao_atual in obter_posicoes_jogador(tabuleiro, jogador):
-        for adj in obter_posicoes_adjacentes(posicao_atual):
-            if eh_posicao_livre(tabuleiro, adj):
-                return posicao_atual, adj
+    if _MODO_CONFIANCA:
+        for posicao_atual in obter_posicoes_jogador(tabuleiro, jogador):
+            for adj in _ADJACENTES_POSICOES[posicao_atual]:
+                if _peca_sem_validar(tabuleiro, adj) == ' ':
+                    return posicao_atual, adj
+    else:
+        for posicao_atual in obter_posicoes_jogador(tabuleiro, jogador):
+            for adj in obter_posicoes_adjacentes(posicao_atual):
+                if eh_posicao_livre(tabuleiro, adj):
+                    return posicao_atual, adj
     # Se bloqueado, passa (primeira peca)
     posicoes_do_jogador = obter_posicoes_jogador(tabuleiro, jogador)
     return (posicoes_do_jogador[0], posicoes_do_jogador[0]) if posicoes_do_jogador else (cria_posicao('a', '1'),cria_posicao('a', '1'))
@@ -910,27 +1243,56 @@ def _encontrar_vitoria_movimento(tabuleiro: list, jogador: str):
     Returns:
         tuple: O movimento vitorioso (origem, destino), ou None se nao existir.
     """
+    mascara_x, mascara_o = _mascaras(tabuleiro)
+    if jogador == 'O' and _TEM_LINHA[mascara_x]:  # obter_ganhador da prioridade a 'X'
+        return None
+    proprias = mascara_x if jogador == 'X' else mascara_o
     for (pos_origem, pos_destino) in _gerar_movimentos_validos(tabuleiro, jogador):
         if posicoes_iguais(pos_origem, pos_destino):
             continue
-        tabuleiro_simulado = cria_copia_tabuleiro(tabuleiro)
-        move_peca(tabuleiro_simulado, pos_origem, pos_destino)
-        if obter_ganhador(tabuleiro_simulado) == jogador:
+        if _TEM_LINHA[proprias & ~_BITS_POSICOES[pos_origem] | _BITS_POSICOES[pos_destino]]:
             return pos_origem, pos_destino
     return None
 
+# Cache de jogadas opcional (ver cache_movimentos.py); None desativa
+_CACHE_MOVIMENTOS = None
+
+def definir_cache_movimentos(cache):
+    """
+    Ativa (ou desativa, com None) a cache consultada por obter_movimento_auto.
+    A cache tem de oferecer obter(tabuleiro, jogador, nivel) e calcular as jogadas em falta
+    com _calcular_movimento_auto.
+
+    Args:
+        cache (CacheMovimentos | None): A cache a usar.
+
+    Returns:
+        CacheMovimentos | None: A cache que estava ativa.
+    """
+    global _CACHE_MOVIMENTOS
+    anterior = _CACHE_MOVIMENTOS
+    _CACHE_MOVIMENTOS = cache
+    return anterior
+
 def obter_movimento_auto(tabuleiro: list, jogador: str, nivel: str) -> tuple:
     """
     Funcao principal da IA. Escolhe um movimento (colocacao ou movimento) com base no nivel de dificuldade.
+    Se houver uma cache ativa (definir_cache_movimentos), a jogada vem da cache.
 
     Args:
         tabuleiro (list): O TAD tabuleiro.
         jogador (str): O TAD peca do jogador (IA).
-        nivel (str): A dificuldade ('facil', 'normal', 'dificil').
+        nivel (str): A dificuldade ('facil', 'normal', 'dificil', 'mcts', 'aprendido').
 
     Returns:
         tuple: O tuplo de movimento escolhido.
     """
+    if _CACHE_MOVIMENTOS is not None:
+        return _CACHE_MOVIMENTOS.obter(tabuleiro, jogador, nivel)
+    return _calcular_movimento_auto(tabuleiro, jogador, nivel)
+
+def _calcular_movimento_auto(tabuleiro: list, jogador: str, nivel: str) -> tuple:
+    """Calcula a jogada da IA para obter_movimento_auto (sem cache)."""
     # Fase de Colocacao (logica e a mesma para todos os niveis)
     if _esta_na_fase_colocacao(tabuleiro):
         return _escolher_colocacao_ia(tabuleiro, jogador)
@@ -951,11 +1313,79 @@ def obter_movimento_auto(tabuleiro: list, jogador: str, nivel: str) -> tuple:
         # 4. Fallback (se minimax falhar)
         return movimento if movimento else _calcular_movimento_facil(tabuleiro, jogador)
 
+    if nivel == 'mcts':
+        # 5. Monte Carlo Tree Search (orcamento em mcts.CONFIGURACAO)
+        from mcts import procurar_mcts
+        _, movimento = procurar_mcts(tabuleiro, jogador)
+        return movimento if movimento else _calcular_movimento_facil(tabuleiro, jogador)
+
+    if nivel == 'aprendido':
+        # 6. Antevisao de 1 jogada com a tabela de valores (aprendizagem.CAMINHO_POR_OMISSAO)
+        from aprendizagem import escolher_movimento_aprendido
+        return escolher_movimento_aprendido(tabuleiro, jogador)
+
     raise ValueError("obter_movimento_auto: nivel invalido")
 
 # -------------------------------------------------------------------------------------------------
 # Minimax (fase de movimento) com filtragem de ramos alpha-beta
 # -------------------------------------------------------------------------------------------------
+# Contadores da ultima pesquisa (repostos por quem os consulta)
+_ESTATISTICAS_PESQUISA = {'nos': 0}
+
+# Condicao de paragem opcional (ver protocolo.py): funcao sem argumentos; None desativa
+_PARAGEM_PESQUISA = None
+
+class PesquisaInterrompida(Exception):
+    """Lancada pelo Minimax quando a condicao de paragem definida pede o fim da pesquisa."""
+
+def definir_paragem_pesquisa(funcao):
+    """
+    Ativa (ou desativa, com None) a condicao de paragem do Minimax.
+    A funcao e chamada em cada no; se devolver True, a pesquisa termina com PesquisaInterrompida
+    (a tabela de transposicao so guarda nos completamente pesquisados).
+
+    Args:
+        funcao (callable | None): Funcao sem argumentos que devolve True para parar.
+
+    Returns:
+        callable | None: A funcao que estava ativa.
+    """
+    global _PARAGEM_PESQUISA
+    anterior = _PARAGEM_PESQUISA
+    _PARAGEM_PESQUISA = funcao
+    return anterior
+
+# Tabela de transposicao opcional (ver transposicao.py); None desativa
+_TABELA_TRANSPOSICAO = None
+_TT_EXATO, _TT_INFERIOR, _TT_SUPERIOR = 0, 1, 2
+_TT_SEM_MOVIMENTO = 127
+
+def definir_tabela_transposicao(tabela):
+    """
+    Ativa (ou desativa, com None) a tabela de transposicao usada pelo Minimax.
+    A tabela tem de oferecer procurar(chave, profundidade) e guardar(chave, profundidade, valor, limite, movimento).
+
+    Args:
+        tabela (TabelaTransposicao | None): A tabela a usar.
+
+    Returns:
+        TabelaTransposicao | None: A tabela que estava ativa.
+    """
+    global _TABELA_TRANSPOSICAO
+    anterior = _TABELA_TRANSPOSICAO
+    _TABELA_TRANSPOSICAO = tabela
+    return anterior
+
+def _guardar_na_tabela(tabela, chave: int, profundidade: int, valor: int, alfa: int, beta: int, movimento) -> None:
+    """Guarda o resultado de um no, com o tipo de limite dado pela janela (alfa, beta) inicial."""
+    if valor <= alfa:
+        limite = _TT_SUPERIOR
+    elif valor >= beta:
+        limite = _TT_INFERIOR
+    else:
+        limite = _TT_EXATO
+    tabela.guardar(chave, profundidade, valor, limite, _TT_SEM_MOVIMENTO if movimento is None else movimento)
+
 def _avaliar_estado_terminal(tabuleiro: list) -> int:
     """
     Avalia um estado final do tabuleiro para o Minimax.
@@ -974,31 +1404,37 @@ def _avaliar_estado_terminal(tabuleiro: list) -> int:
         return -1
     return 0
 
-def _ordenar_movimentos_minimax(tabuleiro: list, jogador: str, movimentos: tuple) -> tuple:
+# Para cada codigo de movimento (0..80): a mascara sem a casa de origem e a mascara da casa de destino
+_SEM_ORIGEM = tuple(_MASCARA_CHEIA & ~(1 << (codigo // 9)) for codigo in range(CODIGO_COLOCACAO))
+_COM_DESTINO = tuple(1 << (codigo % 9) for codigo in range(CODIGO_COLOCACAO))
+
+def _ordenar_movimentos_minimax(tabuleiro: list, jogador: str, movimentos) -> tuple:
     """
-    Ordena uma lista de movimentos, priorizando vitorias imediatas.
+    Ordena uma lista de movimentos codificados, priorizando vitorias imediatas.
     Isto otimiza drasticamente os cortes alpha-beta.
 
     Args:
         tabuleiro (list): O TAD tabuleiro.
         jogador (str): O jogador a mover.
-        movimentos (tuple): O tuplo de movimentos validos a ordenar.
+        movimentos (bytes): Os codigos dos movimentos validos a ordenar.
 
     Returns:
-        tuple: O tuplo de movimentos ordenado.
+        tuple: Os codigos ordenados.
     """
+    mascara_x, mascara_o = _mascaras(tabuleiro)
+    proprias = mascara_x if jogador == 'X' else mascara_o
+    if not (jogador == 'X' or (jogador == 'O' and not _TEM_LINHA[mascara_x])):
+        return tuple(movimentos)
     ganhos, restantes = [], []
-    for (pos_origem, pos_destino) in movimentos:
-        tabuleiro_simulado = cria_copia_tabuleiro(tabuleiro)
-        if not posicoes_iguais(pos_origem, pos_destino):
-            move_peca(tabuleiro_simulado, pos_origem, pos_destino)
-        if obter_ganhador(tabuleiro_simulado) == jogador:
-            ganhos.append((pos_origem, pos_destino))
+    for codigo in movimentos:
+        if _TEM_LINHA[proprias & _SEM_ORIGEM[codigo] | _COM_DESTINO[codigo]]:
+            ganhos.append(codigo)
         else:
-            restantes.append((pos_origem, pos_destino))
+            restantes.append(codigo)
     return tuple(ganhos + restantes)
 
-def _minimax_recursivo(tabuleiro: list, jogador: str, profundidade_restante: int, alfa: int, beta: int) -> tuple:
+def _minimax_recursivo(tabuleiro: list, jogador: str, profundidade_restante: int, alfa: int, beta: int,
+                       raiz: bool = False) -> tuple:
     """
     Funcao recursiva principal do Minimax com cortes alpha-beta.
 
@@ -1008,58 +1444,75 @@ def _minimax_recursivo(tabuleiro: list, jogador: str, profundidade_restante: int
         profundidade_restante (int): A profundidade restante da pesquisa.
         alfa (int): O melhor valor encontrado ate agora para o maximizador (X).
         beta (int): O pior valor encontrado ate agora para o minimizador (O).
+        raiz (bool): True na chamada inicial (que nunca termina por um corte da tabela de transposicao).
 
     Returns:
-        tuple (int, tuple | None): (pontuacao, melhor_movimento)
+        tuple (int, int | None): (pontuacao, codigo do melhor movimento)
     """
 
+    _ESTATISTICAS_PESQUISA['nos'] += 1
+    if _PARAGEM_PESQUISA is not None and _PARAGEM_PESQUISA():
+        raise PesquisaInterrompida()
+
     # 1. Condicao de paragem (estado terminal ou profundidade maxima)
     ganhador = obter_ganhador(tabuleiro)
     if ganhador != ' ' or profundidade_restante == 0:
         return _avaliar_estado_terminal(tabuleiro), None
 
-    # 2. Obter movimentos (e ordena-los para otimizar)
-    movimentos = _gerar_movimentos_validos(tabuleiro, jogador)
+    # 2. Obter movimentos codificados (e ordena-los para otimizar)
+    movimentos = _gerar_codigos_validos(tabuleiro, jogador)
     if not movimentos:
         # Sem movimentos, jogo empatado ou bloqueado
         return _avaliar_estado_terminal(tabuleiro), None
 
+    # 2.1 Tabela de transposicao (a mesma posicao, jogador e profundidade ja foram pesquisados)
+    tabela = _TABELA_TRANSPOSICAO
+    if tabela is not None:
+        chave = _chave_tabuleiro(tabuleiro) * 2 + (jogador == 'O')
+        entrada = None if raiz else tabela.procurar(chave, profundidade_restante)
+        if entrada is not None:
+            valor, limite, _ = entrada
+            if (limite == _TT_EXATO or (limite == _TT_INFERIOR and valor >= beta)
+                    or (limite == _TT_SUPERIOR and valor <= alfa)):
+                return valor, None
+        alfa_inicial, beta_inicial = alfa, beta
+
     movimentos = _ordenar_movimentos_minimax(tabuleiro, jogador, movimentos)
 
     # 3. Logica MAX (Jogador 'X')
     if jogador == 'X':
         melhor_resultado, melhor_movimento = -10, None
-        for (pos_origem, pos_destino) in movimentos:
-            tabuleiro_simulado = cria_copia_tabuleiro(tabuleiro)
-            if not posicoes_iguais(pos_origem, pos_destino):
-                move_peca(tabuleiro_simulado, pos_origem, pos_destino)
+        for codigo in movimentos:
+            tabuleiro_simulado = _executar_codigo(cria_copia_tabuleiro(tabuleiro), jogador, codigo)
 
             # Chamada recursiva para o MIN
             resultado, _ = _minimax_recursivo(tabuleiro_simulado, outro_jogador(jogador), profundidade_restante - 1, alfa, beta)
 
             if resultado > melhor_resultado:
-                melhor_resultado, melhor_movimento = resultado, (pos_origem, pos_destino)
+                melhor_resultado, melhor_movimento = resultado, codigo
             alfa = max(alfa, resultado)
             if alfa >= beta:
                 break  # Corte Beta
+        if tabela is not None:
+            _guardar_na_tabela(tabela, chave, profundidade_restante, melhor_resultado, alfa_inicial, beta_inicial, melhor_movimento)
         return melhor_resultado, melhor_movimento
 
     # 4. Logica MIN (Jogador 'O')
     else:
         melhor_resultado, melhor_movimento = 10, None
-        for (pos_origem, pos_destino) in movimentos:
-            tabuleiro_simulado = cria_copia_tabuleiro(tabuleiro)
-            if not posicoes_iguais(pos_origem, pos_destino):
-                move_peca(tabuleiro_simulado, pos_origem, pos_destino)
+        for codigo in movimentos:
+            tabuleiro_simulado = _executar_codigo(cria_copia_tabuleiro(tabuleiro), jogador, codigo)
 
             # Chamada recursiva para o MAX
             resultado, _ = _minimax_recursivo(tabuleiro_simulado, outro_jogador(jogador), profundidade_restante - 1, alfa, beta)
 
             if resultado < melhor_resultado:
-                melhor_resultado, melhor_movimento = resultado, (pos_origem, pos_destino)
+                melhor_resultado, melhor_movimento = resultado, codigo
             beta = min(beta, resultado)
             if alfa >= beta:
                 break  # Corte Alpha
+        if tabela is not None:
+            _guardar_na_tabela(tabela, chave, profundidade_restante, melhor_resultado, alfa_inicial, beta_inicial, melhor_movimento)
         return melhor_resultado, melhor_movimento
 
 def _algoritmo_minimax(tabuleiro: list, jogador_atual: str, max_depth: int = 5) -> tuple:
@@ -1074,7 +1527,8 @@ def _algoritmo_minimax(tabuleiro: list, jogador_atual: str, max_depth: int = 5)
     Returns:
         tuple (int, tuple | None): (pontuacao, melhor_movimento)
     """
-    return _minimax_recursivo(tabuleiro, jogador_atual, max_depth, -10, 10)
+    pontuacao, codigo = _minimax_recursivo(tabuleiro, jogador_atual, max_depth, -10, 10, raiz=True)
+    return pontuacao, None if codigo is None else _MOVIMENTOS_CODIGOS[codigo]
 
 # -------------------------------------------------------------------------------------------------
 # Funcoes de aplicacao e ciclo do jogo
@@ -1092,6 +1546,12 @@ def _executar_movimento(tabuleiro: list, jogador: str, movimento: tuple) -> list
     Returns:
         list: O proprio tabuleiro, modificado.
     """
+    if _MODO_CONFIANCA:
+        if _esta_na_fase_colocacao(tabuleiro):
+            _colocar_sem_validar(tabuleiro, jogador, movimento[0])
+        elif movimento[0] != movimento[1]:
+            _mover_sem_validar(tabuleiro, movimento[0], movimento[1])
+        return tabuleiro
     if _esta_na_fase_colocacao(tabuleiro):
         coloca_peca(tabuleiro, jogador, movimento[0])
     else:
@@ -1101,7 +1561,185 @@ def _executar_movimento(tabuleiro: list, jogador: str, movimento: tuple) -> list
             move_peca(tabuleiro, movimento[0], movimento[1])
     return tabuleiro
 
-def moinho(jogador: str, nivel: str) -> str:
+# -------------------------------------------------------------------------------------------------
+# Sessao de jogo (estado sem I/O)
+# -------------------------------------------------------------------------------------------------
+def _nivel_disponivel(nivel: str) -> bool:
+    """Indica se o nivel pode jogar: 'aprendido' precisa da tabela de valores (aprendizagem.py)."""
+    if nivel != 'aprendido':
+        return True
+    from aprendizagem import tabela_disponivel
+    return tabela_disponivel()
+
+class SessaoJogo:
+    """
+    Estado completo de um jogo Humano vs Computador, sem qualquer I/O:
+    tabuleiro, turno, peca do humano, nivel, numero de jogadas e historico de jogadas.
+    A fase deriva do tabuleiro (colocacao enquanto houver menos de 6 pecas).
+    O historico so tem as jogadas feitas neste objeto (ver codificacao.descodificar_sessao).
+    """
+    __slots__ = ('tabuleiro', 'turno', 'humano', 'nivel', 'jogadas', 'historico')
+
+    def __init__(self, jogador: str = '[X]', nivel: str = 'facil', tabuleiro=None, turno: str = 'X'):
+        """
+        Cria uma sessao nova ou retoma uma posicao.
+
+        Args:
+            jogador (str): A peca do jogador humano ('[X]' ou '[O]').
+            nivel (str): O nivel de dificuldade do computador (ver NIVEIS).
+            tabuleiro (list | None): Tabuleiro inicial (copiado); None para um tabuleiro vazio.
+            turno (str): O jogador a jogar ('X' comeca sempre num jogo novo).
+
+        Raises:
+            ValueError: Se os argumentos forem invalidos (ERRO_JOGO).
+        """
+        if not (
+                isinstance(jogador, str) and jogador in ('[X]', '[O]') and
+                isinstance(nivel, str) and nivel in NIVEIS and turno in ('X', 'O')):
+            raise ValueError(ERRO_JOGO)
+        if not _nivel_disponivel(nivel):
+            raise ValueError(ERRO_JOGO)
+        if tabuleiro is not None and not eh_tabuleiro(tabuleiro):
+            raise ValueError(ERRO_JOGO)
+        self.tabuleiro = cria_tabuleiro() if tabuleiro is None else cria_copia_tabuleiro(tabuleiro)
+        self.turno = turno
+        self.humano = 'X' if jogador == '[X]' else 'O'
+        self.nivel = nivel
+        self.jogadas = 0
+        self.historico = []
+
+    @property
+    def cpu(self) -> str:
+        """A peca do computador."""
+        return outro_jogador(self.humano)
+
+    def fase_colocacao(self) -> bool:
+        """True se o jogo estiver na fase de colocacao."""
+        return _esta_na_fase_colocacao(self.tabuleiro)
+
+    def movimentos_legais(self) -> tuple:
+        """
+        Devolve as jogadas legais do jogador com o turno, pela ordem de leitura.
+
+        Returns:
+            tuple: Movimentos de colocacao (1 posicao) ou de movimento (2 posicoes); vazio se o jogo acabou.
+        """
+        if self.terminado():
+            return ()
+        if self.fase_colocacao():
+            return tuple(cria_mov_colocacao(p) for p in obter_posicoes_livres(self.tabuleiro))
+        return _gerar_movimentos_validos(self.tabuleiro, self.turno)
+
+    def jogar(self, movimento: tuple) -> tuple:
+        """
+        Aplica uma jogada do jogador com o turno e passa o turno ao adversario.
+
+        Args:
+            movimento (tuple): O tuplo de movimento (1 ou 2 posicoes).
+
+        Returns:
+            tuple: O movimento aplicado.
+
+        Raises:
+            ValueError: Se o jogo tiver acabado ou a jogada for invalida (ERRO_SESSAO_JOGADA).
+        """
+        if self.terminado() or not isinstance(movimento, tuple):
+            raise ValueError(ERRO_SESSAO_JOGADA)
+        if self.fase_colocacao():
+            valida = eh_colocacao(movimento) and eh_posicao(movimento[0]) and eh_posicao_livre(self.tabuleiro, movimento[0])
+        else:
+            valida = len(movimento) == 2 and jogada_valida(self.tabuleiro, self.turno, movimento[0], movimento[1])
+        if not valida:
+            raise ValueError(ERRO_SESSAO_JOGADA)
+        return self._aplicar(movimento)
+
+    def _aplicar(self, movimento: tuple) -> tuple:
+        """Aplica uma jogada ja validada e passa o turno ao adversario."""
+        _executar_movimento(self.tabuleiro, self.turno, movimento)
+        self.historico.append((self.turno, movimento))
+        self.jogadas += 1
+        self.turno = outro_jogador(self.turno)
+        return movimento
+
+    def movimento_ia(self, nivel=None) -> tuple:
+        """
+        Calcula e aplica a jogada do computador para o jogador com o turno.
+
+        Args:
+            nivel (str | None): O nivel a usar (por omissao, o nivel da sessao).
+
+        Returns:
+            tuple: O movimento aplicado.
+        """
+        movimento = obter_movimento_auto(self.tabuleiro, self.turno, nivel or self.nivel)
+        if _MODO_CONFIANCA and not self.terminado():
+            return self._aplicar(movimento)  # a jogada da IA e legal por construcao
+        return self.jogar(movimento)
+
+    def resultado(self) -> str:
+        """O TAD peca do ganhador ('X' ou 'O'), ou ' ' se o jogo ainda nao acabou."""
+        return obter_ganhador(self.tabuleiro)
+
+    def terminado(self) -> bool:
+        """True se ja houver um ganhador."""
+        return obter_ganhador(self.tabuleiro) != ' '
+
+# -------------------------------------------------------------------------------------------------
+# Saidas do jogo
+# -------------------------------------------------------------------------------------------------
+class SaidaJogo:
+    """Saida do moinho: escreve cada linha logo em sys.stdout (como print)."""
+    __slots__ = ()
+
+    def escrever(self, texto: str) -> None:
+        """Escreve uma linha (o texto seguido de uma mudanca de linha)."""
+        sys.stdout.write(texto + '\n')
+
+    def escrever_tabuleiro(self, tabuleiro: list) -> None:
+        """Escreve o desenho do tabuleiro."""
+        self.escrever(tabuleiro_para_str(tabuleiro))
+
+    def despejar(self) -> None:
+        """Garante que tudo o que foi escrito ja saiu (antes de pedir uma jogada)."""
+
+class SaidaBufferizada(SaidaJogo):
+    """Saida que junta as linhas e as escreve de uma so vez (ao despejar ou ao passar 'limite' caracteres)."""
+    __slots__ = ('destino', 'limite', '_partes', '_tamanho')
+
+    def __init__(self, destino=None, limite: int = 1 << 16):
+        """
+        Args:
+            destino (file | None): Ficheiro de texto de destino (None para o sys.stdout de cada despejo).
+            limite (int): Caracteres acumulados a partir dos quais se despeja.
+        """
+        self.destino = destino
+        self.limite = limite
+        self._partes = []
+        self._tamanho = 0
+
+    def escrever(self, texto: str) -> None:
+        self._partes.append(texto)
+        self._tamanho += len(texto) + 1
+        if self._tamanho >= self.limite:
+            self.despejar()
+
+    def despejar(self) -> None:
+        if self._partes:
+            self._partes.append('')
+            (self.destino or sys.stdout).write('\n'.join(self._partes))
+            self._partes, self._tamanho = [], 0
+
+class SaidaSilenciosa(SaidaJogo):
+    """Saida que descarta tudo, sem desenhar os tabuleiros."""
+    __slots__ = ()
+
+    def escrever(self, texto: str) -> None:
+        pass
+
+    def escrever_tabuleiro(self, tabuleiro: list) -> None:
+        pass
+
+def moinho(jogador: str, nivel: str, saida: SaidaJogo = None) -> str:
     """
     Funcao principal do jogo.
     Executa um jogo completo do Moinho (Humano vs Computador).
@@ -1111,7 +1749,9 @@ def moinho(jogador: str, nivel: str) -> str:
 
     Args:
         jogador (str): A peca do jogador humano ('[X]' ou '[O]').
-        nivel (str): O nivel de dificuldade ('facil', 'normal', 'dificil').
+        nivel (str): O nivel de dificuldade ('facil', 'normal', 'dificil', 'mcts', 'aprendido').
+        saida (SaidaJogo | None): Para onde vao as mensagens e os tabuleiros (None escreve logo em
+            sys.stdout). O pedido de jogada de obter_movimento_manual nao passa pela saida.
 
     Returns:
         str: A representacao string da peca ganhadora ('[X]' ou '[O]').
@@ -1121,29 +1761,25 @@ def moinho(jogador: str, nivel: str) -> str:
     """
     if not (
             isinstance(jogador, str) and jogador in ('[X]', '[O]') and
-            isinstance(nivel, str) and nivel in ('facil', 'normal', 'dificil')):
+            isinstance(nivel, str) and nivel in NIVEIS and _nivel_disponivel(nivel)):
         raise ValueError(ERRO_JOGO)
 
-    humano = 'X' if jogador == '[X]' else 'O'
-    cpu = outro_jogador(humano)
+    sessao = SessaoJogo(jogador, nivel)  # 'X' comeca sempre
+    saida = SaidaJogo() if saida is None else saida
 
-    print(f'Bem-vindo ao JOGO DO MOINHO. Nivel de dificuldade {nivel}.')
-    tabuleiro = cria_tabuleiro()
-    print(tabuleiro_para_str(tabuleiro))
-
-    turno = 'X'  # 'X' comeca sempre
-    while obter_ganhador(tabuleiro) == ' ':
-        if turno == humano:
-            movimento = obter_movimento_manual(tabuleiro, humano)
-            _executar_movimento(tabuleiro, humano, movimento)
-            print(tabuleiro_para_str(tabuleiro))
-        else:
-            print(f'Turno do computador ({nivel}):')
-            movimento = obter_movimento_auto(tabuleiro, cpu, nivel)
-            _executar_movimento(tabuleiro, cpu, movimento)
-            print(tabuleiro_para_str(tabuleiro))
+    saida.escrever(f'Bem-vindo ao JOGO DO MOINHO. Nivel de dificuldade {nivel}.')
+    saida.escrever_tabuleiro(sessao.tabuleiro)
 
-        # Proximo turno
-        turno = outro_jogador(turno)
+    try:
+        while not sessao.terminado():
+            if sessao.turno == sessao.humano:
+                saida.despejar()
+                sessao.jogar(obter_movimento_manual(sessao.tabuleiro, sessao.humano))
+            else:
+                saida.escrever(f'Turno do computador ({nivel}):')
+                sessao.movimento_ia()
+            saida.escrever_tabuleiro(sessao.tabuleiro)
+    finally:
+        saida.despejar()
 
-    return peca_para_str(obter_ganhador(tabuleiro))
\ No newline at end of file
+    return peca_para_str(sessao.resultado())
\ No newline at end of file
@@ -0,0 +1,338 @@
+"""
+Protocolo de texto ao estilo UCI (stdin/stdout) para o Moinho 3x3, para interfaces graficas
+e torneios automaticos entre motores.
+- A pesquisa e um Minimax por aprofundamento iterativo (profundidade 1, 2, ...) com limites de
+  profundidade, tempo e nos; envia uma linha 'info' por iteracao completa.
+- A pesquisa corre numa thread, para que 'stop', 'ponderhit' e 'isready' sejam atendidos
+  enquanto o motor pensa. Os outros comandos esperam pelo fim da pesquisa em curso, pelo que
+  podem ser enviados em sequencia (pipeline) sem esperar pelas respostas.
+- Na fase de colocacao a jogada vem das regras de _escolher_colocacao_ia (como em todos os niveis).
+Comandos:
+  uci | isready | ucinewgame | quit
+  setoption name Hash value <entradas>          (tabela de transposicao; 0 desliga)
+  position startpos [moves a1 b2 ... a1a2 ...]
+  position board <9 casas, 'X' 'O' '.'> <X|O> [moves ...]
+  go [depth N] [movetime MS] [nodes N] [infinite] [ponder]   (sem limites: depth 5)
+  stop | ponderhit
+Respostas:
+  id name ... | uciok | readyok
+  info depth D score cp S nodes N nps N time MS pv a1a2 ...   (S na perspetiva de quem joga)
+  bestmove a1a2 [ponder b1b2] | bestmove (none)
+Uso:
+  python3 protocolo.py
+"""
+import sys
+import threading
+import time
+
+from projeto_final import (
+    SessaoJogo, obter_ganhador, posicao_para_str, str_para_posicao, str_para_movimento,
+    cria_copia_tabuleiro, tuplo_para_tabuleiro, PesquisaInterrompida, definir_paragem_pesquisa,
+    definir_tabela_transposicao, _esta_na_fase_colocacao, _escolher_colocacao_ia,
+    _calcular_movimento_facil, _algoritmo_minimax, _executar_movimento, _ESTATISTICAS_PESQUISA,
+)
+# -------------------------------------------------------------------------------------------------
+# Constantes
+# -------------------------------------------------------------------------------------------------
+NOME = 'Moinho 3x3'
+MAX_PROFUNDIDADE = 63         # limite das entradas da tabela de transposicao (6 bits)
+ENTRADAS_TABELA = 1 << 16
+PROFUNDIDADE_POR_OMISSAO = 5  # 'go' sem limites pesquisa como o nivel 'dificil'
+_INTERVALO_RELOGIO = 256      # nos entre consultas ao relogio
+
+def _movimento_para_str(movimento: tuple) -> str:
+    """Representacao externa de um movimento ('a1' ou 'a1a2'), como no input manual."""
+    return ''.join(posicao_para_str(p) for p in movimento)
+
+def _str_para_jogada(entrada: str) -> tuple:
+    """Operacao inversa de _movimento_para_str (ValueError se for invalida)."""
+    return (str_para_posicao(entrada),) if len(entrada) == 2 else str_para_movimento(entrada)
+
+# -------------------------------------------------------------------------------------------------
+# Pesquisa por aprofundamento iterativo
+# -------------------------------------------------------------------------------------------------
+def _variante_principal(tabuleiro: list, jogador: str, profundidade: int, primeiro: tuple) -> list:
+    """Reconstroi a variante principal repetindo a pesquisa, jogada a jogada, com menos profundidade."""
+    variante = [primeiro]
+    tabuleiro = _executar_movimento(cria_copia_tabuleiro(tabuleiro), jogador, primeiro)
+    for restante in range(profundidade - 1, 0, -1):
+        jogador = 'O' if jogador == 'X' else 'X'
+        if obter_ganhador(tabuleiro) != ' ':
+            break
+        _, movimento = _algoritmo_minimax(tabuleiro, jogador, max_depth=restante)
+        if movimento is None:
+            break
+        variante.append(movimento)
+        _executar_movimento(tabuleiro, jogador, movimento)
+    return variante
+
+def pesquisar(tabuleiro: list, jogador: str, profundidade=None, informar=None) -> tuple:
+    """
+    Minimax por aprofundamento iterativo (fase de movimento).
+    Termina ao chegar a 'profundidade', ao encontrar uma vitoria ou derrota forcada, ou quando a
+    condicao de paragem (definir_paragem_pesquisa) interrompe uma iteracao; nesse caso fica o
+    resultado da ultima iteracao completa.
+
+    Args:
+        tabuleiro (list): O TAD tabuleiro.
+        jogador (str): O TAD peca do jogador a jogar.
+        profundidade (int | None): Profundidade maxima (None: ate MAX_PROFUNDIDADE).
+        informar (callable | None): Chamada em cada iteracao com (profundidade, pontuacao, variante).
+
+    Returns:
+        tuple (int, list, int): (pontuacao na perspetiva de 'X', variante principal, profundidade completa).
+    """
+    limite = min(profundidade or MAX_PROFUNDIDADE, MAX_PROFUNDIDADE)
+    pontuacao, variante, completa = 0, [], 0
+    for atual in range(1, limite + 1):
+        try:
+            valor, movimento = _algoritmo_minimax(tabuleiro, jogador, max_depth=atual)
+            if movimento is None:
+                break
+            nova = _variante_principal(tabuleiro, jogador, atual, movimento)
+        except PesquisaInterrompida:
+            break
+        pontuacao, variante, completa = valor, nova, atual
+        if informar is not None:
+            informar(atual, pontuacao, variante)
+        if pontuacao != 0:  # vitoria ou derrota forcada: mais profundidade nao muda o valor
+            break
+    return pontuacao, variante, completa
+
+# -------------------------------------------------------------------------------------------------
+# Motor
+# -------------------------------------------------------------------------------------------------
+class Motor:
+    """
+    Estado do motor do protocolo: posicao atual, opcoes e pesquisa em curso.
+    'escrever' recebe cada linha de resposta (por omissao, stdout).
+    """
+    __slots__ = ('escrever', 'tabuleiro', 'jogador', 'tabela', 'entradas_tabela', '_thread',
+                 '_parar', '_ponder', '_limites', '_completa', '_inicio', '_trinco')
+
+    def __init__(self, escrever=None):
+        self.escrever = escrever or self._escrever_stdout
+        self.tabuleiro = SessaoJogo().tabuleiro
+        self.jogador = 'X'
+        self.tabela = None
+        self.entradas_tabela = ENTRADAS_TABELA
+        self._thread = None
+        self._parar = threading.Event()
+        self._ponder = threading.Event()
+        self._limites = {}
+        self._completa = 0  # ultima profundidade completa da pesquisa em curso
+        self._inicio = 0.0
+        self._trinco = threading.Lock()
+
+    @staticmethod
+    def _escrever_stdout(linha: str) -> None:
+        sys.stdout.write(linha + '\n')
+        sys.stdout.flush()
+
+    def _responder(self, linha: str) -> None:
+        """Escreve uma linha de resposta (as threads de pesquisa e de leitura partilham a saida)."""
+        with self._trinco:
+            self.escrever(linha)
+
+    def tratar(self, linha: str) -> bool:
+        """
+        Executa um comando.
+
+        Args:
+            linha (str): A linha recebida.
+
+        Returns:
+            bool: False se o comando foi 'quit'.
+        """
+        partes = linha.split()
+        if not partes:
+            return True
+        comando, argumentos = partes[0], partes[1:]
+
+        # Atendidos mesmo durante a pesquisa
+        if comando == 'isready':
+            self._responder('readyok')
+            return True
+        if comando == 'stop':
+            self._ponder.clear()
+            self._parar.set()
+            return True
+        if comando == 'ponderhit':  # os limites de tempo e de nos contam a partir daqui
+            _ESTATISTICAS_PESQUISA['nos'] = 0
+            self._inicio = time.perf_counter()
+            self._ponder.clear()
+            return True
+        if comando == 'quit':
+            self._ponder.clear()
+            self._parar.set()
+            self.esperar()
+            self._libertar_tabela()
+            return False
+
+        self.esperar()
+        if comando == 'uci':
+            self._responder(f'id name {NOME}')
+            self._responder(f'option name Hash type spin default {ENTRADAS_TABELA} min 0 max {1 << 24}')
+            self._responder('uciok')
+        elif comando == 'ucinewgame':
+            if self.tabela is not None:
+                self.tabela.limpar()
+        elif comando == 'setoption':
+            self._definir_opcao(argumentos)
+        elif comando == 'position':
+            self._definir_posicao(argumentos)
+        elif comando == 'go':
+            self._comecar(argumentos)
+        else:
+            self._responder(f'info string comando desconhecido: {comando}')
+        return True
+
+    def esperar(self) -> None:
+        """Espera pelo fim da pesquisa em curso (se houver)."""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # --- Comandos ---
+    def _definir_opcao(self, argumentos: list) -> None:
+        """setoption name <nome> value <valor>"""
+        if len(argumentos) == 4 and argumentos[0] == 'name' and argumentos[2] == 'value' \
+                and argumentos[1].lower() == 'hash' and argumentos[3].isdigit():
+            self._libertar_tabela()
+            self.entradas_tabela = int(argumentos[3])
+        else:
+            self._responder('info string opcao invalida')
+
+    def _definir_posicao(self, argumentos: list) -> None:
+        """position startpos|board <casas> <turno> [moves ...]"""
+        try:
+            if argumentos[:1] == ['startpos']:
+                sessao, resto = SessaoJogo(), argumentos[1:]
+            elif argumentos[:1] == ['board'] and len(argumentos) >= 3 and len(argumentos[1]) == 9:
+                valores = {'X': 1, 'O': -1, '.': 0}
+                casas = [valores[c] for c in argumentos[1]]
+                tabuleiro = tuplo_para_tabuleiro(tuple(tuple(casas[i:i + 3]) for i in (0, 3, 6)))
+                sessao, resto = SessaoJogo(tabuleiro=tabuleiro, turno=argumentos[2]), argumentos[3:]
+            else:
+                raise ValueError('position: argumentos invalidos')
+            if resto and resto[0] != 'moves':
+                raise ValueError('position: argumentos invalidos')
+            for jogada in resto[1:]:
+                sessao.jogar(_str_para_jogada(jogada))
+        except (ValueError, KeyError, IndexError) as erro:
+            self._responder(f'info string posicao invalida ({erro})')
+            return
+        self.tabuleiro, self.jogador = sessao.tabuleiro, sessao.turno
+
+    def _comecar(self, argumentos: list) -> None:
+        """
+        go [depth N] [movetime MS] [nodes N] [infinite] [ponder]
+        'go' sem limites pesquisa ate PROFUNDIDADE_POR_OMISSAO; 'infinite' aprofunda ate 'stop' e
+        'ponder' aprofunda ate 'ponderhit', passando depois a respeitar os limites (ou a omissao).
+        """
+        limites, i = {}, 0
+        while i < len(argumentos):
+            nome = argumentos[i]
+            if nome in ('infinite', 'ponder'):
+                limites[nome] = True
+                i += 1
+            elif nome in ('depth', 'movetime', 'nodes') and i + 1 < len(argumentos) \
+                    and argumentos[i + 1].isdigit():
+                limites[nome] = int(argumentos[i + 1])
+                i += 2
+            else:
+                i += 1  # limites desconhecidos (wtime, btime, ...) sao ignorados
+        if not any(nome in limites for nome in ('depth', 'movetime', 'nodes', 'infinite')):
+            limites['depth'] = PROFUNDIDADE_POR_OMISSAO
+        self._limites = limites
+        self._completa = 0
+        self._parar.clear()
+        if limites.get('ponder'):
+            self._ponder.set()
+        else:
+            self._ponder.clear()
+        if self.tabela is None and self.entradas_tabela > 0:
+            from transposicao import TabelaTransposicao
+            self.tabela = TabelaTransposicao(self.entradas_tabela, partilhada=False)
+        self._inicio = time.perf_counter()
+        self._thread = threading.Thread(target=self._pesquisar, daemon=True)
+        self._thread.start()
+
+    # --- Pesquisa ---
+    def _libertar_tabela(self) -> None:
+        if self.tabela is not None:
+            self.tabela.fechar()
+            self.tabela = None
+
+    def _deve_parar(self) -> bool:
+        """Condicao de paragem do Minimax: 'stop' ou limites de profundidade, nos e tempo (ignorados em ponder)."""
+        if self._parar.is_set():
+            return True
+        if self._ponder.is_set():
+            return False
+        if 'depth' in self._limites and self._completa >= self._limites['depth']:  # ponder depois do ponderhit
+            return True
+        nos = _ESTATISTICAS_PESQUISA['nos']
+        if 'nodes' in self._limites and nos >= self._limites['nodes']:
+            return True
+        if 'movetime' in self._limites and nos % _INTERVALO_RELOGIO == 0:
+            return (time.perf_counter() - self._inicio) * 1000 >= self._limites['movetime']
+        return False
+
+    def _informar(self, profundidade: int, pontuacao: int, variante: list) -> None:
+        self._completa = profundidade
+        decorrido = time.perf_counter() - self._inicio
+        nos = _ESTATISTICAS_PESQUISA['nos']
+        sinal = 1 if self.jogador == 'X' else -1
+        self._responder(f'info depth {profundidade} score cp {100 * pontuacao * sinal} nodes {nos} '
+                        f'nps {int(nos / decorrido) if decorrido > 0 else 0} time {int(decorrido * 1000)} '
+                        f'pv {" ".join(_movimento_para_str(m) for m in variante)}')
+
+    def _pesquisar(self) -> None:
+        """Corpo da thread de pesquisa: escolhe a jogada e escreve 'bestmove'."""
+        tabuleiro, jogador = self.tabuleiro, self.jogador
+        if obter_ganhador(tabuleiro) != ' ':
+            self._esperar_ordem_final()
+            self._responder('bestmove (none)')
+            return
+        if _esta_na_fase_colocacao(tabuleiro):
+            self._esperar_ordem_final()
+            self._responder(f'bestmove {_movimento_para_str(_escolher_colocacao_ia(tabuleiro, jogador))}')
+            return
+
+        anterior_tabela = definir_tabela_transposicao(self.tabela)
+        anterior_paragem = definir_paragem_pesquisa(self._deve_parar)
+        _ESTATISTICAS_PESQUISA['nos'] = 0
+        try:
+            profundidade = None if self._limites.get('ponder') else self._limites.get('depth')
+            _, variante, _ = pesquisar(tabuleiro, jogador, profundidade, self._informar)
+        finally:
+            definir_paragem_pesquisa(anterior_paragem)
+            definir_tabela_transposicao(anterior_tabela)
+
+        self._esperar_ordem_final()
+        if not variante:  # nem a profundidade 1 terminou
+            variante = [_calcular_movimento_facil(tabuleiro, jogador)]
+        resposta = f'bestmove {_movimento_para_str(variante[0])}'
+        if len(variante) > 1:
+            resposta += f' ponder {_movimento_para_str(variante[1])}'
+        self._responder(resposta)
+
+    def _esperar_ordem_final(self) -> None:
+        """Em 'go infinite' ou 'go ponder', 'bestmove' so e enviado depois de 'stop' (ou 'ponderhit')."""
+        if self._limites.get('infinite'):
+            self._parar.wait()
+        while self._ponder.is_set() and not self._parar.wait(0.01):
+            pass
+
+def main() -> int:
+    """Ciclo de leitura de comandos (stdin) ate 'quit' ou ao fim da entrada."""
+    motor = Motor()
+    for linha in sys.stdin:
+        if not motor.tratar(linha):
+            return 0
+    motor.tratar('quit')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Registos binarios compactos de jogos do Moinho 3x3 e reproducao rapida.
+- Ficheiro: cabecalho (magico b'MOINHOGR', versao) seguido de jogos.
+- Jogo: nivel de 'X' (1 byte), nivel de 'O' (1 byte), vencedor (1 byte: 0 nenhum, 1 'X', 2 'O'),
+  numero de jogadas (uint16) e 1 byte por jogada. Os jogos comecam no tabuleiro vazio com 'X'.
+- Jogada: o codigo de projeto_final.movimento_para_codigo, origem * 9 + destino (0..80, pela ordem
+  de leitura; origem == destino e passar) ou 81 + destino para uma colocacao (81..89).
+- A reproducao valida cada jogada com as regras de projeto_final (jogada_valida, casas livres,
+  fase do jogo) e guarda o resultado de cada (posicao, jogada) ja vista, pelo que um registo
+  grande e verificado quase so com consultas a um dicionario.
+Os jogos sao dicionarios como os de aprendizagem.jogar_autojogo:
+  {'niveis': [nivel_x, nivel_o], 'jogadas': ['b2', 'a1', ..., 'a1a2'], 'vencedor': 'X' | 'O' | ' '}
+Uso:
+  python3 registos.py verificar jogos.bin --trabalhadores 4
+  python3 registos.py converter jogos.jsonl -o jogos.bin
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from projeto_final import (
+    NIVEIS, COLUNAS, LINHAS, CODIGO_COLOCACAO, NUM_CODIGOS, cria_posicao, posicao_para_str, obter_ganhador,
+    eh_posicao_livre, jogada_valida, codigo_para_movimento, _esta_na_fase_colocacao, _executar_movimento,
+    _chave_tabuleiro, _tabuleiro_da_chave, _ORDEM_LEITURA_MAP,
+)
+# -------------------------------------------------------------------------------------------------
+# Formato
+# -------------------------------------------------------------------------------------------------
+_MAGICO = b'MOINHOGR'
+_CABECALHO = struct.Struct('<8sH')    # magico, versao
+_VERSAO = 1
+_JOGO = struct.Struct('<BBBH')        # nivel_x, nivel_o, vencedor, numero de jogadas
+_NIVEL_HUMANO = 255
+_VENCEDORES = (' ', 'X', 'O')
+MAX_JOGADAS = 0xFFFF
+
+_POSICOES = tuple(cria_posicao(c, l) for l in LINHAS for c in COLUNAS)
+_NOMES = tuple(posicao_para_str(p) for p in _POSICOES)
+
+def _str_para_codigo(jogada: str) -> int:
+    """Codigo de uma jogada escrita como no input manual ('b2' ou 'a1a2')."""
+    if len(jogada) == 2:
+        return CODIGO_COLOCACAO + _ORDEM_LEITURA_MAP[jogada]
+    return _ORDEM_LEITURA_MAP[jogada[:2]] * 9 + _ORDEM_LEITURA_MAP[jogada[2:]]
+
+def _codigo_para_str(codigo: int) -> str:
+    """Operacao inversa de _str_para_codigo."""
+    if codigo >= CODIGO_COLOCACAO:
+        return _NOMES[codigo - CODIGO_COLOCACAO]
+    return _NOMES[codigo // 9] + _NOMES[codigo % 9]
+
+# -------------------------------------------------------------------------------------------------
+# Escrita e leitura em fluxo
+# -------------------------------------------------------------------------------------------------
+class EscritorRegistos:
+    """Escreve jogos, um a um, num ficheiro binario aberto para escrita."""
+    __slots__ = ('ficheiro', 'jogos')
+
+    def __init__(self, ficheiro):
+        self.ficheiro = ficheiro
+        self.jogos = 0
+        ficheiro.write(_CABECALHO.pack(_MAGICO, _VERSAO))
+
+    def escrever(self, jogo: dict) -> None:
+        """
+        Escreve um jogo.
+
+        Args:
+            jogo (dict): {'niveis': [nivel_x, nivel_o], 'jogadas': [str, ...], 'vencedor': str}.
+
+        Raises:
+            ValueError: Se o jogo tiver jogadas a mais ou jogadas mal escritas.
+        """
+        try:
+            codigos = bytes(_str_para_codigo(j) for j in jogo['jogadas'])
+        except KeyError:
+            raise ValueError('EscritorRegistos: jogada invalida')
+        if len(codigos) > MAX_JOGADAS:
+            raise ValueError('EscritorRegistos: jogo demasiado longo')
+        niveis = [NIVEIS.index(n) if n in NIVEIS else _NIVEL_HUMANO for n in jogo['niveis']]
+        self.ficheiro.write(_JOGO.pack(niveis[0], niveis[1], _VENCEDORES.index(jogo['vencedor']), len(codigos)))
+        self.ficheiro.write(codigos)
+        self.jogos += 1
+
+def ler_registos_brutos(ficheiro):
+    """
+    Gera os jogos de um ficheiro binario sem descodificar as jogadas.
+
+    Args:
+        ficheiro (file): Ficheiro binario aberto para leitura.
+
+    Yields:
+        tuple (str, str, str, bytes): (nivel_x, nivel_o, vencedor, codigos das jogadas).
+
+    Raises:
+        ValueError: Se o ficheiro nao for um registo de jogos ou estiver truncado.
+    """
+    cabecalho = ficheiro.read(_CABECALHO.size)
+    if len(cabecalho) != _CABECALHO.size or _CABECALHO.unpack(cabecalho) != (_MAGICO, _VERSAO):
+        raise ValueError('ler_registos: ficheiro invalido')
+    while True:
+        dados = ficheiro.read(_JOGO.size)
+        if not dados:
+            return
+        if len(dados) != _JOGO.size:
+            raise ValueError('ler_registos: ficheiro truncado')
+        nivel_x, nivel_o, vencedor, n = _JOGO.unpack(dados)
+        codigos = ficheiro.read(n)
+        if len(codigos) != n or vencedor >= len(_VENCEDORES):
+            raise ValueError('ler_registos: ficheiro truncado')
+        yield (NIVEIS[nivel_x] if nivel_x < len(NIVEIS) else 'humano',
+               NIVEIS[nivel_o] if nivel_o < len(NIVEIS) else 'humano', _VENCEDORES[vencedor], codigos)
+
+def ler_registos(ficheiro):
+    """
+    Gera os jogos de um ficheiro binario, no formato de aprendizagem.ler_jogos.
+
+    Args:
+        ficheiro (file): Ficheiro binario aberto para leitura.
+
+    Yields:
+        dict: {'niveis', 'jogadas', 'vencedor'}.
+    """
+    for nivel_x, nivel_o, vencedor, codigos in ler_registos_brutos(ficheiro):
+        yield {'niveis': [nivel_x, nivel_o], 'jogadas': [_codigo_para_str(c) for c in codigos],
+               'vencedor': vencedor}
+
+# -------------------------------------------------------------------------------------------------
+# Reproducao e verificacao
+# -------------------------------------------------------------------------------------------------
+_TRANSICOES = {}  # (chave da posicao << 7) | codigo (< NUM_CODIGOS) -> chave da posicao seguinte (-1 se invalida)
+
+def _calcular_transicao(posicao: int, codigo: int) -> int:
+    """Aplica, com os TADs e as regras do jogo, a jogada 'codigo' a posicao (chave * 2 + 1 se joga 'O')."""
+    tabuleiro = _tabuleiro_da_chave(posicao >> 1)
+    jogador = 'O' if posicao & 1 else 'X'
+    if codigo >= NUM_CODIGOS or obter_ganhador(tabuleiro) != ' ':
+        return -1
+    movimento = codigo_para_movimento(codigo)
+    if len(movimento) == 1:
+        if not (_esta_na_fase_colocacao(tabuleiro) and eh_posicao_livre(tabuleiro, movimento[0])):
+            return -1
+    elif _esta_na_fase_colocacao(tabuleiro) or not jogada_valida(tabuleiro, jogador, *movimento):
+        return -1
+    _executar_movimento(tabuleiro, jogador, movimento)
+    return _chave_tabuleiro(tabuleiro) * 2 + (jogador == 'X')
+
+def reproduzir_jogo(codigos: bytes) -> list:
+    """
+    Reproduz um jogo a partir do tabuleiro vazio, validando todas as jogadas.
+
+    Args:
+        codigos (bytes): Os codigos das jogadas.
+
+    Returns:
+        list: As posicoes visitadas (chave do tabuleiro * 2 + 1 se joga 'O'), incluindo a inicial.
+
+    Raises:
+        ValueError: Se alguma jogada for invalida.
+    """
+    transicoes = _TRANSICOES
+    posicao, posicoes = 0, [0]
+    for i, codigo in enumerate(codigos):
+        if codigo >= NUM_CODIGOS:  # um byte >= 128 invadiria o indice da posicao seguinte
+            raise ValueError(f'reproduzir_jogo: jogada invalida ({i + 1})')
+        indice = (posicao << 7) | codigo
+        seguinte = transicoes.get(indice)
+        if seguinte is None:
+            seguinte = transicoes[indice] = _calcular_transicao(posicao, codigo)
+        if seguinte < 0:
+            raise ValueError(f'reproduzir_jogo: jogada invalida ({i + 1})')
+        posicao = seguinte
+        posicoes.append(posicao)
+    return posicoes
+
+def _verificar_bloco(bloco: list) -> dict:
+    """Verifica um bloco de jogos brutos (executado num processo trabalhador)."""
+    contagens = {'jogos': 0, 'jogadas': 0, 'invalidos': 0, 'vencedor_errado': 0}
+    for _, _, vencedor, codigos in bloco:
+        contagens['jogos'] += 1
+        contagens['jogadas'] += len(codigos)
+        try:
+            final = reproduzir_jogo(codigos)[-1]
+        except ValueError:
+            contagens['invalidos'] += 1
+            continue
+        if obter_ganhador(_tabuleiro_da_chave(final >> 1)) != vencedor:
+            contagens['vencedor_errado'] += 1
+    return contagens
+
+def verificar_registos(jogos, trabalhadores: int = 1, tamanho_bloco: int = 8192) -> dict:
+    """
+    Reproduz e verifica jogos brutos (ver ler_registos_brutos), em paralelo se trabalhadores > 1.
+
+    Args:
+        jogos (iterable): Tuplos (nivel_x, nivel_o, vencedor, codigos).
+        trabalhadores (int): Numero de processos.
+        tamanho_bloco (int): Jogos por tarefa.
+
+    Returns:
+        dict: jogos, jogadas, invalidos (com alguma jogada ilegal) e vencedor_errado.
+    """
+    totais = {'jogos': 0, 'jogadas': 0, 'invalidos': 0, 'vencedor_errado': 0}
+
+    def blocos():
+        bloco = []
+        for jogo in jogos:
+            bloco.append(jogo)
+            if len(bloco) == tamanho_bloco:
+                yield bloco
+                bloco = []
+        if bloco:
+            yield bloco
+
+    def somar(contagens):
+        for chave, valor in contagens.items():
+            totais[chave] += valor
+
+    if trabalhadores <= 1:
+        for bloco in blocos():
+            somar(_verificar_bloco(bloco))
+        return totais
+    with ProcessPoolExecutor(max_workers=trabalhadores) as executor:
+        em_curso = deque()
+        for bloco in blocos():
+            em_curso.append(executor.submit(_verificar_bloco, bloco))
+            if len(em_curso) >= 2 * trabalhadores:
+                somar(em_curso.popleft().result())
+        while em_curso:
+            somar(em_curso.popleft().result())
+    return totais
+
+def main(argumentos=None) -> int:
+    """Ponto de entrada da linha de comandos (verificar, converter)."""
+    parser = argparse.ArgumentParser(description='Registos binarios de jogos do Moinho 3x3.')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    verificar = comandos.add_parser('verificar', help='reproduz e verifica registos binarios')
+    verificar.add_argument('registos', nargs='+')
+    verificar.add_argument('--trabalhadores', type=int, default=None)
+    converter = comandos.add_parser('converter', help='converte JSON lines (autojogo) para binario')
+    converter.add_argument('entrada', help="ficheiro JSON lines ('-' para stdin)")
+    converter.add_argument('-o', '--saida', required=True)
+    args = parser.parse_args(argumentos)
+
+    if args.comando == 'verificar':
+        trabalhadores = args.trabalhadores or os.cpu_count() or 1
+
+        def todos_os_jogos():
+            for caminho in args.registos:
+                with open(caminho, 'rb') as ficheiro:
+                    yield from ler_registos_brutos(ficheiro)
+        totais = verificar_registos(todos_os_jogos(), trabalhadores)
+        print(json.dumps(totais))
+        return 0 if totais['invalidos'] == 0 and totais['vencedor_errado'] == 0 else 1
+
+    entrada = sys.stdin if args.entrada == '-' else open(args.entrada, encoding='utf-8')
+    try:
+        with open(args.saida, 'wb') as saida:
+            escritor = EscritorRegistos(saida)
+            for linha in entrada:
+                if linha.strip():
+                    escritor.escrever(json.loads(linha))
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+    sys.stderr.write(f'{escritor.jogos} jogos convertidos\n')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
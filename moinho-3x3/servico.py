@@ -0,0 +1,415 @@
+"""
+Servico sem estado de "melhor movimento" para o Moinho 3x3, com micro-lotes.
+- Os pedidos concorrentes sao agrupados em janelas curtas (alguns milissegundos) e as
+  posicoes repetidas dentro de cada janela sao calculadas uma unica vez.
+- Cada posicao e respondida, por esta ordem, pelas tabelas de decisao de tabelas.py (colocacao e
+  niveis 'facil' e 'normal', sem passar pelo lote), pela cache LRU de respostas, no proprio ciclo de
+  eventos (niveis rapidos) ou num conjunto de processos, com o lote repartido por uma tarefa por
+  trabalhador (niveis lentos).
+- O servico regista a latencia de cada pedido (p50/p99) e o debito.
+Protocolo (JSON lines sobre TCP):
+- Pedido:   {"id": 7, "tabuleiro": [[1,0,-1],[0,1,-1],[1,-1,0]], "jogador": "X", "nivel": "dificil"}
+- Resposta: {"id": 7, "movimento": "b2a2"}  (null se a posicao ja tiver ganhador)
+            ou {"id": 7, "erro": "..."}
+Uso:
+  python3 servico.py servir --porta 7778 --trabalhadores 4
+  python3 servico.py carga --local --pedidos 20000 --ligacoes 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from projeto_final import (
+    NIVEIS, eh_tabuleiro, obter_ganhador, obter_movimento_auto, _chave_tabuleiro, _tabuleiro_da_chave,
+    _nivel_disponivel,
+)
+from analisar import _jogador_por_omissao, _ler_tabuleiro, _movimento_para_str
+from servidor import NIVEIS_EXECUTOR, MAX_LINHA
+# -------------------------------------------------------------------------------------------------
+# Calculo (tambem executado nos processos trabalhadores)
+# -------------------------------------------------------------------------------------------------
+def _resolver(chave_posicao: int, nivel: str):
+    """Melhor movimento ('a1' ou 'a1a2', None se houver ganhador) da posicao chave * 2 + (1 se joga 'O')."""
+    tabuleiro = _tabuleiro_da_chave(chave_posicao >> 1)
+    if obter_ganhador(tabuleiro) != ' ':
+        return None
+    return _movimento_para_str(obter_movimento_auto(tabuleiro, 'O' if chave_posicao & 1 else 'X', nivel))
+
+def _resolver_lote(pedidos: list) -> list:
+    """
+    Resolve uma lista de (chave_posicao, nivel) distintos (uma tarefa por lote).
+    Um pedido que falha tem a excecao no seu lugar, sem impedir os restantes.
+    """
+    resultados = []
+    for chave, nivel in pedidos:
+        try:
+            resultados.append(_resolver(chave, nivel))
+        except Exception as erro:
+            resultados.append(erro)
+    return resultados
+
+def _percentil(valores: list, fracao: float) -> float:
+    """Percentil (pelo metodo do valor mais proximo) de uma lista ordenada."""
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, int(fracao * len(valores)))]
+
+# -------------------------------------------------------------------------------------------------
+# Servico
+# -------------------------------------------------------------------------------------------------
+class ServicoMelhorMovimento:
+    """
+    Agrupa os pedidos em micro-lotes, elimina duplicados e responde com tabelas, cache e executor.
+    Deve ser usado dentro de um unico ciclo de eventos asyncio.
+    """
+    __slots__ = ('executor', 'trabalhadores', 'janela', 'tamanho_maximo', 'capacidade_cache', 'cache',
+                 'estatisticas', 'latencias', '_tabelas', '_pendentes', '_agendado', '_inicio')
+
+    def __init__(self, executor=None, janela: float = 0.002, tamanho_maximo: int = 512,
+                 capacidade_cache: int = 1 << 16, amostras: int = 1 << 17, trabalhadores=None,
+                 tabelas: bool = True):
+        """
+        Args:
+            executor (Executor | None): Onde sao calculados os niveis lentos (None: no ciclo de eventos).
+            janela (float): Segundos que um lote fica aberto depois do primeiro pedido.
+            tamanho_maximo (int): Posicoes distintas que fecham o lote antes do fim da janela.
+            capacidade_cache (int): Respostas guardadas na cache LRU (0 desliga a cache).
+            amostras (int): Latencias mais recentes guardadas para os percentis.
+            trabalhadores (int | None): Tarefas em que se reparte cada lote lento (None: os.cpu_count()).
+            tabelas (bool): Responde pelas tabelas de decisao de tabelas.py quando a posicao la esta
+                (carregadas ou construidas aqui).
+        """
+        self.executor = executor
+        self.trabalhadores = trabalhadores or os.cpu_count() or 1
+        self._tabelas = None
+        if tabelas:
+            from tabelas import movimento_tabelado, obter_tabelas
+            obter_tabelas()
+            self._tabelas = movimento_tabelado
+        self.janela = janela
+        self.tamanho_maximo = tamanho_maximo
+        self.capacidade_cache = capacidade_cache
+        self.cache = OrderedDict()
+        self.estatisticas = dict.fromkeys(
+            ('pedidos', 'tabelados', 'acertos_cache', 'duplicados', 'calculados', 'calculados_executor',
+             'erros', 'lotes'), 0)
+        self.latencias = deque(maxlen=amostras)
+        self._pendentes = {}
+        self._agendado = False
+        self._inicio = time.perf_counter()
+
+    async def pedir(self, tabuleiro: list, jogador: str, nivel: str):
+        """
+        Devolve o melhor movimento de uma posicao, segundo obter_movimento_auto.
+
+        Args:
+            tabuleiro (list): O TAD tabuleiro.
+            jogador (str): O TAD peca do jogador a jogar.
+            nivel (str): O nivel (ver NIVEIS).
+
+        Returns:
+            str | None: O movimento ('a1' ou 'a1a2'), ou None se a posicao ja tiver ganhador.
+
+        Raises:
+            ValueError: Se o nivel for invalido ou estiver indisponivel (sem tabela de valores).
+        """
+        if nivel not in NIVEIS:
+            raise ValueError('servico: nivel invalido')
+        if not _nivel_disponivel(nivel):
+            raise ValueError('servico: nivel indisponivel')
+        inicio = time.perf_counter()
+        self.estatisticas['pedidos'] += 1
+        chave = (_chave_tabuleiro(tabuleiro) * 2 + (jogador == 'O'), nivel)
+
+        movimento = self._tabelado(tabuleiro, jogador, nivel)
+        if movimento is not None:
+            self.estatisticas['tabelados'] += 1
+            resposta = _movimento_para_str(movimento)
+        elif chave in self.cache:
+            self.cache.move_to_end(chave)
+            self.estatisticas['acertos_cache'] += 1
+            resposta = self.cache[chave]
+        else:
+            futuro = asyncio.get_running_loop().create_future()
+            if chave in self._pendentes:
+                self.estatisticas['duplicados'] += 1
+                self._pendentes[chave].append(futuro)
+            else:
+                self._pendentes[chave] = [futuro]
+                self._agendar()
+            resposta = await futuro
+        self.latencias.append(time.perf_counter() - inicio)
+        return resposta
+
+    def _tabelado(self, tabuleiro: list, jogador: str, nivel: str):
+        """Jogada das tabelas de decisao, ou None se nao estiver tabelada (ou a posicao tiver ganhador)."""
+        if self._tabelas is None or obter_ganhador(tabuleiro) != ' ':
+            return None
+        return self._tabelas(tabuleiro, jogador, nivel)
+
+    def _agendar(self) -> None:
+        """Fecha o lote ao fim da janela, ou ja, se atingiu o tamanho maximo."""
+        ciclo = asyncio.get_running_loop()
+        if len(self._pendentes) >= self.tamanho_maximo:
+            ciclo.create_task(self._despachar())
+        elif not self._agendado:
+            self._agendado = True
+            ciclo.call_later(self.janela, lambda: ciclo.create_task(self._despachar()))
+
+    async def _despachar(self) -> None:
+        """Resolve o lote pendente: niveis rapidos no ciclo, lentos no executor (uma tarefa por trabalhador)."""
+        self._agendado = False
+        lote, self._pendentes = self._pendentes, {}
+        if not lote:
+            return
+        self.estatisticas['lotes'] += 1
+        respostas, falhas, lentos = {}, {}, []
+        for chave in lote:
+            if self.executor is not None and chave[1] in NIVEIS_EXECUTOR:
+                lentos.append(chave)
+                continue
+            try:
+                respostas[chave] = _resolver(*chave)
+            except Exception as erro:  # so os pedidos desta chave falham; o lote e o servico continuam
+                falhas[chave] = erro
+        if lentos:
+            ciclo = asyncio.get_running_loop()
+            blocos = [lentos[i::self.trabalhadores] for i in range(min(self.trabalhadores, len(lentos)))]
+            por_bloco = await asyncio.gather(
+                *(ciclo.run_in_executor(self.executor, _resolver_lote, bloco) for bloco in blocos),
+                return_exceptions=True)
+            for bloco, resultados in zip(blocos, por_bloco):
+                if isinstance(resultados, BaseException):  # executor avariado: falham os pedidos do bloco
+                    resultados = [resultados] * len(bloco)
+                for chave, resultado in zip(bloco, resultados):
+                    if isinstance(resultado, BaseException):
+                        falhas[chave] = resultado
+                    else:
+                        respostas[chave] = resultado
+                        self.estatisticas['calculados_executor'] += 1
+        self.estatisticas['calculados'] += len(respostas)
+        self.estatisticas['erros'] += len(falhas)
+
+        for chave, resposta in respostas.items():
+            self._guardar_cache(chave, resposta)
+            for futuro in lote[chave]:
+                if not futuro.done():
+                    futuro.set_result(resposta)
+        for chave, erro in falhas.items():
+            for futuro in lote[chave]:
+                if not futuro.done():
+                    futuro.set_exception(erro)
+
+    def _guardar_cache(self, chave: tuple, resposta) -> None:
+        """Insere uma resposta na cache LRU, removendo a mais antiga se estiver cheia."""
+        if self.capacidade_cache <= 0:
+            return
+        self.cache[chave] = resposta
+        if len(self.cache) > self.capacidade_cache:
+            self.cache.popitem(last=False)
+
+    def relatorio(self) -> dict:
+        """
+        Estatisticas do servico desde a criacao.
+
+        Returns:
+            dict: Contadores, p50_ms, p99_ms e pedidos_por_segundo.
+        """
+        latencias = sorted(self.latencias)
+        decorrido = time.perf_counter() - self._inicio
+        return {**self.estatisticas,
+                'p50_ms': _percentil(latencias, 0.50) * 1000,
+                'p99_ms': _percentil(latencias, 0.99) * 1000,
+                'pedidos_por_segundo': self.estatisticas['pedidos'] / decorrido if decorrido else 0.0}
+
+# -------------------------------------------------------------------------------------------------
+# Servidor (JSON lines)
+# -------------------------------------------------------------------------------------------------
+async def _responder(servico: ServicoMelhorMovimento, linha: bytes, escritor) -> None:
+    """Trata um pedido e escreve a resposta (pela ordem em que ficam prontas)."""
+    identificador = None
+    try:
+        pedido = json.loads(linha)
+        if not isinstance(pedido, dict):
+            raise ValueError('servico: pedido invalido')
+        identificador = pedido.get('id')
+        tabuleiro = _ler_tabuleiro(pedido.get('tabuleiro'))
+        jogador = pedido.get('jogador') or _jogador_por_omissao(tabuleiro)
+        if jogador not in ('X', 'O'):
+            raise ValueError('servico: jogador invalido')
+        resposta = {'id': identificador,
+                    'movimento': await servico.pedir(tabuleiro, jogador, pedido.get('nivel', 'dificil'))}
+    except Exception as erro:  # inclui json.JSONDecodeError e as falhas do calculo (ex.: executor avariado)
+        resposta = {'id': identificador, 'erro': str(erro) or type(erro).__name__}
+    escritor.write((json.dumps(resposta) + '\n').encode('utf-8'))
+
+async def _tratar_ligacao(servico: ServicoMelhorMovimento, leitor, escritor) -> None:
+    """Le pedidos ate o cliente desligar; os pedidos da mesma ligacao sao tratados em paralelo."""
+    tarefas = set()
+    try:
+        while True:
+            try:
+                linha = await leitor.readline()
+            except ValueError:  # linha maior do que o limite
+                break
+            if not linha:
+                break
+            tarefa = asyncio.ensure_future(_responder(servico, linha, escritor))
+            tarefas.add(tarefa)
+            tarefa.add_done_callback(tarefas.discard)
+            if escritor.transport.get_write_buffer_size() > 1 << 16:
+                await escritor.drain()
+        if tarefas:
+            await asyncio.gather(*tarefas)
+        await escritor.drain()
+    except ConnectionError:
+        pass
+    except asyncio.CancelledError:  # o servidor fechou (ex.: fim de 'carga --local') com a ligacao aberta
+        for tarefa in tarefas:
+            tarefa.cancel()
+    finally:
+        escritor.close()
+
+async def criar_servico(servico: ServicoMelhorMovimento, anfitriao: str = '127.0.0.1', porta: int = 7778):
+    """
+    Poe o servico a escuta (JSON lines sobre TCP).
+
+    Args:
+        servico (ServicoMelhorMovimento): O servico que responde aos pedidos.
+        anfitriao (str): Endereco de escuta.
+        porta (int): Porta de escuta (0 escolhe uma porta livre).
+
+    Returns:
+        asyncio.Server: O servidor.
+    """
+    return await asyncio.start_server(partial(_tratar_ligacao, servico), anfitriao, porta, limit=4 * MAX_LINHA)
+
+# -------------------------------------------------------------------------------------------------
+# Gerador de carga
+# -------------------------------------------------------------------------------------------------
+def posicoes_aleatorias(n: int, semente=None) -> list:
+    """
+    Sorteia posicoes validas e sem ganhador, para gerar carga.
+
+    Args:
+        n (int): Numero de posicoes distintas.
+        semente (int | None): Semente do gerador.
+
+    Returns:
+        list: Tuplos 3x3 (formato de tuplo_para_tabuleiro).
+    """
+    gerador = random.Random(semente)
+    posicoes = []
+    while len(posicoes) < n:
+        tabuleiro = _tabuleiro_da_chave(gerador.randrange(3 ** 9))
+        if eh_tabuleiro(tabuleiro) and obter_ganhador(tabuleiro) == ' ':
+            posicoes.append([[{'X': 1, 'O': -1}.get(p, 0) for p in linha] for linha in tabuleiro])
+    return posicoes
+
+async def gerar_carga(anfitriao: str, porta: int, pedidos: int = 10000, ligacoes: int = 32,
+                      nivel: str = 'dificil', distintas: int = 500, semente=None) -> dict:
+    """
+    Envia pedidos em ciclo fechado a partir de varias ligacoes e mede as latencias no cliente.
+
+    Args:
+        anfitriao (str): Endereco do servico.
+        porta (int): Porta do servico.
+        pedidos (int): Numero total de pedidos.
+        ligacoes (int): Ligacoes simultaneas (cada uma espera pela resposta antes do pedido seguinte).
+        nivel (str): O nivel pedido.
+        distintas (int): Numero de posicoes distintas de onde se sorteiam os pedidos.
+        semente (int | None): Semente do gerador.
+
+    Returns:
+        dict: pedidos, erros, segundos, pedidos_por_segundo, p50_ms e p99_ms.
+    """
+    posicoes = posicoes_aleatorias(distintas, semente)
+    gerador = random.Random(semente)
+    latencias, erros = [], 0
+
+    async def cliente(quantos: int) -> None:
+        nonlocal erros
+        leitor, escritor = await asyncio.open_connection(anfitriao, porta, limit=1 << 16)
+        for i in range(quantos):
+            pedido = {'id': i, 'tabuleiro': gerador.choice(posicoes), 'nivel': nivel}
+            inicio = time.perf_counter()
+            escritor.write((json.dumps(pedido) + '\n').encode('utf-8'))
+            resposta = json.loads(await leitor.readline())
+            latencias.append(time.perf_counter() - inicio)
+            erros += 'erro' in resposta
+        escritor.close()
+        await escritor.wait_closed()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(pedidos // ligacoes + (i < pedidos % ligacoes)) for i in range(ligacoes)))
+    decorrido = time.perf_counter() - inicio
+    latencias.sort()
+    return {'pedidos': len(latencias), 'erros': erros, 'segundos': decorrido,
+            'pedidos_por_segundo': len(latencias) / decorrido if decorrido else 0.0,
+            'p50_ms': _percentil(latencias, 0.50) * 1000, 'p99_ms': _percentil(latencias, 0.99) * 1000}
+
+# -------------------------------------------------------------------------------------------------
+# Linha de comandos
+# -------------------------------------------------------------------------------------------------
+async def _servir(args) -> None:
+    """Corre o servico ate ser interrompido."""
+    with ProcessPoolExecutor(max_workers=args.trabalhadores) as executor:
+        servico = ServicoMelhorMovimento(executor, args.janela / 1000, capacidade_cache=args.cache,
+                                         trabalhadores=args.trabalhadores)
+        servidor = await criar_servico(servico, args.anfitriao, args.porta)
+        endereco = servidor.sockets[0].getsockname()
+        sys.stderr.write(f'servico: a escutar em {endereco[0]}:{endereco[1]}\n')
+        async with servidor:
+            await servidor.serve_forever()
+
+async def _carga(args) -> dict:
+    """Corre o gerador de carga (contra um servico local, com --local)."""
+    if not args.local:
+        return await gerar_carga(args.anfitriao, args.porta, args.pedidos, args.ligacoes, args.nivel,
+                                 args.distintas, args.semente)
+    with ProcessPoolExecutor(max_workers=args.trabalhadores) as executor:
+        servico = ServicoMelhorMovimento(executor, args.janela / 1000, capacidade_cache=args.cache,
+                                         trabalhadores=args.trabalhadores)
+        servidor = await criar_servico(servico, args.anfitriao, 0)
+        async with servidor:
+            porta = servidor.sockets[0].getsockname()[1]
+            cliente = await gerar_carga(args.anfitriao, porta, args.pedidos, args.ligacoes, args.nivel,
+                                        args.distintas, args.semente)
+        return {'cliente': cliente, 'servico': servico.relatorio()}
+
+def main(argumentos=None) -> int:
+    """Ponto de entrada da linha de comandos."""
+    parser = argparse.ArgumentParser(description='Servico de melhor movimento do Moinho 3x3.')
+    parser.add_argument('comando', choices=('servir', 'carga'))
+    parser.add_argument('--anfitriao', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=7778)
+    parser.add_argument('--trabalhadores', type=int, default=None)
+    parser.add_argument('--janela', type=float, default=2.0, help='janela do micro-lote (ms)')
+    parser.add_argument('--cache', type=int, default=1 << 16, help='respostas na cache LRU')
+    parser.add_argument('--local', action='store_true', help='carga: arranca um servico no proprio processo')
+    parser.add_argument('--pedidos', type=int, default=10000)
+    parser.add_argument('--ligacoes', type=int, default=32)
+    parser.add_argument('--nivel', choices=NIVEIS, default='dificil')
+    parser.add_argument('--distintas', type=int, default=500)
+    parser.add_argument('--semente', type=int, default=None)
+    args = parser.parse_args(argumentos)
+    args.trabalhadores = args.trabalhadores or os.cpu_count() or 1
+
+    try:
+        if args.comando == 'servir':
+            asyncio.run(_servir(args))
+        else:
+            print(json.dumps(asyncio.run(_carga(args)), indent=2))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
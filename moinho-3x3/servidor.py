@@ -0,0 +1,210 @@
+"""
+Servidor TCP (asyncio) para muitos jogos Humano vs Computador em simultaneo.
+- Cada ligacao tem a sua SessaoJogo; as regras sao as mesmas do moinho.
+- As jogadas do computador nos niveis lentos ('dificil', 'mcts') correm num conjunto de
+  processos (run_in_executor), para que uma pesquisa longa nao atrase as outras sessoes.
+Protocolo (uma mensagem por linha, UTF-8):
+- Cliente: NOVO <[X]|[O]> <nivel>   comeca um jogo novo (substitui o anterior)
+           a1 | a1a2                jogada do humano, como no input manual
+           LEGAIS                   pede as jogadas legais do humano
+           SAIR                     termina a ligacao
+- Servidor: BEMVINDO <nivel>
+            TABULEIRO <9 casas pela ordem de leitura, '.' para livre> <turno>
+            CPU <jogada>            jogada do computador
+            LEGAIS <jogada> ...
+            FIM <[X]|[O]>
+            ERRO <mensagem>         a sessao continua, exceto se a linha for demasiado longa
+            ADEUS
+Uso:
+  python3 servidor.py --porta 7777 --trabalhadores 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from projeto_final import (
+    NIVEIS, SessaoJogo, posicao_para_str, obter_movimento_auto, cria_copia_tabuleiro,
+    _interpretar_movimento_manual,
+)
+# -------------------------------------------------------------------------------------------------
+# Constantes
+# -------------------------------------------------------------------------------------------------
+NIVEIS_EXECUTOR = ('dificil', 'mcts')  # niveis cuja jogada e calculada no executor
+MAX_LINHA = 256
+TEMPO_INATIVO = 600.0  # segundos sem mensagens ate a ligacao ser fechada
+
+ESTATISTICAS = {'ligacoes': 0, 'ligacoes_ativas': 0, 'jogos': 0, 'jogadas_ia': 0}
+
+# -------------------------------------------------------------------------------------------------
+# Mensagens
+# -------------------------------------------------------------------------------------------------
+def _movimento_para_str(movimento: tuple) -> str:
+    """Representacao externa de um movimento ('a1' ou 'a1a2'), como no input manual."""
+    return ''.join(posicao_para_str(p) for p in movimento)
+
+def _estado_para_str(sessao: SessaoJogo) -> str:
+    """Mensagem TABULEIRO com as 9 casas pela ordem de leitura e o jogador com o turno."""
+    casas = ''.join(p if p != ' ' else '.' for linha in sessao.tabuleiro for p in linha)
+    return f'TABULEIRO {casas} {sessao.turno}'
+
+# -------------------------------------------------------------------------------------------------
+# Sessao de uma ligacao
+# -------------------------------------------------------------------------------------------------
+async def _jogada_computador(sessao: SessaoJogo, executor) -> tuple:
+    """Calcula a jogada do computador (no executor para os niveis lentos) e aplica-a."""
+    if sessao.nivel in NIVEIS_EXECUTOR and executor is not None:
+        ciclo = asyncio.get_running_loop()
+        movimento = await ciclo.run_in_executor(
+            executor, obter_movimento_auto, cria_copia_tabuleiro(sessao.tabuleiro), sessao.turno, sessao.nivel)
+    else:
+        movimento = obter_movimento_auto(sessao.tabuleiro, sessao.turno, sessao.nivel)
+    ESTATISTICAS['jogadas_ia'] += 1
+    return sessao.jogar(movimento)
+
+async def _avancar(sessao: SessaoJogo, executor, escrever) -> bool:
+    """
+    Joga pelo computador enquanto for a sua vez e envia o estado (e o fim do jogo).
+
+    Returns:
+        bool: False se a jogada do computador falhou (ja enviado ERRO); o jogo deve ser terminado.
+    """
+    while not sessao.terminado() and sessao.turno == sessao.cpu:
+        try:
+            movimento = await _jogada_computador(sessao, executor)
+        except Exception as erro:  # ex.: nivel sem tabela ou executor avariado; a ligacao continua
+            escrever(f'ERRO {str(erro) or type(erro).__name__}')
+            return False
+        escrever(f'CPU {_movimento_para_str(movimento)}')
+        escrever(_estado_para_str(sessao))
+    if sessao.terminado():
+        escrever(f'FIM [{sessao.resultado()}]')
+    return True
+
+async def _tratar_comando(linha: str, sessao, executor, escrever):
+    """
+    Executa uma linha do cliente.
+
+    Returns:
+        SessaoJogo | None | bool: A sessao (nova ou a mesma), None se o jogo terminou por erro
+            do computador, ou False para fechar a ligacao.
+    """
+    partes = linha.split()
+    if not partes:
+        return sessao
+    comando = partes[0].upper()
+
+    if comando == 'SAIR':
+        escrever('ADEUS')
+        return False
+    if comando == 'NOVO':
+        if len(partes) != 3:
+            escrever('ERRO NOVO <[X]|[O]> <nivel>')
+            return sessao
+        try:
+            sessao = SessaoJogo(partes[1], partes[2])
+        except ValueError as erro:
+            escrever(f'ERRO {erro}')
+            return sessao
+        ESTATISTICAS['jogos'] += 1
+        escrever(f'BEMVINDO {sessao.nivel}')
+        escrever(_estado_para_str(sessao))
+        return sessao if await _avancar(sessao, executor, escrever) else None
+    if sessao is None:
+        escrever('ERRO sem jogo (use NOVO)')
+        return sessao
+    if comando == 'LEGAIS':
+        legais = sessao.movimentos_legais() if sessao.turno == sessao.humano else ()
+        escrever(' '.join(['LEGAIS'] + [_movimento_para_str(m) for m in legais]))
+        return sessao
+    if sessao.terminado():
+        escrever('ERRO jogo terminado (use NOVO)')
+        return sessao
+
+    try:
+        sessao.jogar(_interpretar_movimento_manual(sessao.tabuleiro, sessao.humano, partes[0]))
+    except ValueError as erro:
+        escrever(f'ERRO {erro}')
+        return sessao
+    escrever(_estado_para_str(sessao))
+    return sessao if await _avancar(sessao, executor, escrever) else None
+
+async def _tratar_ligacao(leitor, escritor, executor=None, tempo_inativo=TEMPO_INATIVO) -> None:
+    """Atende uma ligacao ate o cliente sair, ficar inativo ou desligar."""
+    ESTATISTICAS['ligacoes'] += 1
+    ESTATISTICAS['ligacoes_ativas'] += 1
+
+    def escrever(mensagem: str) -> None:
+        escritor.write((mensagem + '\n').encode('utf-8'))
+
+    sessao = None
+    try:
+        while sessao is not False:
+            try:
+                dados = await asyncio.wait_for(leitor.readline(), tempo_inativo)
+            except ValueError:  # linha maior do que MAX_LINHA
+                escrever('ERRO linha demasiado longa')
+                break
+            if not dados:
+                break
+            sessao = await _tratar_comando(dados.decode('utf-8', 'replace'), sessao, executor, escrever)
+            await escritor.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        ESTATISTICAS['ligacoes_ativas'] -= 1
+        escritor.close()
+        try:
+            await escritor.wait_closed()
+        except ConnectionError:
+            pass
+
+# -------------------------------------------------------------------------------------------------
+# Servidor
+# -------------------------------------------------------------------------------------------------
+async def criar_servidor(anfitriao: str = '127.0.0.1', porta: int = 7777, executor=None,
+                         tempo_inativo: float = TEMPO_INATIVO):
+    """
+    Cria (e poe a escuta) o servidor de jogos.
+
+    Args:
+        anfitriao (str): Endereco de escuta.
+        porta (int): Porta de escuta (0 escolhe uma porta livre).
+        executor (Executor | None): Onde correm as jogadas dos niveis lentos
+            (None calcula-as no proprio ciclo de eventos).
+        tempo_inativo (float): Segundos sem mensagens ate uma ligacao ser fechada.
+
+    Returns:
+        asyncio.Server: O servidor (a porta real esta em server.sockets[0].getsockname()).
+    """
+    atender = partial(_tratar_ligacao, executor=executor, tempo_inativo=tempo_inativo)
+    return await asyncio.start_server(atender, anfitriao, porta, limit=MAX_LINHA)
+
+async def _servir(anfitriao: str, porta: int, trabalhadores: int, tempo_inativo: float) -> None:
+    """Corre o servidor ate ser interrompido."""
+    with ProcessPoolExecutor(max_workers=trabalhadores) as executor:
+        servidor = await criar_servidor(anfitriao, porta, executor, tempo_inativo)
+        endereco = servidor.sockets[0].getsockname()
+        sys.stderr.write(f'moinho: a escutar em {endereco[0]}:{endereco[1]} (niveis: {", ".join(NIVEIS)})\n')
+        async with servidor:
+            await servidor.serve_forever()
+
+def main(argumentos=None) -> int:
+    """Ponto de entrada da linha de comandos."""
+    parser = argparse.ArgumentParser(description='Servidor de jogos do Moinho 3x3.')
+    parser.add_argument('--anfitriao', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=7777)
+    parser.add_argument('--trabalhadores', type=int, default=None)
+    parser.add_argument('--tempo-inativo', type=float, default=TEMPO_INATIVO)
+    args = parser.parse_args(argumentos)
+    trabalhadores = args.trabalhadores or os.cpu_count() or 1
+    try:
+        asyncio.run(_servir(args.anfitriao, args.porta, trabalhadores, args.tempo_inativo))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+Tabelas de decisao pre-calculadas para as politicas de regras da IA (colocacao, 'facil' e 'normal').
+- Estas politicas sao funcoes puras de (tabuleiro, jogador): percorrem-se uma vez todos os tabuleiros
+  com no maximo 3 pecas de cada jogador e guarda-se a jogada escolhida por _calcular_movimento_auto.
+- Cada tabela e um bytes com uma entrada por chave de posicao (chave do tabuleiro * 2 + turno de 'O'),
+  com o codigo da jogada de projeto_final.movimento_para_codigo (0..89) ou SEM_JOGADA.
+- Na fase de colocacao todos os niveis jogam igual: o codigo (>= CODIGO_COLOCACAO) vem da tabela 'facil'.
+- As tabelas sao construidas a pedido (a primeira chamada de obter_tabelas).
+Tabela de movimentos legais (fase de movimento): a de projeto_final._construir_tabela_codigos, que o
+motor calcula em memoria; aqui so se guarda em disco (obter_tabela_codigos), para outras ferramentas:
+- Uma entrada por par de mascaras (pecas proprias, pecas do adversario), pelo indice em base 3
+  (casa i vale 3**i vezes 1 se for propria, 2 se for do adversario).
+- Guardada compacta: deslocamentos (array 'I' com 3**9 + 1 entradas) e um bytes com os codigos
+  origem * 9 + destino de todas as listas, pela ordem de leitura das origens e depois dos destinos
+  (a de obter_posicoes_adjacentes); sem movimentos, 'passar' com a primeira peca.
+Cache em disco:
+- As tabelas geradas ficam em ficheiros versionados na pasta de cache do utilizador
+  (MOINHO_CACHE, ou XDG_CACHE_HOME / LOCALAPPDATA / ~/.cache, em 'moinho-3x3'), um por grupo
+  ('politicas' e 'movimentos'), e sao lidas na primeira utilizacao em vez de recalculadas.
+- O nome e o cabecalho tem um resumo de _LIGACOES, LINHAS_VENCEDORAS e VERSAO_TABELAS: se as regras
+  mudarem, a cache antiga e ignorada, gerada de novo e substituida. VERSAO_TABELAS tem de mudar
+  quando mudarem as politicas ou o formato.
+- Sem permissao de escrita, as tabelas sao so calculadas em memoria.
+Uso:
+  definir_cache_movimentos(PoliticasTabeladas())   # obter_movimento_auto passa a consultar as tabelas
+  python3 tabelas.py                               # gera de novo a cache em disco
+"""
+import glob
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from projeto_final import (
+    LINHAS_VENCEDORAS, CODIGO_COLOCACAO, movimento_para_codigo, _LIGACOES, _MOVIMENTOS_CODIGOS,
+    _calcular_movimento_auto, _chave_tabuleiro, _tabuleiro_da_chave, _construir_tabela_codigos,
+)
+# -------------------------------------------------------------------------------------------------
+# Constantes
+# -------------------------------------------------------------------------------------------------
+NIVEIS_TABELADOS = ('facil', 'normal')
+NUM_POSICOES = 2 * 3 ** 9
+SEM_JOGADA = 255
+
+_TABELAS = None  # {nivel: bytes}, construido a pedido
+
+# Ficheiros da cache em disco
+VERSAO_TABELAS = 1
+_MAGICO = b'MOINHOTB'
+_CABECALHO = struct.Struct('<8sH32sH')  # magico, versao, resumo das regras, numero de blocos
+_TAMANHO_BLOCO = struct.Struct('<I')
+
+# -------------------------------------------------------------------------------------------------
+# Construcao
+# -------------------------------------------------------------------------------------------------
+def _posicoes_tabeladas():
+    """Gera (chave da posicao, tabuleiro, jogador) para os tabuleiros com no maximo 3 pecas de cada."""
+    for chave in range(3 ** 9):
+        tabuleiro = _tabuleiro_da_chave(chave)
+        casas = [p for linha in tabuleiro for p in linha]
+        if casas.count('X') <= 3 and casas.count('O') <= 3:
+            yield chave * 2, tabuleiro, 'X'
+            yield chave * 2 + 1, tabuleiro, 'O'
+
+def construir_tabelas() -> dict:
+    """
+    Calcula as tabelas de decisao com as funcoes originais.
+
+    Returns:
+        dict: {nivel: bytes de NUM_POSICOES codigos} para cada nivel de NIVEIS_TABELADOS.
+    """
+    tabelas = {nivel: bytearray([SEM_JOGADA]) * NUM_POSICOES for nivel in NIVEIS_TABELADOS}
+    for posicao, tabuleiro, jogador in _posicoes_tabeladas():
+        for nivel in NIVEIS_TABELADOS:
+            try:
+                movimento = _calcular_movimento_auto(tabuleiro, jogador, nivel)
+            except ValueError:
+                continue
+            if movimento:
+                tabelas[nivel][posicao] = movimento_para_codigo(movimento)
+    return {nivel: bytes(tabela) for nivel, tabela in tabelas.items()}
+
+def obter_tabelas() -> dict:
+    """Devolve as tabelas de decisao, lidas da cache em disco (ou construidas) na primeira chamada."""
+    global _TABELAS
+    if _TABELAS is None:
+        blocos = _blocos_em_cache('politicas', _blocos_politicas, [NUM_POSICOES] * len(NIVEIS_TABELADOS))
+        _TABELAS = dict(zip(NIVEIS_TABELADOS, blocos))
+    return _TABELAS
+
+def construir_tabela_movimentos() -> tuple:
+    """
+    A tabela de movimentos legais de projeto_final._construir_tabela_codigos, na forma compacta.
+
+    Returns:
+        tuple (array, bytes): (deslocamentos, codigos); os codigos do indice i estao em
+            codigos[deslocamentos[i]:deslocamentos[i + 1]].
+    """
+    deslocamentos, codigos = array('I', [0]), bytearray()
+    for lista in _construir_tabela_codigos():
+        codigos.extend(lista)
+        deslocamentos.append(len(codigos))
+    return deslocamentos, bytes(codigos)
+
+def _array_para_bytes(valores: array) -> bytes:
+    """Os bytes de um array, sempre little-endian."""
+    if sys.byteorder == 'big':
+        valores = array(valores.typecode, valores)
+        valores.byteswap()
+    return valores.tobytes()
+
+def _bytes_para_array(tipo: str, dados: bytes) -> array:
+    """Operacao inversa de _array_para_bytes."""
+    valores = array(tipo)
+    valores.frombytes(dados)
+    if sys.byteorder == 'big':
+        valores.byteswap()
+    return valores
+
+def _blocos_politicas() -> list:
+    """As tabelas de decisao como blocos da cache em disco (pela ordem de NIVEIS_TABELADOS)."""
+    return list(construir_tabelas().values())
+
+def _blocos_movimentos() -> list:
+    """A tabela de movimentos legais como blocos da cache em disco."""
+    deslocamentos, codigos = construir_tabela_movimentos()
+    return [_array_para_bytes(deslocamentos), codigos]
+
+def _ler_tabela_movimentos() -> tuple:
+    """(deslocamentos, codigos) da tabela de movimentos legais, lidos da cache em disco ou construidos."""
+    dados_deslocamentos, codigos = _blocos_em_cache('movimentos', _blocos_movimentos,
+                                                    [(3 ** 9 + 1) * array('I').itemsize, None])
+    return _bytes_para_array('I', dados_deslocamentos), codigos
+
+def obter_tabela_codigos() -> list:
+    """Devolve a tabela de movimentos legais como uma lista com os bytes de codigos de cada indice."""
+    deslocamentos, codigos = _ler_tabela_movimentos()
+    return [codigos[deslocamentos[i]:deslocamentos[i + 1]] for i in range(3 ** 9)]
+
+# -------------------------------------------------------------------------------------------------
+# Cache em disco
+# -------------------------------------------------------------------------------------------------
+def diretorio_cache() -> str:
+    """A pasta da cache: MOINHO_CACHE, ou 'moinho-3x3' na pasta de cache do utilizador."""
+    if os.environ.get('MOINHO_CACHE'):
+        return os.environ['MOINHO_CACHE']
+    base = (os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA')
+            or os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'moinho-3x3')
+
+def _resumo_regras() -> bytes:
+    """Resumo (SHA-256) das regras de que as tabelas dependem e da versao das tabelas."""
+    regras = repr((VERSAO_TABELAS, sorted(_LIGACOES.items()), LINHAS_VENCEDORAS))
+    return hashlib.sha256(regras.encode('utf-8')).digest()
+
+def _caminho_cache(nome: str) -> str:
+    """O ficheiro de cache do grupo 'nome' para as regras atuais."""
+    return os.path.join(diretorio_cache(), f'{nome}-{_resumo_regras().hex()[:16]}.bin')
+
+def _ler_cache(nome: str, tamanhos: list):
+    """
+    Le os blocos de um ficheiro de cache.
+
+    Args:
+        nome (str): O grupo de tabelas.
+        tamanhos (list): O tamanho esperado de cada bloco (None para qualquer tamanho).
+
+    Returns:
+        list | None: Os blocos (bytes), ou None se o ficheiro faltar, estiver desatualizado ou corrompido.
+    """
+    try:
+        with open(_caminho_cache(nome), 'rb') as ficheiro:
+            dados = ficheiro.read()
+    except OSError:
+        return None
+    if len(dados) < _CABECALHO.size:
+        return None
+    magico, versao, resumo, n = _CABECALHO.unpack_from(dados)
+    if (magico, versao, resumo, n) != (_MAGICO, VERSAO_TABELAS, _resumo_regras(), len(tamanhos)):
+        return None
+    blocos, inicio = [], _CABECALHO.size
+    for tamanho_esperado in tamanhos:
+        if inicio + _TAMANHO_BLOCO.size > len(dados):
+            return None
+        (tamanho,) = _TAMANHO_BLOCO.unpack_from(dados, inicio)
+        inicio += _TAMANHO_BLOCO.size
+        if tamanho_esperado not in (None, tamanho) or inicio + tamanho > len(dados):
+            return None
+        blocos.append(dados[inicio:inicio + tamanho])
+        inicio += tamanho
+    return blocos if inicio == len(dados) else None
+
+def _escrever_cache(nome: str, blocos: list) -> None:
+    """Escreve os blocos de forma atomica e apaga as caches antigas do mesmo grupo (ignora erros de escrita)."""
+    caminho = _caminho_cache(nome)
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as ficheiro:
+                ficheiro.write(_CABECALHO.pack(_MAGICO, VERSAO_TABELAS, _resumo_regras(), len(blocos)))
+                for bloco in blocos:
+                    ficheiro.write(_TAMANHO_BLOCO.pack(len(bloco)))
+                    ficheiro.write(bloco)
+            os.replace(temporario, caminho)
+        except OSError:
+            os.unlink(temporario)
+            raise
+        for antigo in glob.glob(os.path.join(os.path.dirname(caminho), f'{nome}-*.bin')):
+            if antigo != caminho:
+                os.unlink(antigo)
+    except OSError:
+        pass
+
+def _blocos_em_cache(nome: str, construir, tamanhos: list) -> list:
+    """Os blocos do grupo 'nome', lidos da cache ou construidos com construir() e guardados."""
+    blocos = _ler_cache(nome, tamanhos)
+    if blocos is None:
+        blocos = construir()
+        _escrever_cache(nome, blocos)
+    return blocos
+
+# -------------------------------------------------------------------------------------------------
+# Consulta
+# -------------------------------------------------------------------------------------------------
+def movimento_tabelado(tabuleiro: list, jogador: str, nivel: str):
+    """
+    Devolve a jogada das tabelas, se existir.
+
+    Args:
+        tabuleiro (list): O TAD tabuleiro.
+        jogador (str): O TAD peca da IA.
+        nivel (str): O nivel da IA.
+
+    Returns:
+        tuple | None: O tuplo de movimento, ou None se a posicao ou o nivel nao estiverem tabelados.
+    """
+    tabelas = obter_tabelas()
+    posicao = _chave_tabuleiro(tabuleiro) * 2 + (jogador == 'O')
+    codigo = tabelas['facil'][posicao]
+    if codigo != SEM_JOGADA and codigo < CODIGO_COLOCACAO:
+        if nivel not in tabelas:
+            return None
+        codigo = tabelas[nivel][posicao]
+    return _MOVIMENTOS_CODIGOS[codigo] if codigo != SEM_JOGADA else None
+
+class PoliticasTabeladas:
+    """
+    Fonte de jogadas para definir_cache_movimentos: responde pelas tabelas e calcula o resto
+    (niveis de pesquisa na fase de movimento) com _calcular_movimento_auto.
+    """
+    __slots__ = ('estatisticas',)
+
+    def __init__(self):
+        self.estatisticas = {'tabeladas': 0, 'calculadas': 0}
+
+    def obter(self, tabuleiro: list, jogador: str, nivel: str) -> tuple:
+        """
+        Devolve a jogada da IA.
+
+        Args:
+            tabuleiro (list): O TAD tabuleiro.
+            jogador (str): O TAD peca da IA.
+            nivel (str): O nivel da IA.
+
+        Returns:
+            tuple: O tuplo de movimento.
+        """
+        movimento = movimento_tabelado(tabuleiro, jogador, nivel)
+        if movimento is None:
+            self.estatisticas['calculadas'] += 1
+            return _calcular_movimento_auto(tabuleiro, jogador, nivel)
+        self.estatisticas['tabeladas'] += 1
+        return movimento
+
+def main() -> int:
+    """Gera de novo as tabelas e a cache em disco."""
+    for nome, construir in (('movimentos', _blocos_movimentos), ('politicas', _blocos_politicas)):
+        blocos = construir()
+        _escrever_cache(nome, blocos)
+        print(f'{nome}: {sum(map(len, blocos))} bytes em {_caminho_cache(nome)}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
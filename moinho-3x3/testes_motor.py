@@ -0,0 +1,687 @@
+from projeto_final import *
+from projeto_final import _ORDEM_LEITURA_MAP, _esta_na_fase_colocacao, _gerar_movimentos_validos
+
+import itertools
+
+num_tests = 0
+total_score = 0
+
+
+def verificar(condicao):
+    global num_tests, total_score
+    num_tests += 1
+    if condicao:
+        total_score += 1
+        print("Teste " + str(num_tests) + ": Passou")
+    else:
+        print("Teste " + str(num_tests) + ": Falhou")
+
+
+def tabuleiros_validos():
+    for valores in itertools.product((0, 1, -1), repeat=9):
+        t = tuplo_para_tabuleiro(tuple(tuple(valores[i:i + 3]) for i in (0, 3, 6)))
+        if eh_tabuleiro(t):
+            yield valores, t
+
+
+def jogadores_possiveis(valores):
+    x, o = valores.count(1), valores.count(-1)
+    if x + o < 6:
+        return ('X',) if x == o else ('O',)
+    return ('X', 'O')
+
+
+def mov_para_indices(m):
+    if len(m) == 1:
+        return -1, _ORDEM_LEITURA_MAP[posicao_para_str(m[0])]
+    return _ORDEM_LEITURA_MAP[posicao_para_str(m[0])], _ORDEM_LEITURA_MAP[posicao_para_str(m[1])]
+
+
+print("Inicio dos testes do motor")
+print("---------------------")
+
+VALIDOS = list(tabuleiros_validos())
+SEM_GANHADOR = [(v, t) for (v, t) in VALIDOS if obter_ganhador(t) == ' ']
+
+# Motor vetorizado (lote)
+import numpy as np
+import lote
+
+L = np.array([v for (v, _) in VALIDOS], dtype=np.int8)
+verificar(lote.obter_ganhadores_lote(L).tolist() ==
+          [peca_para_inteiro(obter_ganhador(t)) for (_, t) in VALIDOS])
+verificar(lote.fase_colocacao_lote(L).tolist() == [_esta_na_fase_colocacao(t) for (_, t) in VALIDOS])
+verificar(all(tabuleiros_iguais(a, t) for a, (_, t) in zip(lote.lote_para_tabuleiros(L[:200]), VALIDOS)))
+
+ok = True
+for nivel in ('facil', 'normal'):
+    for j in ('X', 'O'):
+        casos = [(v, t) for (v, t) in SEM_GANHADOR if j in jogadores_possiveis(v)]
+        origens, destinos = lote.escolher_movimentos_lote(
+            np.array([v for (v, _) in casos], dtype=np.int8), peca_para_inteiro(j), nivel)
+        esperado = [mov_para_indices(obter_movimento_auto(t, j, nivel)) for (_, t) in casos]
+        ok = ok and list(zip(origens.tolist(), destinos.tolist())) == esperado
+verificar(ok)
+
+ok = True
+casos = [(v, t) for (v, t) in SEM_GANHADOR if not _esta_na_fase_colocacao(t)][:500]
+mascara = lote.mascara_movimentos_lote(np.array([v for (v, _) in casos], dtype=np.int8), 1)
+for (_, t), m in zip(casos, mascara):
+    esperado = [mov_para_indices(mv) for mv in _gerar_movimentos_validos(t, 'X')]
+    ok = ok and list(zip(*np.nonzero(m))) == esperado
+verificar(ok)
+
+ganhadores, jogadas, _ = lote.simular_jogos_lote(np.zeros((3, 9), dtype=np.int8), 'facil', 'normal')
+verificar(len(set(ganhadores.tolist())) == 1 and (jogadas > 0).all())
+
+# Nivel 'mcts'
+import mcts
+
+t = tuplo_para_tabuleiro(((1, -1, -1), (-1, 1, 0), (0, 0, 1)))
+_, m = mcts.procurar_mcts(t, 'X', iteracoes=2000, semente=1)
+verificar(posicao_para_str(m[0]) == "c3" and posicao_para_str(m[1]) == "c2")
+m = obter_movimento_auto(cria_tabuleiro(), 'X', 'mcts')
+verificar(posicao_para_str(m[0]) == "b2")
+for pesquisa_sem_limite in (lambda: mcts.configurar_mcts(iteracoes=None),
+                            lambda: mcts.procurar_mcts(t, 'X', iteracoes=None, tempo=None)):
+    try:
+        pesquisa_sem_limite()
+        verificar(False)
+    except ValueError:
+        verificar(mcts.CONFIGURACAO['iteracoes'] == 3000)
+
+# Analise em massa
+import analisar
+
+t = tuplo_para_tabuleiro(((1, -1, -1), (-1, 1, 0), (0, 0, 1)))
+r = analisar.analisar_posicao(t, 'X', 'dificil')
+verificar(r['movimento'] == "c3c2" and r['pontuacao'] == 1 and r['nos'] > 0)
+posicoes = [(((1, 0, -1), (0, 1, -1), (1, -1, 0)), 'X'), ('lixo', None), (((0, 0, 0), (0, 0, 0), (0, 0, 0)), None)]
+r = list(analisar.analisar_fluxo(posicoes, 'normal', trabalhadores=1, tamanho_bloco=2))
+verificar([x['indice'] for x in r] == [0, 1, 2] and r[0]['movimento'] == "b2a2" and 'erro' in r[1]
+          and r[2]['movimento'] == "b2")
+
+# Tabela de transposicao
+import transposicao
+from projeto_final import _algoritmo_minimax
+
+MOVIMENTO = [t for (v, t) in SEM_GANHADOR if not _esta_na_fase_colocacao(t)]
+referencia = [_algoritmo_minimax(t, j, 5) for t in MOVIMENTO[::10] for j in ('X', 'O')]
+tabela = transposicao.TabelaTransposicao(1 << 12, partilhada=False)
+definir_tabela_transposicao(tabela)
+verificar([_algoritmo_minimax(t, j, 5) for t in MOVIMENTO[::10] for j in ('X', 'O')] == referencia)
+verificar(tabela.estatisticas()['acertos'] > 0)
+definir_tabela_transposicao(None)
+tabela.fechar()
+
+# Simetrias e tabela de valores aprendida
+import codificacao
+import aprendizagem
+
+verificar(len({codificacao.chave_canonica(k)[0] for k in range(codificacao.NUM_CHAVES)}) == 2862)
+t = tuplo_para_tabuleiro(((1, 0, -1), (0, 1, -1), (1, -1, 0)))
+c = codificacao.chave_tabuleiro(t)
+verificar(all(codificacao.chave_canonica(codificacao.aplicar_simetria(c, s))[0] == codificacao.chave_canonica(c)[0]
+              for s in range(8)))
+jogos = list(aprendizagem.gerar_autojogo(8, (('normal', 'normal'),), epsilon=0.5, semente=1))
+valores = aprendizagem.treinar_tabela_valores(jogos)
+verificar(len(valores) == 2 * codificacao.NUM_CHAVES and any(valores))
+t = tuplo_para_tabuleiro(((1, 0, -1), (0, 1, -1), (1, -1, 0)))
+m = aprendizagem.escolher_movimento_aprendido(t, 'X', valores)
+verificar(posicao_para_str(m[0]) == "b2" and posicao_para_str(m[1]) == "a2")
+tabela = transposicao.TabelaTransposicao(1 << 12, partilhada=False)
+list(aprendizagem.gerar_autojogo(2, semente=1, max_jogadas=20, tabela=tabela))
+verificar(tabela.estatisticas()['escritas'] > 0 and definir_tabela_transposicao(None) is None)
+tabela.fechar()
+caminho, aprendizagem.CAMINHO_POR_OMISSAO = aprendizagem.CAMINHO_POR_OMISSAO, '/nao/existe.bin'
+aprendizagem._VALORES = None
+for criar in (lambda: SessaoJogo('[X]', 'aprendido'), lambda: moinho('[X]', 'aprendido')):
+    try:
+        criar()
+        verificar(False)
+    except ValueError as erro:
+        verificar(str(erro) == ERRO_JOGO)
+aprendizagem._VALORES = valores
+verificar(SessaoJogo('[X]', 'aprendido').nivel == 'aprendido')
+verificar(analisar.analisar_posicao(t, 'X', 'aprendido')['movimento'] == "b2a2")
+try:
+    analisar.analisar_posicao(t, 'X', 'xpto')
+    verificar(False)
+except ValueError:
+    verificar(True)
+aprendizagem.CAMINHO_POR_OMISSAO, aprendizagem._VALORES = caminho, None
+
+# Sessao de jogo sem I/O
+sessao = SessaoJogo('[O]', 'normal')
+verificar(sessao.turno == 'X' and sessao.cpu == 'X' and len(sessao.movimentos_legais()) == 9)
+sessao.jogar((cria_posicao('b', '2'),))
+verificar(sessao.turno == 'O' and len(sessao.movimentos_legais()) == 8)
+try:
+    sessao.jogar((cria_posicao('b', '2'),))
+    verificar(False)
+except ValueError as erro:
+    verificar(str(erro) == 'SessaoJogo.jogar: jogada invalida')
+verificar(sessao.historico == [('X', (cria_posicao('b', '2'),))])
+t = tuplo_para_tabuleiro(((1, 0, -1), (0, 1, -1), (1, -1, 0)))
+sessao = SessaoJogo('[O]', 'normal', t, 'X')
+m = sessao.movimento_ia()
+verificar(posicao_para_str(m[0]) == "b2" and posicao_para_str(m[1]) == "a2")
+verificar(sessao.resultado() == 'X' and sessao.movimentos_legais() == () and eh_posicao_livre(t, cria_posicao('a', '2')))
+
+# Servidor asyncio
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import servidor
+
+async def _conversa(porta, mensagens):
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+    respostas = []
+    for mensagem, esperadas in mensagens:
+        escritor.write((mensagem + '\n').encode())
+        respostas.append([(await leitor.readline()).decode().strip() for _ in range(esperadas)])
+    escritor.close()
+    return respostas
+
+async def _testar_servidor():
+    with ThreadPoolExecutor(2) as executor:
+        srv = await servidor.criar_servidor(porta=0, executor=executor)
+        porta = srv.sockets[0].getsockname()[1]
+        async with srv:
+            return await asyncio.gather(
+                _conversa(porta, [('NOVO [O] dificil', 4), ('LEGAIS', 1), ('zz', 1), ('SAIR', 1)]),
+                _conversa(porta, [('b2', 1), ('NOVO [X] normal', 2), ('b2', 3)]))
+
+r1, r2 = asyncio.run(_testar_servidor())
+verificar(r1[0][0] == 'BEMVINDO dificil' and r1[0][1] == 'TABULEIRO ......... X' and r1[0][2].startswith('CPU '))
+verificar(len(r1[1][0].split()) == 9 and r1[2][0].startswith('ERRO') and r1[3] == ['ADEUS'])
+verificar(r2[0][0].startswith('ERRO') and r2[2][0] == 'TABULEIRO ....X.... O' and r2[2][2].endswith(' X'))
+executor = ThreadPoolExecutor(1)
+executor.shutdown()  # submit falha: a jogada do computador tem de terminar o jogo com ERRO
+saida = []
+sessao = asyncio.run(servidor._tratar_comando('NOVO [O] dificil', None, executor, saida.append))
+verificar(sessao is None and saida[0] == 'BEMVINDO dificil'
+          and saida[-1] == 'ERRO cannot schedule new futures after shutdown')
+
+class _ExecutorAvariado(ThreadPoolExecutor):
+    def submit(self, *args, **kwargs):
+        raise RuntimeError()  # sem mensagem: o cliente recebe o nome da excecao
+
+saida = []
+with _ExecutorAvariado(1) as executor:
+    asyncio.run(servidor._tratar_comando('NOVO [O] dificil', None, executor, saida.append))
+verificar(saida[-1] == 'ERRO RuntimeError')
+
+# Servico de melhor movimento (micro-lotes)
+import servico
+
+async def _testar_servico():
+    srv = servico.ServicoMelhorMovimento(janela=0.01)
+    t1 = tuplo_para_tabuleiro(((1, 0, -1), (0, 1, -1), (1, -1, 0)))
+    t2 = tuplo_para_tabuleiro(((1, 0, 0), (0, -1, 0), (0, 0, 0)))
+    respostas = await asyncio.gather(*[srv.pedir(t1, 'X', 'dificil') for _ in range(5)],
+                                     srv.pedir(t2, 'X', 'normal'))
+    repetida = await srv.pedir(t1, 'X', 'dificil')
+    with ThreadPoolExecutor(2) as executor:
+        srv_tcp = servico.ServicoMelhorMovimento(executor)
+        tcp = await servico.criar_servico(srv_tcp, porta=0)
+        async with tcp:
+            carga = await servico.gerar_carga('127.0.0.1', tcp.sockets[0].getsockname()[1], 60, 4, 'dificil', 20, 3)
+    return respostas, repetida, srv.relatorio(), carga, srv_tcp.relatorio()
+
+respostas, repetida, relatorio, carga, relatorio_tcp = asyncio.run(_testar_servico())
+verificar(respostas[:5] == ["b2a2"] * 5 and repetida == "b2a2"
+          and respostas[5] == analisar._movimento_para_str(obter_movimento_auto(tuplo_para_tabuleiro(((1, 0, 0), (0, -1, 0), (0, 0, 0))), 'X', 'normal')))
+verificar(relatorio['lotes'] == 1 and relatorio['duplicados'] == 4 and relatorio['calculados'] == 1
+          and relatorio['tabelados'] == 1 and relatorio['acertos_cache'] == 1)
+
+class _ExecutorContado(ThreadPoolExecutor):
+    def submit(self, *args, **kwargs):
+        self.tarefas = getattr(self, 'tarefas', 0) + 1
+        return super().submit(*args, **kwargs)
+
+async def _testar_servico_repartido(executor):
+    srv = servico.ServicoMelhorMovimento(executor, janela=0.01, trabalhadores=3)
+    posicoes = [t for (v, t) in SEM_GANHADOR if not _esta_na_fase_colocacao(t)][:7]
+    respostas = await asyncio.gather(*[srv.pedir(t, 'X', 'dificil') for t in posicoes])
+    return posicoes, respostas, srv.relatorio()
+
+with _ExecutorContado(3) as executor:
+    posicoes, respostas, relatorio = asyncio.run(_testar_servico_repartido(executor))
+verificar(executor.tarefas == 3 and relatorio['lotes'] == 1 and relatorio['calculados_executor'] == 7
+          and respostas == [analisar._movimento_para_str(obter_movimento_auto(t, 'X', 'dificil')) for t in posicoes])
+verificar(carga['pedidos'] == 60 and carga['erros'] == 0 and relatorio_tcp['calculados'] <= 20 and carga['p99_ms'] >= carga['p50_ms'])
+
+async def _testar_servico_com_falha():
+    srv = servico.ServicoMelhorMovimento(janela=0.01)
+    t1 = tuplo_para_tabuleiro(((1, 0, -1), (0, 1, -1), (1, -1, 0)))
+    falhas = await asyncio.gather(srv.pedir(t1, 'X', 'aprendido'), srv.pedir(t1, 'X', 'normal'),
+                                return_exceptions=True)
+    return falhas, await srv.pedir(t1, 'X', 'dificil'), srv.relatorio()
+
+aprendizagem._VALORES = aprendizagem.array('b')  # tabela vazia: o nivel 'aprendido' falha no calculo
+falhas, seguinte, relatorio = asyncio.run(_testar_servico_com_falha())
+aprendizagem._VALORES = None
+verificar(isinstance(falhas[0], IndexError) and falhas[1] == "b2a2" and seguinte == "b2a2"
+          and relatorio['erros'] == 1 and relatorio['lotes'] == 2)
+
+# Codigo compacto de sessoes
+import os
+import tempfile
+
+sessao = SessaoJogo('[O]', 'mcts', tuplo_para_tabuleiro(((1, 0, -1), (0, 1, -1), (1, -1, 0))), 'X')
+sessao.jogadas = 12
+codigo = codificacao.codificar_sessao(sessao)
+copia = codificacao.descodificar_sessao(codigo)
+verificar(0 <= codigo < 2 ** 32 and not _esta_na_fase_colocacao(copia.tabuleiro)
+          and (copia.tabuleiro, copia.turno, copia.nivel, copia.jogadas, copia.humano) == (sessao.tabuleiro, 'X', 'mcts', 12, 'O'))
+verificar(all(codificacao.descodificar_estado(codificacao.codificar_estado(t, j, 'normal', 5))[:4] == (t, j, 'normal', 5)
+              for (v, t) in VALIDOS[::7] for j in ('X', 'O')))
+codigos = codificacao.codificar_sessoes([sessao, SessaoJogo()])
+verificar(codigos.itemsize == 4 and [s.nivel for s in codificacao.descodificar_sessoes(codigos)] == ['mcts', 'facil'])
+with tempfile.TemporaryDirectory() as pasta:
+    caminho = os.path.join(pasta, 'sessoes.bin')
+    codificacao.guardar_sessoes({2 ** 40: sessao, 3: codigos[1]}, caminho)
+    verificar(codificacao.carregar_sessoes(caminho) == {3: codigos[1], 2 ** 40: codigo})
+try:
+    codificacao.descodificar_estado(3 ** 9)
+    verificar(False)
+except ValueError as erro:
+    verificar(str(erro) == 'descodificar_estado: codigo invalido')
+
+# Protocolo de texto (estilo UCI)
+import time
+import protocolo
+
+saida = []
+motor = protocolo.Motor(saida.append)
+for comando in ('uci', 'position board X.O.XOXO. X', 'go depth 4', 'isready'):
+    motor.tratar(comando)
+motor.esperar()
+verificar(saida[2] == 'uciok' and saida[3].startswith('info depth 1 score cp 100') and saida[3].endswith('pv b2a2')
+          and 'bestmove b2a2' in saida and 'readyok' in saida)
+saida.clear()
+motor.tratar('position startpos moves b2 a1 c3 a3 c1 b3 b2a2')
+motor.tratar('go infinite')
+time.sleep(0.2)
+verificar(not any(l.startswith('bestmove') for l in saida) and motor._limites == {'infinite': True})
+motor.tratar('stop')
+motor.esperar()
+verificar(saida[-1].startswith('bestmove ') and saida[-2].startswith('info depth'))
+saida.clear()
+motor.tratar('position board XO..XO.OX X')  # empate: 'infinite' continua a aprofundar
+motor.tratar('go infinite')
+time.sleep(0.5)
+motor.tratar('stop')
+motor.esperar()
+verificar(max(int(l.split()[2]) for l in saida if l.startswith('info depth')) > protocolo.PROFUNDIDADE_POR_OMISSAO
+          and saida[-1].startswith('bestmove '))
+saida.clear()
+motor.tratar('go ponder')
+time.sleep(0.1)
+verificar(motor._limites == {'ponder': True, 'depth': protocolo.PROFUNDIDADE_POR_OMISSAO}
+          and not any(l.startswith('bestmove') for l in saida))
+motor.tratar('ponderhit')
+motor.esperar()
+verificar(saida[-1].startswith('bestmove '))
+saida.clear()
+motor = protocolo.Motor(saida.append)
+motor.tratar('position startpos moves b2 zz')
+motor.tratar('go depth 1')
+motor.tratar('quit')
+verificar(saida[0].startswith('info string posicao invalida') and saida[-1] == 'bestmove b2')
+
+# Difusao para espectadores (deltas)
+import difusao
+
+try:
+    difusao.CanalJogo().subscrever(1)
+    verificar(False)
+except ValueError as erro:
+    verificar(str(erro) == 'subscrever: capacidade invalida (minimo 2)')
+
+async def _testar_difusao():
+    sessao = SessaoJogo('[X]', 'facil')
+    canal = difusao.CanalJogo(intervalo=4)
+    rapido, lento = canal.subscrever(16), canal.subscrever(3)
+    vista = None
+    for _ in range(10):
+        canal.publicar(sessao.turno, sessao.movimento_ia())
+        for mensagem in rapido.pendentes():
+            vista = difusao.aplicar_mensagem(vista, mensagem)
+    tardio = canal.subscrever(16)
+    canal.terminar('X')
+    vistas = []
+    for subscritor in (lento, tardio):
+        v = None
+        for mensagem in subscritor.pendentes():
+            v = difusao.aplicar_mensagem(v, mensagem)
+        vistas.append(v)
+    casas = ''.join(p if p != ' ' else '.' for linha in sessao.tabuleiro for p in linha)
+    srv = await difusao.criar_servidor_espectadores({'1': canal}, porta=0)
+    async with srv:
+        leitor, escritor = await asyncio.open_connection('127.0.0.1', srv.sockets[0].getsockname()[1])
+        escritor.write(b'VER 1\n')
+        linhas = [l.decode().strip() async for l in leitor]
+    return casas, vista, vistas, lento.ressincronizacoes, linhas
+
+casas, vista, (vista_lenta, vista_tardia), ressincronizacoes, linhas = asyncio.run(_testar_difusao())
+verificar(''.join(vista['casas']) == casas and vista['sequencia'] == 10)
+verificar(''.join(vista_lenta['casas']) == casas and ressincronizacoes > 0 and vista_lenta['ganhador'] == 'X')
+verificar(''.join(vista_tardia['casas']) == casas and linhas[0] == 'S 8 ' + linhas[0][4:] and len(linhas) == 4 and linhas[-1] == 'F [X]')
+
+# Registos binarios de jogos
+import io
+import registos
+
+verificar([registos._str_para_codigo(registos._codigo_para_str(c)) for c in range(90)] == list(range(90)))
+jogos = jogos[:4] + [{'niveis': ['humano', 'dificil'], 'jogadas': ['b2', 'b2'], 'vencedor': ' '}]
+memoria = io.BytesIO()
+escritor = registos.EscritorRegistos(memoria)
+for jogo in jogos:
+    escritor.escrever(jogo)
+verificar(len(memoria.getvalue()) == 10 + 5 * 5 + sum(len(j['jogadas']) for j in jogos))
+memoria.seek(0)
+verificar(list(registos.ler_registos(memoria)) == jogos)
+memoria.seek(0)
+verificar(registos.verificar_registos(registos.ler_registos_brutos(memoria), tamanho_bloco=2)
+          == {'jogos': 5, 'jogadas': sum(len(j['jogadas']) for j in jogos), 'invalidos': 1, 'vencedor_errado': 0})
+posicoes = registos.reproduzir_jogo(bytes(registos._str_para_codigo(j) for j in jogos[0]['jogadas']))
+verificar(posicoes[0] == 0 and len(posicoes) == len(jogos[0]['jogadas']) + 1)
+# O mesmo tabuleiro com 'X' e com 'O' a jogar: o byte 13 + 128 de 'X' nao pode usar a transicao de 'O'
+valido = bytes(registos._str_para_codigo(j) for j in ['a1', 'b1', 'c1', 'a2', 'b2', 'c2', 'b2a3', 'b1b2'])
+corrompido = bytes(registos._str_para_codigo(j) for j in ['a1', 'b1', 'c1', 'a2', 'a3', 'c2']) + bytes([13 + 128])
+for ordem in ((corrompido, valido), (valido, corrompido)):
+    registos._TRANSICOES.clear()
+    resultados = []
+    for codigos in ordem:
+        try:
+            resultados.append(len(registos.reproduzir_jogo(codigos)))
+        except ValueError:
+            resultados.append(None)
+    verificar(sorted(resultados, key=str) == [9, None])
+
+# Base de jogos indexada por posicao
+import base_dados
+
+with tempfile.TemporaryDirectory() as pasta:
+    caminho = os.path.join(pasta, 'jogos.db')
+    memoria.seek(0)
+    verificar(base_dados.construir_base(registos.ler_registos_brutos(memoria), caminho)['invalidos'] == 1)
+    base = base_dados.BaseJogos(caminho)
+    vazio = cria_tabuleiro()
+    resultados = [j['vencedor'] for j in jogos[:4]]
+    verificar(base.jogos == 4 and base.jogo(2) == jogos[2]
+              and base.estatisticas(vazio, 'X') == {'jogos': 4, 'vitorias_x': resultados.count('X'),
+                                                   'empates': resultados.count(' '), 'vitorias_o': resultados.count('O')})
+    canto_a1 = [j for j in range(4) if jogos[j]['jogadas'][0] == 'a1']
+    canto_c3 = tuplo_para_tabuleiro(((0, 0, 0), (0, 0, 0), (0, 0, 1)))
+    verificar(base.ocorrencias(vazio, 'X') == [(j, 0) for j in range(4)]
+              and [j for (j, n) in base.ocorrencias(canto_c3, 'O') if n == 1] == [j for j in range(4) if jogos[j]['jogadas'][0] in ('a1', 'c1', 'a3', 'c3')])
+    base.fechar()
+
+# Testes de carga do moinho com E/S simulada
+import sys
+import carga_moinho
+
+relatorio = carga_moinho.executar_carga(20, '[X]', 'dificil', 'aleatorio', semente=3, tamanho_bloco=7)
+verificar(relatorio['jogos'] == relatorio['concluidos'] == 20 and relatorio['vitorias_humano'] == 0
+          and relatorio['io']['turnos'] == relatorio['validacao']['turnos'] == relatorio['jogadas_humano'] > 0
+          and relatorio['ia']['turnos'] == relatorio['jogadas_ia'] > 0 and relatorio['jogos_por_segundo'] > 0)
+relatorio = carga_moinho.executar_carga(guioes=[['b2', 'zz'], ['b2']], nivel='facil', capturar=True)
+verificar(relatorio['concluidos'] == 0 and relatorio['interrompidos'] == 2 and relatorio['jogadas_humano'] == 4
+          and relatorio['saidas'][1].startswith('Bem-vindo') and sys.stdin is sys.__stdin__
+          and obter_movimento_auto is carga_moinho.projeto_final.obter_movimento_auto)
+
+# Desenhos em cache e saidas do moinho
+
+tabuleiro = tuplo_para_tabuleiro(((1, 0, -1), (0, 1, 0), (-1, 0, 0)))
+verificar(tabuleiro_para_str(tabuleiro) is tabuleiro_para_str(tuplo_para_tabuleiro(((1, 0, -1), (0, 1, 0), (-1, 0, 0))))
+          and tabuleiro_para_str(tabuleiro).splitlines()[1] == '1 [X]-[ ]-[O]')
+destino = io.StringIO()
+saida = SaidaBufferizada(destino)
+saida.escrever('ola')
+saida.escrever_tabuleiro(tabuleiro)
+verificar(destino.getvalue() == '' and (saida.despejar() or destino.getvalue() == 'ola\n' + tabuleiro_para_str(tabuleiro) + '\n'))
+relatorio = carga_moinho.executar_carga(guioes=[['b2']], nivel='facil', capturar=True)
+silencioso = carga_moinho.executar_carga(guioes=[['b2']], nivel='facil', capturar=True, silencioso=True)
+sys.stdin, sys.stdout = io.StringIO('b2\n'), io.StringIO()
+try:
+    moinho('[X]', 'facil', SaidaBufferizada())
+except ValueError:
+    pass
+bufferizado, sys.stdin, sys.stdout = sys.stdout.getvalue(), sys.__stdin__, sys.__stdout__
+verificar(bufferizado == relatorio['saidas'][0] and silencioso['saidas'][0] == 'Turno do jogador. Escolha uma posicao: ' * 2)
+
+# Cache de jogadas da IA
+import cache_movimentos
+
+cache = cache_movimentos.CacheMovimentos(16)
+sem_cache = carga_moinho.executar_carga(6, '[O]', 'dificil', 'aleatorio', semente=4, capturar=True)
+anterior = definir_cache_movimentos(cache)
+try:
+    com_cache = carga_moinho.executar_carga(6, '[O]', 'dificil', 'aleatorio', semente=4, capturar=True)
+    verificar(anterior is None and com_cache['saidas'] == sem_cache['saidas'] and len(cache) == 16
+              and cache.estatisticas['acertos'] > 0 and cache.estatisticas['despejos'] > 0
+              and 0 < cache.taxa_acertos < 1)
+finally:
+    definir_cache_movimentos(anterior)
+simetrica = cache_movimentos.CacheMovimentos(simetrias=True)
+canto_a1 = tuplo_para_tabuleiro(((1, 0, 0), (0, 0, 0), (0, 0, 0)))
+canto_c3 = tuplo_para_tabuleiro(((0, 0, 0), (0, 0, 0), (0, 0, 1)))
+bloqueado = tuplo_para_tabuleiro(((1, -1, -1), (0, 1, -1), (0, 0, 1)))
+verificar(simetrica.obter(canto_a1, 'O', 'facil') == obter_movimento_auto(canto_a1, 'O', 'facil')
+          and simetrica.obter(canto_c3, 'O', 'normal') == obter_movimento_auto(canto_c3, 'O', 'normal')
+          and simetrica.obter(bloqueado, 'O', 'normal') == _gerar_movimentos_validos(bloqueado, 'O')[0]
+          and simetrica.estatisticas['acertos'] == 1)
+
+# Tabelas de decisao das politicas de regras
+import tabelas
+from projeto_final import _calcular_movimento_auto
+
+diferentes = 0
+for posicao, tabuleiro, peca in tabelas._posicoes_tabeladas():
+    for nivel in tabelas.NIVEIS_TABELADOS:
+        try:
+            esperado = _calcular_movimento_auto(tabuleiro, peca, nivel) or None
+        except ValueError:
+            esperado = None
+        diferentes += tabelas.movimento_tabelado(tabuleiro, peca, nivel) != esperado
+verificar(diferentes == 0 and all(len(t) == tabelas.NUM_POSICOES for t in tabelas.obter_tabelas().values()))
+politicas = tabelas.PoliticasTabeladas()
+anterior = definir_cache_movimentos(politicas)
+try:
+    tabelado = carga_moinho.executar_carga(6, '[O]', 'normal', 'aleatorio', semente=4, capturar=True)
+finally:
+    definir_cache_movimentos(anterior)
+verificar(tabelado['saidas'] == carga_moinho.executar_carga(6, '[O]', 'normal', 'aleatorio', semente=4, capturar=True)['saidas']
+          and politicas.estatisticas['calculadas'] == 0 and politicas.estatisticas['tabeladas'] > 0
+          and tabelas.movimento_tabelado(tuplo_para_tabuleiro(((1, -1, 0), (0, 1, -1), (1, 0, -1))), 'X', 'dificil') is None)
+
+# Tabelas de mascaras (vitoria, ameacas e validacao)
+from projeto_final import _TEM_LINHA, _NUM_PECAS, _LINHAS_AMEACADAS, _CASAS_VENCEDORAS, _mascaras, _escolher_colocacao_ia
+
+verificar(len(_TEM_LINHA) == 512 and _TEM_LINHA[0b000000111] and _TEM_LINHA[0b001001001] and not _TEM_LINHA[0b100010001]
+          and _NUM_PECAS[0b101010101] == 5 and _LINHAS_AMEACADAS[0b000000011] == (0b000000111,)
+          and _CASAS_VENCEDORAS[0b000010001] == 0 and _CASAS_VENCEDORAS[0b000001011] == 0b001000100)
+tabuleiro = tuplo_para_tabuleiro(((1, 1, 0), (-1, 0, 0), (-1, 0, 0)))
+verificar(_mascaras(tabuleiro) == (0b000000011, 0b001001000) and obter_ganhador(tabuleiro) == ' '
+          and not eh_tabuleiro([['X', 0, ' '], [' '] * 3, [' '] * 3]) and not eh_tabuleiro([['X'] * 3, ['O'] * 3, [' '] * 3])
+          and eh_tabuleiro(tabuleiro) and _escolher_colocacao_ia(tabuleiro, 'X') == (cria_posicao('c', '1'),)
+          and _escolher_colocacao_ia(tabuleiro, 'O') == (cria_posicao('c', '1'),))
+
+# Tabela de movimentos legais por mascaras
+from projeto_final import _tabuleiro_da_chave, _posicoes_adjacentes_livres
+
+def movimentos_por_regras(tabuleiro, peca):
+    jogadas = tuple((p, a) for p in obter_posicoes_jogador(tabuleiro, peca) for a in _posicoes_adjacentes_livres(tabuleiro, p))
+    proprias = obter_posicoes_jogador(tabuleiro, peca)
+    return jogadas or (((proprias[0], proprias[0]),) if proprias else ())
+
+verificar(all(_gerar_movimentos_validos(t, peca) == movimentos_por_regras(t, peca)
+              for t in map(_tabuleiro_da_chave, range(3 ** 9)) for peca in ('X', 'O')))
+deslocamentos, codigos = tabelas.construir_tabela_movimentos()
+verificar(len(deslocamentos) == 3 ** 9 + 1 and deslocamentos[-1] == len(codigos)
+          and codigos[deslocamentos[1]:deslocamentos[2]] == bytes([1, 3, 4]))
+
+# projeto_final sozinho (sem tabelas.py): o gerador de movimentos calcula a sua tabela
+import shutil
+import subprocess
+
+with tempfile.TemporaryDirectory() as pasta:
+    shutil.copy('projeto_final.py', pasta)
+    ambiente = {**os.environ, 'HOME': pasta, 'MOINHO_CACHE': pasta, 'PYTHONDONTWRITEBYTECODE': '1'}
+    resultado = subprocess.run(
+        [sys.executable, '-c', "from projeto_final import *; "
+         "print(obter_movimento_auto(tuplo_para_tabuleiro(((1, 0, -1), (0, 1, -1), (1, -1, 0))), 'X', 'dificil'))"],
+        cwd=pasta, capture_output=True, text=True, env=ambiente)
+    verificar(resultado.returncode == 0 and resultado.stdout.strip() == "(('b', '2'), ('a', '2'))"
+              and os.listdir(pasta) == ['projeto_final.py'])
+
+# Cache em disco das tabelas geradas
+with tempfile.TemporaryDirectory() as pasta:
+    anterior = os.environ.get('MOINHO_CACHE')
+    os.environ['MOINHO_CACHE'] = pasta
+    try:
+        tabela = tabelas.obter_tabela_codigos()
+        caminho = tabelas._caminho_cache('movimentos')
+        verificar(os.path.exists(caminho) and tabela == [codigos[deslocamentos[i]:deslocamentos[i + 1]] for i in range(3 ** 9)]
+                  and tabelas._ler_cache('movimentos', [None, None]) == tabelas._blocos_movimentos())
+        with open(caminho, 'r+b') as ficheiro:
+            ficheiro.truncate(100)
+        invalido = tabelas._ler_cache('movimentos', [None, None])
+        tabelas.VERSAO_TABELAS += 1
+        try:
+            verificar(invalido is None and tabelas.obter_tabela_codigos() == tabela
+                      and os.listdir(pasta) == [os.path.basename(tabelas._caminho_cache('movimentos'))] != [os.path.basename(caminho)])
+        finally:
+            tabelas.VERSAO_TABELAS -= 1
+    finally:
+        if anterior is None:
+            del os.environ['MOINHO_CACHE']
+        else:
+            os.environ['MOINHO_CACHE'] = anterior
+
+# Instantaneos da tabela de transposicao
+with tempfile.TemporaryDirectory() as pasta:
+    quente = transposicao.TabelaTransposicao(1 << 12, partilhada=False)
+    anterior = definir_tabela_transposicao(quente)
+    try:
+        esperado = obter_movimento_auto(tuplo_para_tabuleiro(((1, -1, 0), (0, 1, -1), (1, 0, -1))), 'O', 'dificil')
+    finally:
+        definir_tabela_transposicao(anterior)
+    caminho_a, caminho_b = os.path.join(pasta, 'a.tt'), os.path.join(pasta, 'b.tt')
+    n = transposicao.guardar_instantaneo(quente, caminho_a)
+    quente.guardar(12345, 3, 1, 0, 127)
+    transposicao.guardar_instantaneo(quente, caminho_b)
+    verificar(n > 0 and os.path.getsize(caminho_a) == 16 + 8 * n
+              and transposicao.juntar_instantaneos([caminho_a, caminho_b], caminho_a) == n + 1)
+    fria = transposicao.TabelaTransposicao(1 << 10, partilhada=False)
+    fria.guardar(12345, 2, -1, 0, 127)
+    carregadas = transposicao.carregar_instantaneo(fria, caminho_a)
+    anterior = definir_tabela_transposicao(fria)
+    try:
+        verificar(0 < carregadas <= n + 1 and fria.procurar(12345, 3) == (1, 0, 127)
+                  and obter_movimento_auto(tuplo_para_tabuleiro(((1, -1, 0), (0, 1, -1), (1, 0, -1))), 'O', 'dificil') == esperado
+                  and fria.estatisticas()['acertos'] > 0)
+    finally:
+        definir_tabela_transposicao(anterior)
+    with open(caminho_b, 'r+b') as ficheiro:
+        ficheiro.write(b'OUTRO')
+    try:
+        transposicao.ler_instantaneo(caminho_b)
+        verificar(False)
+    except ValueError:
+        verificar(True)
+
+# Modo de confianca: as mesmas jogadas, e as funcoes publicas continuam a validar
+def jogar_sessoes():
+    historicos = []
+    for nivel in ('facil', 'normal', 'dificil'):
+        sessao = SessaoJogo('[O]', nivel)
+        while not sessao.terminado() and sessao.jogadas < 30:
+            sessao.movimento_ia()
+        historicos.append((sessao.historico, sessao.tabuleiro))
+    return historicos
+
+validadas = jogar_sessoes()
+anterior = definir_modo_confianca(True)
+try:
+    verificar(anterior is False and jogar_sessoes() == validadas)
+    try:
+        cria_posicao('d', '1')
+        verificar(False)
+    except ValueError as erro:
+        verificar(str(erro) == 'cria_posicao: argumentos invalidos')
+    try:
+        move_peca(tuplo_para_tabuleiro(((1, 0, 0), (0, -1, 0), (0, 0, 0))), cria_posicao('a', '1'), cria_posicao('c', '1'))
+        verificar(False)
+    except ValueError as erro:
+        verificar(str(erro) == 'move_peca: destino nao adjacente')
+finally:
+    definir_modo_confianca(anterior)
+
+# Codificacao inteira dos movimentos
+from projeto_final import _gerar_codigos_validos, _executar_codigo, _executar_movimento
+verificar([movimento_para_codigo(codigo_para_movimento(c)) for c in range(NUM_CODIGOS)] == list(range(NUM_CODIGOS))
+          and codigo_para_movimento(4 * 9 + 4) == cria_mov_passar(cria_posicao('b', '2'))
+          and codigo_para_movimento(CODIGO_COLOCACAO + 2) == cria_mov_colocacao(cria_posicao('c', '1'))
+          and movimento_para_codigo((cria_posicao('a', '2'), cria_posicao('a', '1'))) == 27)
+for invalido in ((('d', '1'),), [('a', '1')], (('a', '1'), [])):
+    try:
+        movimento_para_codigo(invalido)
+        verificar(False)
+    except ValueError as erro:
+        verificar(str(erro) == 'movimento_para_codigo: movimento invalido')
+verificar(all(tuple(map(codigo_para_movimento, _gerar_codigos_validos(t, peca))) == _gerar_movimentos_validos(t, peca)
+              and all(_executar_codigo(cria_copia_tabuleiro(t), peca, c)
+                      == _executar_movimento(cria_copia_tabuleiro(t), peca, codigo_para_movimento(c))
+                      for c in _gerar_codigos_validos(t, peca))
+              for t in MOVIMENTO[::5] for peca in ('X', 'O')))
+
+# Perft e posicoes alcancaveis
+import perft
+profundas = perft.perft(8, unicas=True)
+verificar([linha['folhas'] for linha in perft.perft(6)] == [9, 72, 504, 3024, 15120, 56160]
+          == [linha['folhas'] for linha in profundas[:6]]
+          and [linha['unicas'] for linha in profundas] == [9, 72, 252, 756, 1260, 1560, 1560, 1560])
+alcancaveis = list(perft.posicoes_alcancaveis())
+verificar(len(alcancaveis) == len({posicao for posicao, _, _, _ in alcancaveis}) == 5470
+          and alcancaveis[0][:2] == (0, cria_tabuleiro()))
+verificar(perft.verificar_gerador(_gerar_movimentos_validos, perft.movimentos_por_regras)['diferentes'] == 0
+          and perft.verificar_gerador(lambda t, j: _gerar_movimentos_validos(t, j)[::-1])['diferentes'] > 0)
+
+# Exportacao de posicoes etiquetadas (analise retrograda)
+import random
+import conjunto_dados
+from projeto_final import _chave_tabuleiro
+valores_teoricos, distancias_teoricas, melhores_teoricas = conjunto_dados.resolver_jogo()
+fechadas = [(t, j) for t in MOVIMENTO[::15] for j in ('X', 'O')
+            if 0 <= distancias_teoricas[_chave_tabuleiro(t) * 2 + (j == 'O')] <= 5]
+verificar(valores_teoricos[0] == 0 and len(fechadas) > 20
+          and all(_algoritmo_minimax(t, j, 5)[0] == valores_teoricos[_chave_tabuleiro(t) * 2 + (j == 'O')]
+                  for t, j in fechadas))
+with tempfile.TemporaryDirectory() as pasta:
+    prefixo = os.path.join(pasta, 'todas')
+    contagens = conjunto_dados.exportar_conjunto(conjunto_dados.posicoes_enumeradas(), prefixo, tamanho_bloco=2000)
+    blocos = list(conjunto_dados.ler_conjunto(prefixo))
+    chaves = np.concatenate([b['chaves'] for b in blocos])
+    verificar(contagens == {'linhas': 5470, 'ficheiros': 3, 'repetidas': 0} and len(set(chaves.tolist())) == 5470
+              and 'resultados' not in blocos[0]
+              and (blocos[1]['tabuleiros'] == lote.tabuleiros_para_lote(
+                  [_tabuleiro_da_chave(int(c) >> 1) for c in blocos[1]['chaves']])).all()
+              and (blocos[1]['melhores'] == [melhores_teoricas[int(c)] for c in blocos[1]['chaves']]).all())
+    simetricas = conjunto_dados.exportar_conjunto(conjunto_dados.posicoes_enumeradas(), os.path.join(pasta, 'sim'),
+                                                  simetrias=True)
+    verificar(simetricas['linhas'] + simetricas['repetidas'] == 5470 and simetricas['linhas'] == 756)
+    jogos = [aprendizagem.jogar_autojogo('normal', 'facil', gerador=random.Random(s)) for s in range(3)]
+    contagens = conjunto_dados.exportar_conjunto(conjunto_dados.posicoes_de_jogos(jogos), os.path.join(pasta, 'jogos'))
+    bloco = next(conjunto_dados.ler_conjunto(os.path.join(pasta, 'jogos')))
+    verificar(contagens['linhas'] == sum(len(j['jogadas']) + 1 for j in jogos)
+              and (bloco['resultados'][:len(jogos[0]['jogadas']) + 1] == {'X': 1, 'O': -1}.get(jogos[0]['vencedor'], 0)).all())
+
+# obter_ganhador com casas que nao sao TAD peca (como na versao original)
+verificar(obter_ganhador([['X', 'Y', ' '], [' ', ' ', ' '], [' ', ' ', ' ']]) == ' '
+          and obter_ganhador([['X', 'Y', ' '], ['X', ' ', ' '], ['X', ' ', ' ']]) == 'X')
+
+print("---------------------")
+print("Pontuacao final: ", total_score, "/", num_tests)
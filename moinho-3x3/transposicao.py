@@ -0,0 +1,373 @@
+"""
+Tabela de transposicao de tamanho fixo para o Minimax, partilhavel entre processos.
+- A memoria e um bloco de multiprocessing.shared_memory (ou um bytearray, se for local),
+  com entradas de 8 bytes: (verificacao: uint32, dados: uint32).
+- dados = valor+1 (2 bits) | limite (2 bits) | movimento (7 bits) | trabalhador (8 bits) | profundidade (6 bits)
+- verificacao = chave_completa XOR dados: a escrita nao usa trincos (lock-free) e uma leitura
+  apanhada a meio de uma escrita de outro processo e simplesmente rejeitada.
+- Cada trabalhador escreve os seus contadores numa zona propria do cabecalho, para que as
+  estatisticas (incluindo os acertos em entradas escritas por outro trabalhador) sejam globais.
+- Instantaneos em disco: as entradas ocupadas sao guardadas como pares (chave_completa, dados) de
+  uint32 little-endian, depois de um cabecalho com as versoes do ficheiro e das entradas. Podem ser
+  carregados numa tabela de qualquer tamanho (juntando-se as entradas ja existentes) e juntados.
+Funcoes publicas:
+- TabelaTransposicao, criar_tabela_partilhada, anexar_tabela_partilhada, inicializar_trabalhador
+- guardar_instantaneo, ler_instantaneo, carregar_instantaneo, juntar_instantaneos
+Uso:
+  python3 transposicao.py juntar a.tt b.tt -o todos.tt
+"""
+import argparse
+import struct
+import sys
+from array import array
+from multiprocessing import shared_memory
+
+from projeto_final import definir_tabela_transposicao
+# -------------------------------------------------------------------------------------------------
+# Layout do bloco de memoria
+# -------------------------------------------------------------------------------------------------
+_MAGICO = b'MOINHOTT'
+_CABECALHO = struct.Struct('<8sII')          # magico, versao, numero de entradas
+_VERSAO = 1
+_MAX_TRABALHADORES = 256
+_CONTADORES = ('acertos', 'acertos_cruzados', 'falhas', 'escritas')
+_INICIO_CONTADORES = 64
+_INICIO_ENTRADAS = _INICIO_CONTADORES + _MAX_TRABALHADORES * len(_CONTADORES) * 8
+_TAMANHO_ENTRADA = 8
+
+_BITS_PROFUNDIDADE = 6
+_MULTIPLICADOR = 0x9E3779B1  # dispersao de Fibonacci (32 bits)
+
+# Ficheiros de instantaneos
+_MAGICO_INSTANTANEO = b'MOINHOTI'
+_CABECALHO_INSTANTANEO = struct.Struct('<8sHHI')  # magico, versao do ficheiro, versao das entradas, numero de pares
+_VERSAO_INSTANTANEO = 1
+
+def _tamanho_bloco(entradas: int) -> int:
+    """Numero de bytes do bloco para uma tabela com 'entradas' posicoes."""
+    return _INICIO_ENTRADAS + entradas * _TAMANHO_ENTRADA
+
+# -------------------------------------------------------------------------------------------------
+# Tabela
+# -------------------------------------------------------------------------------------------------
+class TabelaTransposicao:
+    """
+    Tabela de transposicao de tamanho fixo com entradas compactas de 8 bytes.
+    Usa-se com projeto_final.definir_tabela_transposicao.
+    """
+    __slots__ = ('entradas', 'trabalhador', 'nome', '_shm', '_buffer', '_palavras', '_contadores', '_dono')
+
+    def __init__(self, entradas: int = 1 << 16, nome=None, partilhada: bool = True, trabalhador: int = 0):
+        """
+        Cria uma tabela nova (nome=None) ou anexa-se a uma tabela partilhada existente.
+
+        Args:
+            entradas (int): Numero de entradas (so usado ao criar).
+            nome (str | None): Nome do bloco de memoria partilhada a que se anexar.
+            partilhada (bool): Ao criar, usa memoria partilhada (True) ou um bytearray local (False).
+            trabalhador (int): Identificador (0..255) de quem usa esta vista da tabela.
+
+        Raises:
+            ValueError: Se os argumentos forem invalidos ou o bloco nao for uma tabela.
+        """
+        if not (isinstance(trabalhador, int) and 0 <= trabalhador < _MAX_TRABALHADORES):
+            raise ValueError('TabelaTransposicao: trabalhador invalido')
+        self.trabalhador = trabalhador
+        self._dono = nome is None
+        if nome is None:
+            if not (isinstance(entradas, int) and entradas > 0):
+                raise ValueError('TabelaTransposicao: numero de entradas invalido')
+            if partilhada:
+                self._shm = shared_memory.SharedMemory(create=True, size=_tamanho_bloco(entradas))
+                self._buffer = self._shm.buf
+                self.nome = self._shm.name
+            else:
+                self._shm = None
+                self._buffer = memoryview(bytearray(_tamanho_bloco(entradas)))
+                self.nome = None
+            self._buffer[:_INICIO_ENTRADAS] = bytes(_INICIO_ENTRADAS)
+            _CABECALHO.pack_into(self._buffer, 0, _MAGICO, _VERSAO, entradas)
+        else:
+            self._shm = shared_memory.SharedMemory(name=nome)
+            self._buffer = self._shm.buf
+            self.nome = nome
+            magico, versao, entradas = _CABECALHO.unpack_from(self._buffer, 0)
+            if magico != _MAGICO or versao != _VERSAO:
+                self._shm.close()
+                raise ValueError('TabelaTransposicao: bloco de memoria invalido')
+        self.entradas = entradas
+        self._palavras = self._buffer[_INICIO_ENTRADAS:].cast('I')
+        self._contadores = self._buffer[_INICIO_CONTADORES:_INICIO_ENTRADAS].cast('Q')
+
+    def _indice(self, chave_completa: int) -> int:
+        """Indice (em palavras de 32 bits) da entrada onde fica a chave."""
+        return ((chave_completa * _MULTIPLICADOR) & 0xFFFFFFFF) % self.entradas * 2
+
+    def _contar(self, contador: int) -> None:
+        """Incrementa um dos contadores deste trabalhador."""
+        self._contadores[self.trabalhador * len(_CONTADORES) + contador] += 1
+
+    def procurar(self, chave: int, profundidade: int):
+        """
+        Procura o resultado de uma posicao pesquisada com a mesma profundidade.
+
+        Args:
+            chave (int): A chave da posicao (chave do tabuleiro * 2 + 1 se joga 'O').
+            profundidade (int): A profundidade restante da pesquisa (0..63).
+
+        Returns:
+            tuple (int, int, int) | None: (valor, limite, movimento) ou None se nao existir.
+        """
+        chave_completa = ((chave << _BITS_PROFUNDIDADE) | profundidade) + 1
+        i = self._indice(chave_completa)
+        verificacao, dados = self._palavras[i], self._palavras[i + 1]
+        if verificacao ^ dados != chave_completa:
+            self._contar(2)
+            return None
+        self._contar(0)
+        if (dados >> 11) & 0xFF != self.trabalhador:
+            self._contar(1)
+        return (dados & 0b11) - 1, (dados >> 2) & 0b11, (dados >> 4) & 0x7F
+
+    def guardar(self, chave: int, profundidade: int, valor: int, limite: int, movimento: int) -> None:
+        """
+        Guarda (substituindo sempre) o resultado de uma posicao.
+
+        Args:
+            chave (int): A chave da posicao (chave do tabuleiro * 2 + 1 se joga 'O').
+            profundidade (int): A profundidade restante da pesquisa (0..63).
+            valor (int): O valor (-1, 0 ou 1).
+            limite (int): 0 exato, 1 limite inferior, 2 limite superior.
+            movimento (int): O codigo do melhor movimento (origem * 9 + destino, 127 se nenhum).
+        """
+        chave_completa = ((chave << _BITS_PROFUNDIDADE) | profundidade) + 1
+        dados = (valor + 1) | (limite << 2) | (movimento << 4) | (self.trabalhador << 11) \
+            | (profundidade << 19)
+        i = self._indice(chave_completa)
+        self._palavras[i] = chave_completa ^ dados
+        self._palavras[i + 1] = dados
+        self._contar(3)
+
+    def exportar(self) -> array:
+        """
+        Copia as entradas ocupadas.
+
+        Returns:
+            array: Pares (chave_completa, dados) seguidos, em 'I'.
+        """
+        pares = array('I')
+        palavras = self._palavras
+        for i in range(0, 2 * self.entradas, 2):
+            dados = palavras[i + 1]
+            if dados:
+                pares.append(palavras[i] ^ dados)
+                pares.append(dados)
+        return pares
+
+    def importar(self, pares, juntar: bool = True) -> int:
+        """
+        Escreve entradas exportadas (de uma tabela de qualquer tamanho).
+        Quando duas entradas caem no mesmo lugar, fica a da pesquisa mais profunda.
+
+        Args:
+            pares (array | list): Pares (chave_completa, dados) seguidos.
+            juntar (bool): Mantem as entradas atuais (True) ou apaga-as antes (False).
+
+        Returns:
+            int: O numero de entradas escritas.
+        """
+        if not juntar:
+            self.limpar()
+        palavras, escritas = self._palavras, 0
+        for j in range(0, len(pares) - 1, 2):
+            chave_completa, dados = pares[j], pares[j + 1]
+            i = self._indice(chave_completa)
+            atuais = palavras[i + 1]
+            if atuais and (atuais >> 19) > (dados >> 19):
+                continue
+            palavras[i] = chave_completa ^ dados
+            palavras[i + 1] = dados
+            escritas += 1
+        return escritas
+
+    def limpar(self) -> None:
+        """Apaga todas as entradas (os contadores mantem-se)."""
+        self._buffer[_INICIO_ENTRADAS:] = bytes(self.entradas * _TAMANHO_ENTRADA)
+
+    def estatisticas(self) -> dict:
+        """
+        Soma os contadores de todos os trabalhadores anexados a tabela.
+
+        Returns:
+            dict: acertos, acertos_cruzados, falhas, escritas, taxa_acertos e taxa_acertos_cruzados.
+        """
+        totais = dict.fromkeys(_CONTADORES, 0)
+        for t in range(_MAX_TRABALHADORES):
+            for c, nome in enumerate(_CONTADORES):
+                totais[nome] += self._contadores[t * len(_CONTADORES) + c]
+        consultas = totais['acertos'] + totais['falhas']
+        totais['taxa_acertos'] = totais['acertos'] / consultas if consultas else 0.0
+        totais['taxa_acertos_cruzados'] = totais['acertos_cruzados'] / consultas if consultas else 0.0
+        return totais
+
+    def fechar(self) -> None:
+        """Liberta esta vista da tabela (e o bloco partilhado, se foi esta vista que o criou)."""
+        self._palavras.release()
+        self._contadores.release()
+        if self._shm is not None:
+            self._buffer = None
+            self._shm.close()
+            if self._dono:
+                self._shm.unlink()
+            self._shm = None
+
+# -------------------------------------------------------------------------------------------------
+# Instantaneos em disco
+# -------------------------------------------------------------------------------------------------
+def _escrever_pares(pares: array, caminho: str) -> int:
+    """Escreve pares (chave_completa, dados) num ficheiro de instantaneo."""
+    if sys.byteorder == 'big':
+        pares = array('I', pares)
+        pares.byteswap()
+    with open(caminho, 'wb') as ficheiro:
+        ficheiro.write(_CABECALHO_INSTANTANEO.pack(_MAGICO_INSTANTANEO, _VERSAO_INSTANTANEO, _VERSAO, len(pares) // 2))
+        ficheiro.write(pares.tobytes())
+    return len(pares) // 2
+
+def guardar_instantaneo(tabela: TabelaTransposicao, caminho: str) -> int:
+    """
+    Guarda as entradas ocupadas de uma tabela num ficheiro.
+
+    Args:
+        tabela (TabelaTransposicao): A tabela.
+        caminho (str): O ficheiro de destino.
+
+    Returns:
+        int: O numero de entradas guardadas.
+    """
+    return _escrever_pares(tabela.exportar(), caminho)
+
+def ler_instantaneo(caminho: str) -> array:
+    """
+    Le os pares (chave_completa, dados) de um ficheiro de instantaneo.
+
+    Args:
+        caminho (str): O ficheiro.
+
+    Returns:
+        array: Os pares seguidos, em 'I'.
+
+    Raises:
+        ValueError: Se o ficheiro nao for um instantaneo desta versao.
+    """
+    with open(caminho, 'rb') as ficheiro:
+        dados = ficheiro.read()
+    if len(dados) < _CABECALHO_INSTANTANEO.size:
+        raise ValueError('ler_instantaneo: ficheiro invalido')
+    magico, versao, versao_entradas, n = _CABECALHO_INSTANTANEO.unpack_from(dados)
+    if (magico, versao, versao_entradas) != (_MAGICO_INSTANTANEO, _VERSAO_INSTANTANEO, _VERSAO) \
+            or len(dados) != _CABECALHO_INSTANTANEO.size + 8 * n:
+        raise ValueError('ler_instantaneo: ficheiro invalido ou de outra versao')
+    pares = array('I')
+    pares.frombytes(dados[_CABECALHO_INSTANTANEO.size:])
+    if sys.byteorder == 'big':
+        pares.byteswap()
+    return pares
+
+def carregar_instantaneo(tabela: TabelaTransposicao, caminho: str, juntar: bool = True) -> int:
+    """
+    Carrega um instantaneo numa tabela (ver TabelaTransposicao.importar).
+
+    Args:
+        tabela (TabelaTransposicao): A tabela.
+        caminho (str): O ficheiro.
+        juntar (bool): Mantem as entradas atuais da tabela.
+
+    Returns:
+        int: O numero de entradas escritas.
+    """
+    return tabela.importar(ler_instantaneo(caminho), juntar)
+
+def juntar_instantaneos(caminhos, destino: str) -> int:
+    """
+    Junta varios instantaneos num so (sem limite de tamanho: uma entrada por chave_completa).
+    Para a mesma chave fica a entrada do ultimo ficheiro.
+
+    Args:
+        caminhos (iterable): Os ficheiros a juntar.
+        destino (str): O ficheiro de destino.
+
+    Returns:
+        int: O numero de entradas do instantaneo junto.
+    """
+    entradas = {}
+    for caminho in caminhos:
+        pares = ler_instantaneo(caminho)
+        entradas.update(zip(pares[0::2], pares[1::2]))
+    pares = array('I')
+    for chave_completa, dados in entradas.items():
+        pares.append(chave_completa)
+        pares.append(dados)
+    return _escrever_pares(pares, destino)
+
+# -------------------------------------------------------------------------------------------------
+# Integracao com conjuntos de processos
+# -------------------------------------------------------------------------------------------------
+def criar_tabela_partilhada(entradas: int = 1 << 16) -> TabelaTransposicao:
+    """
+    Cria uma tabela em memoria partilhada e ativa-a no processo atual (trabalhador 0).
+
+    Args:
+        entradas (int): Numero de entradas.
+
+    Returns:
+        TabelaTransposicao: A tabela criada (chamar fechar() no fim para libertar o bloco).
+    """
+    tabela = TabelaTransposicao(entradas)
+    definir_tabela_transposicao(tabela)
+    return tabela
+
+def anexar_tabela_partilhada(nome: str, trabalhador: int) -> TabelaTransposicao:
+    """
+    Anexa-se a uma tabela partilhada existente e ativa-a no processo atual.
+
+    Args:
+        nome (str): O nome do bloco (TabelaTransposicao.nome).
+        trabalhador (int): Identificador unico deste processo (1..255).
+
+    Returns:
+        TabelaTransposicao: A vista da tabela neste processo.
+    """
+    tabela = TabelaTransposicao(nome=nome, trabalhador=trabalhador)
+    definir_tabela_transposicao(tabela)
+    return tabela
+
+def inicializar_trabalhador(nome: str, contador) -> None:
+    """
+    Funcao 'initializer' para ProcessPoolExecutor/multiprocessing.Pool: cada processo
+    recebe um identificador unico do contador partilhado e anexa-se a tabela.
+
+    Args:
+        nome (str): O nome do bloco da tabela partilhada.
+        contador (multiprocessing.Value): Contador partilhado ('i') para atribuir identificadores.
+    """
+    with contador.get_lock():
+        contador.value += 1
+        trabalhador = contador.value
+    anexar_tabela_partilhada(nome, 1 + (trabalhador - 1) % (_MAX_TRABALHADORES - 1))
+
+def main(argumentos=None) -> int:
+    """Ponto de entrada da linha de comandos."""
+    parser = argparse.ArgumentParser(description='Instantaneos da tabela de transposicao.')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    juntar = comandos.add_parser('juntar', help='junta varios instantaneos num so')
+    juntar.add_argument('instantaneos', nargs='+')
+    juntar.add_argument('-o', '--saida', required=True)
+    args = parser.parse_args(argumentos)
+
+    n = juntar_instantaneos(args.instantaneos, args.saida)
+    print(f'{n} entradas em {args.saida}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())